@@ -1,38 +1,225 @@
+from __future__ import annotations
+
 import argparse
+import sys
 import tempfile
 from pathlib import Path
+from typing import List, TYPE_CHECKING
+
+# Modules are imported where they are needed, so that the client never
+# imports EntityLib nor graphviz, and the no GUI mode never imports PySide2
+from PropertyGrapher.grapher import client
+
+if TYPE_CHECKING:
+    from EntityLibPy import EntityLib
+    from PropertyGrapher.ui.main_window import GraphViewer
 
-from EntityLibPy import EntityLib
+# Keys of exporters.EXPORTERS, exporters imports EntityLib and graphviz
+EXPORT_FORMATS = ("csv", "dot", "graphml", "ndjson")
 
-from PropertyGrapher.grapher import graph
-from PropertyGrapher.ui import main_window
 
+def create_no_gui_grapher(
+    entity_lib: EntityLib,
+    file_paths: List[Path],
+    output_path: Path,
+    export_format: str = None,
+    image_format: str = "png",
+    save_snapshot: bool = False,
+):
+    from PropertyGrapher.grapher import graph
 
-def create_no_gui_grapher(entity_lib: EntityLib, file_path: Path, output_path: Path):
-    if not file_path:
+    if not file_paths:
         raise FileNotFoundError("Can only use no GUI mode with a provided file.")
-    graph.create_graph(
-        entity_lib,
-        file_path,
-        output_path,
-    )
+    if export_format:
+        from PropertyGrapher.grapher import exporters
+
+        exporters.export_graph(entity_lib, file_paths, output_path, export_format)
+        return
+    if save_snapshot:
+        from PropertyGrapher.grapher import snapshot
+
+        grapher = graph.get_grapher(entity_lib, file_paths, output_path)
+        snapshot_path = snapshot.get_snapshot_path(grapher)
+        snapshot.write_snapshot(snapshot.create_snapshot(grapher), snapshot_path)
+        print(f"{snapshot_path} created")
+
+        # Hierarchy is already resolved by the snapshot
+        grapher.generate_graph_files(
+            grapher.generate_graph(), image_format=image_format, background=True
+        )
+    else:
+        graph.create_combined_graph(
+            entity_lib,
+            file_paths,
+            output_path,
+            image_format=image_format,
+        )
+    # Images are rendered in background, their failures are the process' ones
+    graph.wait_for_renders()
 
 
 def create_gui_grapher(
-    entity_lib: EntityLib, output_path: Path, file_path: Path = None
-) -> main_window.GraphViewer:
+    rawdata_path: str,
+    schema_path: str,
+    output_path: Path,
+    file_paths: List[Path] = None,
+) -> GraphViewer:
+    from PropertyGrapher.ui import main_window
+
+    # EntityLib is loaded in background, once the window is displayed
+    if file_paths and len(file_paths) == 1 and file_paths[0].is_file():
+        return main_window.create_window(
+            None,
+            output_path,
+            file_path=file_paths[0],
+            rawdata_path=rawdata_path,
+            schema_path=schema_path,
+        )
     return main_window.create_window(
-        entity_lib,
+        None,
         output_path,
-        file_path=file_path,
+        file_paths=file_paths,
+        rawdata_path=rawdata_path,
+        schema_path=schema_path,
     )
 
 
-if __name__ == "__main__":
+def run_service(args: List[str]) -> None:
+    parser = argparse.ArgumentParser(
+        description="Dependencies grapher service, keeping EntityLib loaded"
+    )
+    parser.add_argument("rawdata_path", help="Entity library rawdata_path")
+    parser.add_argument("schema_path", help="Entity library schema path")
+    parser.add_argument(
+        "-o",
+        "--output_path",
+        help="Set created graphs default output path, otherwise temp folder will be used",
+    )
+    parser.add_argument("--host", default=client.DEFAULT_HOST)
+    parser.add_argument("--port", default=client.DEFAULT_PORT, type=int)
+    parser.add_argument(
+        "-w", "--workers", help="Concurrent graph requests", default=4, type=int
+    )
+    args = parser.parse_args(args)
+
+    from EntityLibPy import EntityLib
+    from PropertyGrapher.grapher import service
+
+    service.serve(
+        EntityLib(args.rawdata_path, args.schema_path),
+        Path(args.output_path or tempfile.gettempdir()),
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+    )
+
+
+def run_snapshot(args: List[str]) -> None:
+    parser = argparse.ArgumentParser(
+        description="Dependencies grapher of a snapshot, without loading EntityLib"
+    )
+    parser.add_argument("snapshot_path", help="Snapshot file, see -s")
+    parser.add_argument(
+        "-o",
+        "--output_path",
+        help="Set created graph output path, otherwise temp folder will be used",
+    )
+    parser.add_argument(
+        "-i",
+        "--image",
+        help="Image format, tiles being a deep zoom png pyramid",
+        choices=client.IMAGE_FORMATS,
+        default="png",
+    )
+    parser.add_argument(
+        "-noimg",
+        "--no_image",
+        help="If set, only the json file is created",
+        action="store_true",
+    )
+    args = parser.parse_args(args)
+
+    from PropertyGrapher.grapher import graph, snapshot
+
+    snapshot.create_graph_from_snapshot(
+        Path(args.snapshot_path),
+        Path(args.output_path or tempfile.gettempdir()),
+        image_format=None if args.no_image else args.image,
+    )
+    graph.wait_for_renders()
+
+
+def run_analytics(args: List[str]) -> None:
+    parser = argparse.ArgumentParser(
+        description="Dependency analytics of all the entity files of a rawdata tree"
+    )
+    parser.add_argument("rawdata_path", help="Entity library rawdata_path")
+    parser.add_argument("schema_path", help="Entity library schema path")
+    parser.add_argument(
+        "-o",
+        "--output_path",
+        help="Set reports output path, otherwise temp folder will be used",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        help="Worker processes resolving files, one per CPU by default",
+        type=int,
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        help="Files report format",
+        choices=["csv", "json"],
+        default="csv",
+    )
+    parser.add_argument(
+        "-t",
+        "--top",
+        help="Files listed by metric in the summary",
+        default=20,
+        type=int,
+    )
+    parser.add_argument(
+        "-c",
+        "--closure_threshold",
+        help="List files depending on more files than this in the summary",
+        type=int,
+    )
+    parser.add_argument(
+        "--fast",
+        help="Scan files' JSON for their declared references, only loading "
+        "with EntityLib the ones that can't be scanned",
+        action="store_true",
+    )
+    args = parser.parse_args(args)
+
+    from PropertyGrapher.grapher import analytics
+
+    dependency_graph = analytics.build_dependency_graph(
+        args.rawdata_path, args.schema_path, workers=args.workers, fast=args.fast
+    )
+    for report_path in analytics.write_reports(
+        dependency_graph,
+        Path(args.output_path or tempfile.gettempdir()),
+        report_format=args.format,
+        top=args.top,
+        closure_threshold=args.closure_threshold,
+    ):
+        print(f"{report_path} created")
+
+
+def run_grapher(args: List[str]) -> None:
     parser = argparse.ArgumentParser(description="Dependencies grapher")
     parser.add_argument("rawdata_path", help="Entity library rawdata_path")
     parser.add_argument("schema_path", help="Entity library schema path")
-    parser.add_argument("-f", "--file", help="File to open", type=str)
+    parser.add_argument(
+        "-f",
+        "--file",
+        help="File to open, several files or directories are combined in one graph",
+        type=str,
+        nargs="+",
+    )
     parser.add_argument(
         "-ng",
         "--no_gui",
@@ -44,14 +231,73 @@ if __name__ == "__main__":
         "--output_path",
         help="Set created graph output path, otherwise temp folder will be used",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "-e",
+        "--export",
+        help="In no GUI mode, only export the graph's topology in this format, "
+        "without laying it out",
+        choices=EXPORT_FORMATS,
+    )
+    parser.add_argument(
+        "-i",
+        "--image",
+        help="In no GUI mode, image format, tiles being a deep zoom png pyramid "
+        "sliced with PySide2",
+        choices=client.IMAGE_FORMATS,
+        default="png",
+    )
+    parser.add_argument(
+        "-noimg",
+        "--no_image",
+        help="In no GUI mode, if set, only the json file is created",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-s",
+        "--snapshot",
+        help="In no GUI mode, also save the resolved hierarchy's snapshot, "
+        "to graph it again without EntityLib",
+        action="store_true",
+    )
+    args = parser.parse_args(args)
+    if args.no_gui and not (args.export or args.no_image) and args.image == "tiles":
+        from PropertyGrapher.grapher.render import can_slice_tiles
 
-    _output_path = Path(args.output_path or tempfile.gettempdir())
-    _file_path = Path(args.file) if args.file else None
+        # Checked before EntityLib loads and resolves the graph, not at render
+        if not can_slice_tiles():
+            parser.error("tiles are sliced with Qt, they need PySide2 to be installed")
 
-    entity_lib = EntityLib(args.rawdata_path, args.schema_path)
+    _output_path = Path(args.output_path or tempfile.gettempdir())
+    _file_paths = [Path(file) for file in args.file] if args.file else None
 
     if args.no_gui:
-        create_no_gui_grapher(entity_lib, _file_path, _output_path)
+        from EntityLibPy import EntityLib
+
+        create_no_gui_grapher(
+            EntityLib(args.rawdata_path, args.schema_path),
+            _file_paths,
+            _output_path,
+            export_format=args.export,
+            image_format=None if args.no_image else args.image,
+            save_snapshot=args.snapshot,
+        )
+    else:
+        create_gui_grapher(
+            args.rawdata_path,
+            args.schema_path,
+            _output_path,
+            file_paths=_file_paths,
+        )
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["serve"]:
+        run_service(sys.argv[2:])
+    elif sys.argv[1:2] == ["client"]:
+        client.main(sys.argv[2:])
+    elif sys.argv[1:2] == ["snapshot"]:
+        run_snapshot(sys.argv[2:])
+    elif sys.argv[1:2] == ["analytics"]:
+        run_analytics(sys.argv[2:])
     else:
-        create_gui_grapher(entity_lib, _output_path, file_path=_file_path)
+        run_grapher(sys.argv[1:])
@@ -0,0 +1,111 @@
+"""Compare DOT source emission of graphviz.Digraph and the grapher's DotGraph.
+
+A synthetic hierarchy, shaped like the grapher's ones, is emitted with both:
+each node has a prefab and sub scenes, with labels and tooltips of the same
+length as real ones, and nodes shared by several parents are given again.
+
+    python path/to/your/PropertyGrapher/benchmarks/dot_source.py -n 10000
+"""
+import argparse
+import json
+import random
+import time
+from typing import Callable, Dict, List, Tuple
+
+from graphviz import Digraph
+
+from PropertyGrapher.grapher.dot import DotGraph, HtmlLabel
+from PropertyGrapher.grapher.styles import (
+    PrefabArrowStyle,
+    PrefabNodeStyle,
+    SubSceneArrowStyle,
+    SubSceneNodeStyle,
+)
+
+Element = Tuple[str, Tuple[str, ...], Dict[str, str]]
+
+
+def get_elements(nodes_count: int, seed: int = 0) -> List[Element]:
+    """Get nodes and edges calls, in the order a walk would make them."""
+    generator = random.Random(seed)
+    elements = []
+    for i in range(nodes_count):
+        node_style = PrefabNodeStyle if generator.random() < 0.3 else SubSceneNodeStyle
+        name = f"Components/SubScene/Embedded/node_{i}"
+        elements.append(
+            (
+                "node",
+                (name,),
+                dict(
+                    label=HtmlLabel(
+                        f"<node_{i}<br/>---------<br/>entity_{i}.entity>"
+                    ),
+                    shape=node_style.shape,
+                    fillcolor=node_style.color,
+                    style=node_style.style,
+                    tooltip=f"levels/sub_level/entities/entity_{i}.entity",
+                ),
+            )
+        )
+        if i:
+            arrow_style = (
+                PrefabArrowStyle if node_style == PrefabNodeStyle else SubSceneArrowStyle
+            )
+            source = f"Components/SubScene/Embedded/node_{generator.randrange(i)}"
+            elements.append(
+                (
+                    "edge",
+                    (source, name),
+                    dict(color=arrow_style.color, style=arrow_style.style),
+                )
+            )
+            # Shared nodes are added and connected again from another parent
+            if generator.random() < 0.2:
+                elements.extend(elements[-2:])
+    return elements
+
+
+def emit_digraph(elements: List[Element]) -> str:
+    graph = Digraph(graph_attr={"rankdir": "BT", "ranksep": "2"}, strict=True)
+    for kind, names, attributes in elements:
+        getattr(graph, kind)(*names, **attributes)
+    return graph.source
+
+
+def emit_dot_graph(elements: List[Element]) -> str:
+    graph = DotGraph(graph_attr={"rankdir": "BT", "ranksep": "2"})
+    for kind, names, attributes in elements:
+        getattr(graph, kind)(*names, **attributes)
+    return graph.source
+
+
+def measure(emit: Callable[[List[Element]], str], elements: List[Element], repeat: int) -> dict:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        source = emit(elements)
+        times.append(time.perf_counter() - start)
+    return {"time_min": min(times), "size": len(source.encode())}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DOT source emission benchmark")
+    parser.add_argument("-n", "--nodes", default=10000, type=int)
+    parser.add_argument("-r", "--repeat", default=5, type=int)
+    parser.add_argument("-o", "--output", help="Write results to this json file")
+    args = parser.parse_args()
+
+    _elements = get_elements(args.nodes)
+    _results = {
+        "digraph": measure(emit_digraph, _elements, args.repeat),
+        "dot_graph": measure(emit_dot_graph, _elements, args.repeat),
+    }
+    for _name, _result in _results.items():
+        print(
+            f"{_name}: {_result['time_min'] * 1000:.1f}ms, "
+            f"{_result['size'] / 1024:.0f} KB of DOT"
+        )
+
+    if args.output:
+        with open(args.output, "w") as json_file:
+            json.dump(_results, json_file, indent=2, sort_keys=True)
@@ -0,0 +1,112 @@
+"""Measure layout strategies' time on synthetic graphs of growing sizes.
+
+Graphs are the dot_source benchmark's hierarchies. Each strategy lays out
+each size until it exceeds the time budget, bigger sizes are then skipped.
+The largest size a strategy lays out within the budget suggests its
+thresholds, which can be set in the `layout` key of `config.json`.
+
+    python path/to/your/PropertyGrapher/benchmarks/layout_strategies.py -b 4
+"""
+import argparse
+import json
+import subprocess
+import time
+from typing import Dict, List, Optional
+
+from PropertyGrapher.benchmarks.dot_source import get_elements
+from PropertyGrapher.grapher.dot import DotGraph
+from PropertyGrapher.grapher.layout import LAYOUT_STRATEGIES, LayoutStrategy
+from PropertyGrapher.utils.property_helper import get_config
+
+DEFAULT_SIZES = [500, 1000, 2000, 3000, 4000, 6000, 8000, 12000, 16000, 24000, 32000]
+
+
+def get_graph(nodes_count: int) -> DotGraph:
+    graph = DotGraph(graph_attr={"rankdir": "BT", "ranksep": "2"})
+    for kind, names, attributes in get_elements(nodes_count):
+        getattr(graph, kind)(*names, **attributes)
+    return graph
+
+
+def measure_layout(
+    graph: DotGraph, strategy: LayoutStrategy, time_budget: float
+) -> Optional[float]:
+    """Get the layout's time in seconds, None if it exceeds time_budget.
+
+    Raise CalledProcessError if the engine fails.
+    """
+    source = graph.source.encode()
+    start = time.perf_counter()
+    try:
+        subprocess.run(
+            [strategy.engine, "-Tplain", *strategy.args],
+            input=source,
+            capture_output=True,
+            check=True,
+            timeout=time_budget,
+        )
+    except subprocess.TimeoutExpired:
+        return None
+    return time.perf_counter() - start
+
+
+def benchmark_strategies(sizes: List[int], time_budget: float) -> Dict[str, dict]:
+    results = {strategy.name: {"times": {}} for strategy in LAYOUT_STRATEGIES}
+    for strategy in LAYOUT_STRATEGIES:
+        for nodes_count in sizes:
+            graph = get_graph(nodes_count)
+            try:
+                layout_time = measure_layout(graph, strategy, time_budget)
+                outcome = (
+                    f"{layout_time:.2f}s"
+                    if layout_time is not None
+                    else f"over {time_budget:.0f}s"
+                )
+            except subprocess.CalledProcessError as error:
+                # e.g. an engine's plugin is missing from the Graphviz build
+                layout_time = None
+                outcome = f"failed, {error.stderr.decode(errors='replace').strip()}"
+            results[strategy.name]["times"][nodes_count] = layout_time
+            print(
+                f"{strategy.name} {nodes_count} nodes, {len(graph.edges)} edges: "
+                f"{outcome}"
+            )
+            if layout_time is None:
+                break
+
+        within_budget = [
+            nodes_count
+            for nodes_count, layout_time in results[strategy.name]["times"].items()
+            if layout_time is not None
+        ]
+        results[strategy.name]["max_nodes"] = max(within_budget, default=None)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Layout strategies benchmark")
+    parser.add_argument("-n", "--nodes", nargs="+", type=int, default=DEFAULT_SIZES)
+    parser.add_argument(
+        "-b",
+        "--budget",
+        default=10.0,
+        type=float,
+        help="Time budget of a layout in seconds",
+    )
+    parser.add_argument("-o", "--output", help="Write results to this json file")
+    args = parser.parse_args()
+
+    _results = benchmark_strategies(sorted(args.nodes), args.budget)
+    _thresholds = get_config().get("layout", {})
+    for _strategy in LAYOUT_STRATEGIES:
+        _max_nodes = _thresholds.get(_strategy.name, {}).get(
+            "max_nodes", _strategy.max_nodes
+        )
+        print(
+            f"{_strategy.name}: up to {_results[_strategy.name]['max_nodes']} nodes "
+            f"within {args.budget:.0f}s, configured up to {_max_nodes}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as json_file:
+            json.dump(_results, json_file, indent=2, sort_keys=True)
@@ -0,0 +1,111 @@
+"""Measure the memory used to build the dependencies graph of files.
+
+Each measure runs in a fresh Python process, as peak memory can't be reset.
+Memory is given on top of the loaded EntityLib's one: the peak while the
+hierarchy is loaded, and the steady state once it is built.
+
+    python path/to/your/PropertyGrapher/benchmarks/memory.py path/to/raw/data path/to/schema -f path/to/your/file
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import List
+
+_MEASURE_SCRIPT = """
+import gc, json, tempfile, time
+from pathlib import Path
+from EntityLibPy import EntityLib
+from PropertyGrapher.grapher.graph import get_grapher
+from PropertyGrapher.utils.memory import get_peak_process_memory, get_process_memory
+
+entity_lib = EntityLib({rawdata_path!r}, {schema_path!r})
+gc.collect()
+base_memory = get_process_memory()
+
+start = time.perf_counter()
+grapher = get_grapher(
+    entity_lib,
+    [Path(file_path) for file_path in {file_paths!r}],
+    Path(tempfile.gettempdir()),
+    view=False,
+)
+nodes = sum(1 for _ in grapher.iter_graph(grapher.graph))
+build_time = time.perf_counter() - start
+
+gc.collect()
+print(json.dumps({{
+    "nodes": nodes,
+    "build_time": build_time,
+    "base_memory": base_memory,
+    "steady_memory": get_process_memory() - base_memory,
+    "peak_memory": get_peak_process_memory() - base_memory,
+}}))
+"""
+
+
+def measure_memory(rawdata_path: str, schema_path: str, file_paths: List[str]) -> dict:
+    env = dict(os.environ)
+    package_parent = Path(os.path.abspath(__file__)).parents[2].as_posix()
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [package_parent, env.get("PYTHONPATH")])
+    )
+    script = _MEASURE_SCRIPT.format(
+        rawdata_path=rawdata_path, schema_path=schema_path, file_paths=file_paths
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def benchmark_memory(
+    repeat: int, rawdata_path: str, schema_path: str, file_paths: List[str]
+) -> dict:
+    measures = [
+        measure_memory(rawdata_path, schema_path, file_paths) for _ in range(repeat)
+    ]
+    return {
+        "nodes": measures[0]["nodes"],
+        "build_time_median": statistics.median(
+            measure["build_time"] for measure in measures
+        ),
+        "steady_memory_median": statistics.median(
+            measure["steady_memory"] for measure in measures
+        ),
+        "peak_memory_max": max(measure["peak_memory"] for measure in measures),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Grapher memory benchmark")
+    parser.add_argument("rawdata_path", help="Entity library rawdata_path")
+    parser.add_argument("schema_path", help="Entity library schema path")
+    parser.add_argument(
+        "-f",
+        "--file",
+        help="Files or directories whose graph is built",
+        nargs="+",
+        required=True,
+    )
+    parser.add_argument("-r", "--repeat", default=3, type=int)
+    parser.add_argument("-o", "--output", help="Write results to this json file")
+    args = parser.parse_args()
+
+    _result = benchmark_memory(args.repeat, args.rawdata_path, args.schema_path, args.file)
+    print(
+        f"{_result['nodes']} nodes built in {_result['build_time_median'] * 1000:.1f}ms, "
+        f"steady {_result['steady_memory_median'] / (1024 * 1024):.1f} MB, "
+        f"peak {_result['peak_memory_max'] / (1024 * 1024):.1f} MB"
+    )
+
+    if args.output:
+        with open(args.output, "w") as json_file:
+            json.dump(_result, json_file, indent=2, sort_keys=True)
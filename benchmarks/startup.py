@@ -0,0 +1,135 @@
+"""Measure the grapher's cold start latency for each of its modes.
+
+Each measure runs in a fresh Python process, so imports are never cached.
+Modes which must stay light are checked for unwanted imports.
+
+    python path/to/your/PropertyGrapher/benchmarks/startup.py -r 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# __main__'s GUI path, from its import to the window's creation, excluded
+_GUI_MAIN_STARTUP = """
+from PropertyGrapher import __main__ as grapher_main
+grapher_main.create_gui_grapher = lambda *args, **kwargs: __import__(
+    "PropertyGrapher.ui.main_window"
+)
+grapher_main.run_grapher(["rawdata", "schema"])
+"""
+
+# Startup code, and modules that must not be imported by it
+STARTUP_MODES = {
+    "client": (
+        "import PropertyGrapher.grapher.client",
+        ["EntityLibPy", "graphviz", "PySide2"],
+    ),
+    "no_gui": ("import PropertyGrapher.grapher.exporters", ["PySide2"]),
+    "gui": ("import PropertyGrapher.ui.main_window", []),
+    "gui_main": (_GUI_MAIN_STARTUP, []),
+}
+
+_MEASURE_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+{startup}
+import_time = time.perf_counter() - start
+entity_lib_time = None
+if {entity_lib_args!r}:
+    from EntityLibPy import EntityLib
+    start = time.perf_counter()
+    EntityLib(*{entity_lib_args!r})
+    entity_lib_time = time.perf_counter() - start
+print(json.dumps({{
+    "import_time": import_time,
+    "entity_lib_time": entity_lib_time,
+    "forbidden_imports": [m for m in {forbidden!r} if m in sys.modules],
+}}))
+"""
+
+
+def measure_startup(
+    startup: str, forbidden: List[str], entity_lib_args: Optional[List[str]] = None
+) -> dict:
+    env = dict(os.environ)
+    package_parent = Path(os.path.abspath(__file__)).parents[2].as_posix()
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [package_parent, env.get("PYTHONPATH")])
+    )
+    script = _MEASURE_SCRIPT.format(
+        startup=startup.strip(),
+        forbidden=forbidden,
+        entity_lib_args=entity_lib_args or [],
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def benchmark_startup(
+    repeat: int, entity_lib_args: Optional[List[str]] = None
+) -> Dict[str, dict]:
+    results = {}
+    for mode, (startup, forbidden) in STARTUP_MODES.items():
+        measures = [
+            measure_startup(
+                startup, forbidden, entity_lib_args if mode != "client" else None
+            )
+            for _ in range(repeat)
+        ]
+        import_times = [measure["import_time"] for measure in measures]
+        entity_lib_times = [
+            measure["entity_lib_time"]
+            for measure in measures
+            if measure["entity_lib_time"] is not None
+        ]
+        results[mode] = {
+            "import_time_median": statistics.median(import_times),
+            "import_time_min": min(import_times),
+            "entity_lib_time_median": statistics.median(entity_lib_times)
+            if entity_lib_times
+            else None,
+            "forbidden_imports": sorted(
+                {m for measure in measures for m in measure["forbidden_imports"]}
+            ),
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Grapher cold start benchmark")
+    parser.add_argument("-r", "--repeat", default=5, type=int)
+    parser.add_argument(
+        "--entity_lib",
+        help="Rawdata and schema paths, to also measure EntityLib initialization",
+        nargs=2,
+    )
+    parser.add_argument("-o", "--output", help="Write results to this json file")
+    args = parser.parse_args()
+
+    _results = benchmark_startup(args.repeat, args.entity_lib)
+    for _mode, _result in _results.items():
+        print(
+            f"{_mode}: import {_result['import_time_median'] * 1000:.1f}ms"
+            + (
+                f", EntityLib {_result['entity_lib_time_median'] * 1000:.1f}ms"
+                if _result["entity_lib_time_median"] is not None
+                else ""
+            )
+        )
+        if _result["forbidden_imports"]:
+            print(f"\t- unexpected imports: {', '.join(_result['forbidden_imports'])}")
+
+    if args.output:
+        with open(args.output, "w") as json_file:
+            json.dump(_results, json_file, indent=2, sort_keys=True)
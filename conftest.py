@@ -0,0 +1,19 @@
+"""Let pytest run the tests from a checkout, whatever its folder is named.
+
+Tests import the package as PropertyGrapher, so when the checkout can't be
+imported under that name, it is registered as PropertyGrapher here.
+"""
+import importlib.util
+import sys
+from pathlib import Path
+
+if importlib.util.find_spec("PropertyGrapher") is None:
+    _root = Path(__file__).parent
+    _spec = importlib.util.spec_from_file_location(
+        "PropertyGrapher",
+        _root / "__init__.py",
+        submodule_search_locations=[str(_root)],
+    )
+    _package = importlib.util.module_from_spec(_spec)
+    sys.modules["PropertyGrapher"] = _package
+    _spec.loader.exec_module(_package)
@@ -0,0 +1,495 @@
+"""Dependency analytics over a whole rawdata tree.
+
+Every entity file is resolved once, only for its direct dependencies: its
+prefab and the files its sub scenes instance, embedded sub scenes being part
+of their file. Files are resolved by worker processes, each with its own
+EntityLib, recycled after some files so the loaded documents don't pile up.
+In fast mode, files' JSON is scanned instead, see utils/entity_scanner.py,
+EntityLib only being loaded for the files the scanner can't interpret.
+
+The files graph is kept as arrays of indexes. Fan-in, fan-out and prefab
+depth are computed from it, then strongly connected components, and
+dependency depth and transitive closure sizes from their condensation.
+Closures are bitsets only kept until all their dependents are computed.
+"""
+from __future__ import annotations
+
+import csv
+import json
+import multiprocessing
+import os
+from array import array
+from itertools import islice
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from PropertyGrapher.utils.entity_scanner import scan_entity_file
+from PropertyGrapher.utils.property_helper import GraphProperty
+
+# Files graphs are analysed without EntityLib, it is only imported by the
+# workers loading files
+if TYPE_CHECKING:
+    from EntityLibPy import EntityLib
+
+REPORT_FORMATS = ["csv", "json"]
+REPORT_FIELDS = [
+    "file",
+    "resolved",
+    "fan_in",
+    "fan_out",
+    "prefab_depth",
+    "depth",
+    "closure_size",
+    "component",
+    "error",
+]
+
+# File, its prefab, its dependencies, the error that stopped its
+# resolution and whether it was scanned
+FileDependencies = Tuple[str, Optional[str], List[str], Optional[str], bool]
+
+
+class FileReference:
+    """File instanced by a sub scene, not loaded."""
+
+    def __init__(self, file_path: Path) -> None:
+        self.file_path = file_path.as_posix()
+        self.source_is_set = None
+        self.property_path = None
+
+
+class DependencyProperty(GraphProperty):
+    """GraphProperty only resolving the dependencies of its own file.
+
+    Files instanced by its sub scenes are not loaded but referenced.
+    """
+
+    @staticmethod
+    def load_from_file(
+        entity_lib: EntityLib,
+        file_to_open: Path,
+        property_name: str = None,
+        parent: GraphProperty = None,
+    ) -> FileReference:
+        return FileReference(file_to_open)
+
+
+def get_file_dependencies(
+    entity_lib: EntityLib, file_path: str, declared_only: bool = False
+) -> Tuple[Optional[str], List[str]]:
+    """Get a file's prefab, and all the files it depends on.
+
+    With declared_only, sub scenes inherited from the prefab are skipped,
+    as a scan would, see utils/entity_scanner.py.
+    """
+    root_prop = DependencyProperty(
+        entity_lib.load_property(file_path), Path(file_path)
+    )
+
+    dependencies = []
+    props_to_visit = [root_prop]
+    while props_to_visit:
+        prop = props_to_visit.pop()
+        if prop.instance_of:
+            dependencies.append(prop.instance_of)
+        for sub_scene in prop.get_sub_scenes():
+            if isinstance(sub_scene, FileReference):
+                is_set = sub_scene.source_is_set
+            else:
+                is_set = sub_scene.is_set
+            if declared_only and not is_set:
+                continue
+
+            if isinstance(sub_scene, FileReference):
+                dependencies.append(sub_scene.file_path)
+            else:
+                props_to_visit.append(sub_scene)
+        # Sub scenes instancing their own file are skipped, but still depend on it
+        dependencies.extend(prop.cyclic_references)
+    return root_prop.instance_of, dependencies
+
+
+_worker_paths: Tuple[str, str] = ("", "")
+_worker_fast = False
+_worker_entity_lib: Optional[EntityLib] = None
+
+
+def init_worker(rawdata_path: str, schema_path: str, fast: bool = False) -> None:
+    global _worker_paths, _worker_fast, _worker_entity_lib
+    _worker_paths = (rawdata_path, schema_path)
+    _worker_fast = fast
+    _worker_entity_lib = None
+    # Fast workers only load EntityLib for the first file they can't scan
+    if not fast:
+        get_worker_entity_lib()
+
+
+def get_worker_entity_lib() -> EntityLib:
+    from EntityLibPy import EntityLib
+
+    global _worker_entity_lib
+    if _worker_entity_lib is None:
+        _worker_entity_lib = EntityLib(*_worker_paths)
+    return _worker_entity_lib
+
+
+def resolve_files(file_paths: List[str]) -> List[FileDependencies]:
+    results = []
+    for file_path in file_paths:
+        if _worker_fast:
+            scanned = scan_entity_file(Path(_worker_paths[0], file_path))
+            if scanned:
+                results.append(
+                    (file_path, scanned.instance_of, scanned.dependencies, None, True)
+                )
+                continue
+
+        try:
+            prefab, dependencies = get_file_dependencies(
+                get_worker_entity_lib(), file_path, declared_only=_worker_fast
+            )
+            results.append((file_path, prefab, dependencies, None, False))
+        except Exception as exception:
+            error = f"{type(exception).__name__}: {exception}"
+            results.append((file_path, None, [], error, False))
+    return results
+
+
+def iter_entity_files(rawdata_path: str) -> Iterator[str]:
+    """Yield rawdata's entity files, relative to it, while walking it."""
+    for directory, directories, file_names in os.walk(rawdata_path):
+        directories.sort()
+        for file_name in sorted(file_names):
+            if file_name.endswith(".entity"):
+                file_path = os.path.join(directory, file_name)
+                yield Path(os.path.relpath(file_path, rawdata_path)).as_posix()
+
+
+def iter_chunks(items: Iterable[str], chunk_size: int) -> Iterator[List[str]]:
+    items = iter(items)
+    chunk = list(islice(items, chunk_size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(items, chunk_size))
+
+
+class DependencyGraph:
+    """Files and their direct dependencies, files being given indexes."""
+
+    def __init__(self) -> None:
+        self.files: List[str] = []
+        self._indexes: Dict[str, int] = {}
+        self.dependencies: List[array] = []
+        # Index of each file's prefab, -1 if it has none
+        self.prefabs = array("i")
+        # Whether each file was resolved, or only referenced
+        self.resolved = bytearray()
+        self.resolved_files = 0
+        self.errors: Dict[int, str] = {}
+        self.scanned_files = 0
+
+    def get_index(self, file_path: str) -> int:
+        file_path = Path(os.path.normpath(file_path)).as_posix()
+        key = os.path.normcase(file_path)
+        index = self._indexes.get(key)
+        if index is None:
+            index = self._indexes[key] = len(self.files)
+            self.files.append(file_path)
+            self.dependencies.append(array("i"))
+            self.prefabs.append(-1)
+            self.resolved.append(0)
+        return index
+
+    def add_file(
+        self,
+        file_path: str,
+        prefab: Optional[str],
+        dependencies: List[str],
+        error: Optional[str] = None,
+    ) -> None:
+        index = self.get_index(file_path)
+        if not self.resolved[index]:
+            self.resolved[index] = 1
+            self.resolved_files += 1
+        if error:
+            self.errors[index] = error
+        if prefab:
+            self.prefabs[index] = self.get_index(prefab)
+        self.dependencies[index] = array(
+            "i", sorted({self.get_index(dependency) for dependency in dependencies})
+        )
+
+    @property
+    def edges_count(self) -> int:
+        return sum(len(dependencies) for dependencies in self.dependencies)
+
+    def get_fan_in(self) -> array:
+        fan_in = array("i", [0]) * len(self.files)
+        for dependencies in self.dependencies:
+            for dependency in dependencies:
+                fan_in[dependency] += 1
+        return fan_in
+
+    def get_prefab_chain(self, index: int) -> List[int]:
+        """Get the instanceOf chain from a file, stopped before a cycle."""
+        chain = [index]
+        visited = {index}
+        while self.prefabs[chain[-1]] != -1 and self.prefabs[chain[-1]] not in visited:
+            chain.append(self.prefabs[chain[-1]])
+            visited.add(chain[-1])
+        return chain
+
+    def get_prefab_depths(self) -> array:
+        depths = array("i", [-1]) * len(self.files)
+        for index in range(len(self.files)):
+            if depths[index] != -1:
+                continue
+            # A file's depth is the length of the chain after it
+            depth = 0
+            for chain_index in reversed(self.get_prefab_chain(index)):
+                if depths[chain_index] == -1:
+                    depths[chain_index] = depth
+                depth = depths[chain_index] + 1
+        return depths
+
+    def get_components(self) -> Tuple[array, List[List[int]]]:
+        """Get strongly connected components, with Tarjan's algorithm.
+
+        Components are listed in reverse topological order,
+        a component comes after the ones it depends on.
+        """
+        count = len(self.files)
+        order = array("i", [-1]) * count
+        low = array("i", [0]) * count
+        on_stack = bytearray(count)
+        component_of = array("i", [-1]) * count
+        components: List[List[int]] = []
+        stack: List[int] = []
+        next_order = 0
+
+        for root in range(count):
+            if order[root] != -1:
+                continue
+
+            # Frames are a node and the position of its next dependency
+            frames = [(root, 0)]
+            while frames:
+                node, position = frames.pop()
+                if position == 0:
+                    order[node] = low[node] = next_order
+                    next_order += 1
+                    stack.append(node)
+                    on_stack[node] = 1
+
+                dependencies = self.dependencies[node]
+                descended = False
+                while position < len(dependencies):
+                    dependency = dependencies[position]
+                    position += 1
+                    if order[dependency] == -1:
+                        frames.append((node, position))
+                        frames.append((dependency, 0))
+                        descended = True
+                        break
+                    if on_stack[dependency]:
+                        low[node] = min(low[node], order[dependency])
+                if descended:
+                    continue
+
+                if low[node] == order[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = 0
+                        component_of[member] = len(components)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+                if frames:
+                    parent = frames[-1][0]
+                    low[parent] = min(low[parent], low[node])
+
+        return component_of, components
+
+    def get_depths_and_closure_sizes(
+        self, component_of: array, components: List[List[int]]
+    ) -> Tuple[array, array]:
+        """Get each file's longest dependency chain and count of transitive dependencies.
+
+        Components are visited dependencies first, a component's closure is
+        released once all the components depending on it are computed.
+        """
+        component_dependencies: List[List[int]] = []
+        dependents_count = array("i", [0]) * len(components)
+        for component_index, component in enumerate(components):
+            dependencies = {
+                component_of[dependency]
+                for member in component
+                for dependency in self.dependencies[member]
+            }
+            dependencies.discard(component_index)
+            component_dependencies.append(list(dependencies))
+            for dependency in dependencies:
+                dependents_count[dependency] += 1
+
+        depths = array("i", [0]) * len(self.files)
+        closure_sizes = array("i", [0]) * len(self.files)
+        component_depths = array("i", [0]) * len(components)
+        closures: Dict[int, int] = {}
+        for component_index, component in enumerate(components):
+            closure = 0
+            for member in component:
+                closure |= 1 << member
+
+            depth = 0
+            for dependency in component_dependencies[component_index]:
+                closure |= closures[dependency]
+                depth = max(depth, component_depths[dependency] + 1)
+                dependents_count[dependency] -= 1
+                if not dependents_count[dependency]:
+                    del closures[dependency]
+            if dependents_count[component_index]:
+                closures[component_index] = closure
+            component_depths[component_index] = depth
+
+            # A file is not its own dependency, even in a cycle
+            closure_size = bin(closure).count("1") - 1
+            for member in component:
+                depths[member] = depth
+                closure_sizes[member] = closure_size
+
+        return depths, closure_sizes
+
+
+def build_dependency_graph(
+    rawdata_path: str,
+    schema_path: str,
+    workers: int = None,
+    chunk_size: int = 50,
+    files_per_worker: int = 2000,
+    fast: bool = False,
+) -> DependencyGraph:
+    """Resolve all rawdata's entity files with worker processes.
+
+    With fast, files are scanned, and only loaded with EntityLib if they can't
+    be. Files then only depend on the sub scenes they declare, loaded ones
+    included, inherited ones being dependencies of their prefab.
+    """
+    graph = DependencyGraph()
+    chunks = iter_chunks(iter_entity_files(rawdata_path), chunk_size)
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1:
+        init_worker(rawdata_path, schema_path, fast)
+        results = map(resolve_files, chunks)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(
+            workers,
+            initializer=init_worker,
+            initargs=(rawdata_path, schema_path, fast),
+            maxtasksperchild=max(1, files_per_worker // chunk_size),
+        )
+        results = pool.imap_unordered(resolve_files, chunks)
+
+    try:
+        for chunk_results in results:
+            for file_path, prefab, dependencies, error, scanned in chunk_results:
+                graph.add_file(file_path, prefab, dependencies, error)
+                graph.scanned_files += scanned
+            print(f"{graph.resolved_files} files resolved", end="\r")
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    print()
+    return graph
+
+
+def iter_report_rows(graph: DependencyGraph) -> Iterator[dict]:
+    fan_in = graph.get_fan_in()
+    prefab_depths = graph.get_prefab_depths()
+    component_of, components = graph.get_components()
+    depths, closure_sizes = graph.get_depths_and_closure_sizes(component_of, components)
+
+    for index, file_path in enumerate(graph.files):
+        component = components[component_of[index]]
+        is_cyclic = len(component) > 1 or index in graph.dependencies[index]
+        yield {
+            "file": file_path,
+            "resolved": bool(graph.resolved[index]),
+            "fan_in": fan_in[index],
+            "fan_out": len(graph.dependencies[index]),
+            "prefab_depth": prefab_depths[index],
+            "depth": depths[index],
+            "closure_size": closure_sizes[index],
+            "component": component_of[index] if is_cyclic else None,
+            "error": graph.errors.get(index),
+        }
+
+
+def get_top(rows: List[dict], field: str, top: int) -> List[dict]:
+    rows = sorted(rows, key=lambda row: row[field], reverse=True)[:top]
+    return [{"file": row["file"], field: row[field]} for row in rows if row[field]]
+
+
+def write_reports(
+    graph: DependencyGraph,
+    output_path: Path,
+    report_format: str = "csv",
+    top: int = 20,
+    closure_threshold: int = None,
+) -> List[str]:
+    """Write files' metrics and their summary, return the created files."""
+    output_path.mkdir(parents=True, exist_ok=True)
+    rows = list(iter_report_rows(graph))
+
+    report_path = Path(output_path, f"dependencies.{report_format}").as_posix()
+    if report_format == "csv":
+        with open(report_path, "w", newline="") as report_file:
+            writer = csv.DictWriter(report_file, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+    elif report_format == "json":
+        with open(report_path, "w") as report_file:
+            json.dump(rows, report_file, indent=2)
+    else:
+        raise Exception(f"Unknown report format {report_format}")
+
+    cycles: Dict[int, List[str]] = {}
+    for row in rows:
+        if row["component"] is not None:
+            cycles.setdefault(row["component"], []).append(row["file"])
+
+    deepest_prefabs = get_top(rows, "prefab_depth", top)
+    for row in deepest_prefabs:
+        row["chain"] = [
+            graph.files[index]
+            for index in graph.get_prefab_chain(graph.get_index(row["file"]))
+        ]
+
+    summary = {
+        "files": len(graph.files),
+        "resolved_files": graph.resolved_files,
+        "scanned_files": graph.scanned_files,
+        "dependencies": graph.edges_count,
+        "errors": len(graph.errors),
+        "top_fan_in": get_top(rows, "fan_in", top),
+        "top_fan_out": get_top(rows, "fan_out", top),
+        "top_prefab_depth": deepest_prefabs,
+        "top_depth": get_top(rows, "depth", top),
+        "top_closure_size": get_top(rows, "closure_size", top),
+        "cycles": sorted(cycles.values(), key=len, reverse=True),
+    }
+    if closure_threshold is not None:
+        summary["closure_size_over_threshold"] = [
+            {"file": row["file"], "closure_size": row["closure_size"]}
+            for row in rows
+            if row["closure_size"] > closure_threshold
+        ]
+
+    summary_path = Path(output_path, "dependencies_summary.json").as_posix()
+    with open(summary_path, "w") as summary_file:
+        json.dump(summary, summary_file, indent=2)
+    return [report_path, summary_path]
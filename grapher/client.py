@@ -0,0 +1,110 @@
+"""Thin client of the grapher service.
+
+Only relies on the standard library, so callers don't pay
+for EntityLib, graphviz or PySide2 imports.
+"""
+import argparse
+import json
+from pathlib import Path
+from typing import List, Optional
+from urllib import error, request
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+IMAGE_FORMATS = ["png", "svg", "tiles"]
+
+
+def get_service_url(host: str, port: int, route: str) -> str:
+    return f"http://{host}:{port}/{route}"
+
+
+def send_request(
+    route: str,
+    data: Optional[dict] = None,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    timeout: Optional[float] = None,
+) -> dict:
+    service_request = request.Request(
+        get_service_url(host, port, route),
+        data=json.dumps(data or {}).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    try:
+        with request.urlopen(service_request, timeout=timeout) as response:
+            return json.loads(response.read().decode())
+    except error.HTTPError as http_error:
+        raise Exception(json.loads(http_error.read().decode())["error"])
+
+
+def request_graph(
+    file_paths: List[Path],
+    output_path: Optional[Path] = None,
+    image_format: Optional[str] = "png",
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+) -> dict:
+    """Ask the service for file_paths' graph, return the created files' paths."""
+    data = {
+        # Service may not run from the caller's working directory
+        "files": [file_path.resolve().as_posix() for file_path in file_paths],
+        "image": image_format,
+    }
+    if output_path:
+        # Relative paths are relative to the service's output directory
+        data["output_path"] = output_path.as_posix()
+    return send_request("graph", data, host=host, port=port)
+
+
+def main(args: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Request a graph from a running grapher service"
+    )
+    parser.add_argument(
+        "-f",
+        "--file",
+        help="File to open, several files or directories are combined in one graph",
+        type=str,
+        nargs="+",
+        required=True,
+    )
+    parser.add_argument(
+        "-o",
+        "--output_path",
+        help="Set created graph output path, within the service's one and "
+        "relative to it, otherwise service's one will be used",
+    )
+    parser.add_argument(
+        "-i",
+        "--image",
+        help="Image format, tiles being a deep zoom png pyramid",
+        choices=IMAGE_FORMATS,
+        default="png",
+    )
+    parser.add_argument(
+        "-noimg",
+        "--no_image",
+        help="If set, only the json file is created",
+        action="store_true",
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", default=DEFAULT_PORT, type=int)
+    args = parser.parse_args(args)
+
+    result = request_graph(
+        [Path(file) for file in args.file],
+        output_path=Path(args.output_path) if args.output_path else None,
+        image_format=None if args.no_image else args.image,
+        host=args.host,
+        port=args.port,
+    )
+    for message in result.get("errors", []):
+        print(f"\t- {message}")
+    for output_file in ["json", "image"]:
+        if result.get(output_file):
+            print(result[output_file])
+
+
+if __name__ == "__main__":
+    main()
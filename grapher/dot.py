@@ -0,0 +1,140 @@
+"""DOT source writer, replacing graphviz.Digraph for the grapher's graphs."""
+from __future__ import annotations
+
+import io
+from typing import Dict, Iterable, List, Optional, TextIO, Tuple
+
+from PropertyGrapher.grapher.layout import run_engine
+
+Attributes = Dict[str, str]
+StyleBlock = Tuple[Tuple[str, str], ...]
+
+# Attributes written once in a default statement, shared by following elements
+STYLE_ATTRIBUTES = {"color", "fillcolor", "shape", "style"}
+
+
+class HtmlLabel(str):
+    """Label written as a DOT HTML-like string, with its enclosing angle brackets.
+
+    Its content must already be escaped, see html.escape.
+    """
+
+
+def quote(value: str) -> str:
+    # Only labels built as HTML are kept as is, names looking like HTML are quoted
+    if isinstance(value, HtmlLabel):
+        return value
+    # DOT only escapes quotes, backslashes are kept as they are
+    return '"' + value.replace('"', '\\"') + '"'
+
+
+class DotGraph:
+    """Directed graph written as DOT source in a single pass.
+
+    Nodes and edges are deduplicated by name, attributes given again for
+    an element update its previous ones, as dot would. Style attributes are
+    written in `node` and `edge` default statements, only when they differ
+    from the previous element's, and their blocks are only formatted once.
+    """
+
+    def __init__(self, comment: str = None, graph_attr: Attributes = None) -> None:
+        self.comment = comment
+        self.graph_attr: Attributes = dict(graph_attr or {})
+        self.nodes: Dict[str, Attributes] = {}
+        self.edges: Dict[Tuple[str, str], Attributes] = {}
+
+        self._blocks: Dict[StyleBlock, str] = {}
+
+    def node(self, name: str, **attributes: str) -> None:
+        self.nodes.setdefault(name, {}).update(attributes)
+
+    def edge(self, tail: str, head: str, **attributes: str) -> None:
+        self.edges.setdefault((tail, head), {}).update(attributes)
+
+    def attr(self, **attributes: str) -> None:
+        self.graph_attr.update(attributes)
+
+    def copy(self) -> DotGraph:
+        graph = DotGraph(self.comment, self.graph_attr)
+        graph.nodes = {name: dict(attributes) for name, attributes in self.nodes.items()}
+        graph.edges = {key: dict(attributes) for key, attributes in self.edges.items()}
+        graph._blocks = self._blocks
+        return graph
+
+    def get_block(self, attributes: StyleBlock) -> str:
+        block = self._blocks.get(attributes)
+        if block is None:
+            block = " ".join(f"{key}={quote(value)}" for key, value in attributes)
+            block = self._blocks[attributes] = f"[{block}]"
+        return block
+
+    def write_elements(
+        self,
+        output_file: TextIO,
+        kind: str,
+        elements: Iterable[Tuple[str, Attributes]],
+    ) -> None:
+        previous_style: StyleBlock = ()
+        for element, attributes in elements:
+            style = tuple(
+                sorted(item for item in attributes.items() if item[0] in STYLE_ATTRIBUTES)
+            )
+            if style != previous_style:
+                # Keys of the previous defaults are reset if not given anymore
+                keys = {key for key, _ in style}
+                defaults = style + tuple(
+                    (key, "") for key, _ in previous_style if key not in keys
+                )
+                output_file.write(f"\t{kind} {self.get_block(defaults)}\n")
+                previous_style = style
+
+            own_attributes = [
+                f"{key}={quote(value)}"
+                for key, value in attributes.items()
+                if key not in STYLE_ATTRIBUTES
+            ]
+            if own_attributes:
+                output_file.write(f"\t{element} [{' '.join(own_attributes)}]\n")
+            else:
+                output_file.write(f"\t{element}\n")
+
+    def write(self, output_file: TextIO) -> None:
+        if self.comment:
+            output_file.write(f"// {self.comment}\n")
+        output_file.write("digraph {\n")
+        if self.graph_attr:
+            output_file.write(
+                f"\tgraph {self.get_block(tuple(self.graph_attr.items()))}\n"
+            )
+
+        self.write_elements(
+            output_file,
+            "node",
+            ((quote(name), attributes) for name, attributes in self.nodes.items()),
+        )
+        self.write_elements(
+            output_file,
+            "edge",
+            (
+                (f"{quote(tail)} -> {quote(head)}", attributes)
+                for (tail, head), attributes in self.edges.items()
+            ),
+        )
+        output_file.write("}\n")
+
+    @property
+    def source(self) -> str:
+        output_file = io.StringIO()
+        self.write(output_file)
+        return output_file.getvalue()
+
+    def pipe(
+        self,
+        output_format: str = "json",
+        engine: str = "dot",
+        args: List[str] = None,
+        timeout: Optional[float] = None,
+    ) -> bytes:
+        return run_engine(
+            self.source, engine, output_format, args=args, timeout=timeout
+        )
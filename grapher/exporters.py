@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+import csv
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, TextIO, Type
+from xml.sax.saxutils import escape, quoteattr
+
+from PropertyGrapher.grapher.dot import quote
+from PropertyGrapher.grapher.graph import GraphItem, PropertyGrapher, get_grapher
+from PropertyGrapher.grapher.styles import (
+    BaseArrowStyle,
+    EditedPrefabSubSceneArrow,
+    PrefabArrowStyle,
+    PrefabNodeStyle,
+)
+
+# Graphs of snapshots are exported without EntityLib
+if TYPE_CHECKING:
+    from EntityLibPy import EntityLib
+
+
+class GraphExporter(ABC):
+    """Stream a graph's nodes and edges to a file while its hierarchy is walked.
+
+    Nothing is laid out and no Digraph is built, nodes and edges are
+    written as soon as they are discovered. Walked properties release their
+    children, so memory grows with the names of the nodes and edges, kept
+    to write each of them once, instead of with their properties.
+    """
+
+    # Suffix of the exported files, set by each format
+    extension: str
+
+    def __init__(self, grapher: PropertyGrapher, output_file: TextIO):
+        self.grapher = grapher
+        self.output_file = output_file
+
+        self._nodes = set()
+        self._edges = set()
+
+    @staticmethod
+    def get_node_kind(item: GraphItem) -> str:
+        if not item.source:
+            return "root"
+        elif item.node_style == PrefabNodeStyle:
+            return "prefab"
+        else:
+            return "sub_scene"
+
+    @staticmethod
+    def get_edge_kind(arrow_style: Type[BaseArrowStyle]) -> str:
+        if arrow_style == PrefabArrowStyle:
+            return "instance_of"
+        elif arrow_style == EditedPrefabSubSceneArrow:
+            return "edited_sub_scene"
+        else:
+            return "sub_scene"
+
+    def export(self) -> None:
+        self.write_header()
+        for item in self.grapher.walk(release=True):
+            self.export_node(item)
+            if not item.source:
+                continue
+
+            arrow_style = self.grapher.get_arrow_style(
+                item.source, item.prop, item.node_style
+            )
+            if arrow_style:
+                self.export_edge(item, arrow_style)
+        self.write_footer()
+
+    def export_node(self, item: GraphItem) -> None:
+        """Write a node the first time it is walked."""
+        if item.prop.name not in self._nodes:
+            self._nodes.add(item.prop.name)
+            self.write_node(item)
+
+    def export_edge(self, item: GraphItem, arrow_style: Type[BaseArrowStyle]) -> None:
+        """Write an edge the first time it is walked."""
+        edge = (item.source.name, item.prop.name)
+        if edge not in self._edges:
+            self._edges.add(edge)
+            self.write_edge(item, arrow_style)
+
+    def write_header(self) -> None:
+        pass
+
+    def write_node(self, item: GraphItem) -> None:
+        pass
+
+    @abstractmethod
+    def write_edge(self, item: GraphItem, arrow_style: Type[BaseArrowStyle]) -> None:
+        pass
+
+    def write_footer(self) -> None:
+        pass
+
+
+class DotExporter(GraphExporter):
+    """Write the graph as DOT source, as it would be given to dot.
+
+    A node or edge walked again with other attributes is written again,
+    dot then applies the last ones, as DotGraph does for the laid out graphs.
+    """
+
+    extension = "gv"
+
+    def __init__(self, grapher: PropertyGrapher, output_file: TextIO):
+        super().__init__(grapher, output_file)
+        # Hash of the attributes last written for each node and edge
+        self._attributes: Dict[str, int] = {}
+
+    def write_statement(self, element: str, attributes: str) -> None:
+        attributes_hash = hash(attributes)
+        if self._attributes.get(element) != attributes_hash:
+            self._attributes[element] = attributes_hash
+            self.output_file.write(f"\t{element} [{attributes}]\n")
+
+    def export_node(self, item: GraphItem) -> None:
+        self.write_node(item)
+
+    def export_edge(self, item: GraphItem, arrow_style: Type[BaseArrowStyle]) -> None:
+        self.write_edge(item, arrow_style)
+
+    def write_header(self) -> None:
+        self.output_file.write(
+            f"strict digraph {{\n"
+            f"\tgraph [rankdir={self.grapher._graph_orient}]\n"
+        )
+
+    def write_node(self, item: GraphItem) -> None:
+        prop = item.prop
+        self.write_statement(
+            quote(prop.name),
+            f"label={quote(self.grapher.get_prop_label(prop))}"
+            f" fillcolor={quote(item.node_style.color)}"
+            f" shape={item.node_style.shape}"
+            f" style={item.node_style.style}"
+            f" tooltip={quote(prop.file_path)}",
+        )
+
+    def write_edge(self, item: GraphItem, arrow_style: Type[BaseArrowStyle]) -> None:
+        self.write_statement(
+            f"{quote(item.source.name)} -> {quote(item.prop.name)}",
+            f"color={quote(arrow_style.color)} style={arrow_style.style}",
+        )
+
+    def write_footer(self) -> None:
+        self.output_file.write("}\n")
+
+
+class GraphMLExporter(GraphExporter):
+    """Write the graph as GraphML, readable by most graph analysis tools."""
+
+    extension = "graphml"
+
+    _keys = [
+        ("label", "node"),
+        ("file_path", "node"),
+        ("node_kind", "node"),
+        ("edge_kind", "edge"),
+        ("style", "edge"),
+    ]
+
+    def write_header(self) -> None:
+        self.output_file.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+        )
+        for key, domain in self._keys:
+            self.output_file.write(
+                f'  <key id="{key}" for="{domain}"'
+                f' attr.name="{key}" attr.type="string"/>\n'
+            )
+        self.output_file.write(
+            f"  <graph id={quoteattr(self.grapher.graph_name)}"
+            f' edgedefault="directed">\n'
+        )
+
+    def write_data(self, data: Dict[str, str]) -> None:
+        for key, value in data.items():
+            self.output_file.write(
+                f'      <data key="{key}">{escape(value)}</data>\n'
+            )
+
+    def write_node(self, item: GraphItem) -> None:
+        prop = item.prop
+        self.output_file.write(f"    <node id={quoteattr(prop.name)}>\n")
+        self.write_data(
+            {
+                "label": prop.property_name or prop.file_name,
+                "file_path": prop.file_path,
+                "node_kind": self.get_node_kind(item),
+            }
+        )
+        self.output_file.write("    </node>\n")
+
+    def write_edge(self, item: GraphItem, arrow_style: Type[BaseArrowStyle]) -> None:
+        self.output_file.write(
+            f"    <edge source={quoteattr(item.source.name)}"
+            f" target={quoteattr(item.prop.name)}>\n"
+        )
+        self.write_data(
+            {
+                "edge_kind": self.get_edge_kind(arrow_style),
+                "style": arrow_style.style,
+            }
+        )
+        self.output_file.write("    </edge>\n")
+
+    def write_footer(self) -> None:
+        self.output_file.write("  </graph>\n</graphml>\n")
+
+
+class EdgeListExporter(GraphExporter):
+    """Write one row per edge, with its source and target files."""
+
+    _columns = ["source", "target", "kind", "source_file", "target_file"]
+
+    def get_edge_row(
+        self, item: GraphItem, arrow_style: Type[BaseArrowStyle]
+    ) -> List[str]:
+        return [
+            item.source.name,
+            item.prop.name,
+            self.get_edge_kind(arrow_style),
+            item.source.file_path,
+            item.prop.file_path,
+        ]
+
+
+class CsvEdgeListExporter(EdgeListExporter):
+    """Write one csv line per edge."""
+
+    extension = "csv"
+
+    def __init__(self, grapher: PropertyGrapher, output_file: TextIO):
+        super().__init__(grapher, output_file)
+        self.writer = csv.writer(output_file)
+
+    def write_header(self) -> None:
+        self.writer.writerow(self._columns)
+
+    def write_edge(self, item: GraphItem, arrow_style: Type[BaseArrowStyle]) -> None:
+        self.writer.writerow(self.get_edge_row(item, arrow_style))
+
+
+class NdjsonEdgeListExporter(EdgeListExporter):
+    """Write one json object per line and per edge."""
+
+    extension = "ndjson"
+
+    def write_edge(self, item: GraphItem, arrow_style: Type[BaseArrowStyle]) -> None:
+        row = dict(zip(self._columns, self.get_edge_row(item, arrow_style)))
+        self.output_file.write(json.dumps(row) + "\n")
+
+
+EXPORTERS = {
+    "dot": DotExporter,
+    "graphml": GraphMLExporter,
+    "csv": CsvEdgeListExporter,
+    "ndjson": NdjsonEdgeListExporter,
+}
+
+
+def export_graph(
+    entity_lib: EntityLib,
+    files_to_open: List[Path],
+    output_path: Path,
+    export_format: str,
+    output_file_path: Optional[Path] = None,
+) -> Path:
+    """Export files_to_open's graph without laying it out."""
+    grapher = get_grapher(entity_lib, files_to_open, output_path, view=False)
+    exporter_class = EXPORTERS[export_format]
+
+    output_file_path = output_file_path or Path(
+        f"{grapher.graph_output_path}.{exporter_class.extension}"
+    )
+    with open(output_file_path, "w", newline="", encoding="utf-8") as output_file:
+        exporter_class(grapher, output_file).export()
+
+    print(f"{output_file_path.as_posix()} created")
+    return output_file_path
@@ -1,22 +1,83 @@
+from __future__ import annotations
+
 import argparse
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+import copy
 from dataclasses import dataclass
+from html import escape
 from pathlib import Path
 import json
+import math
 import tempfile
-from typing import Optional
+import time
+from typing import (
+    TYPE_CHECKING,
+    ContextManager,
+    Dict,
+    FrozenSet,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+)
 
-from EntityLibPy import EntityLib
-from graphviz import Digraph
+import graphviz
 
 from PropertyGrapher.grapher.styles import (
     BaseNodeStyle,
     PrefabNodeStyle,
+    RootNodeStyle,
     SubSceneNodeStyle,
     SubSceneArrowStyle,
     PrefabArrowStyle,
     EditedPrefabSubSceneArrow,
 )
-from PropertyGrapher.utils.property_helper import GraphProperty
+from PropertyGrapher.grapher import render
+from PropertyGrapher.grapher.dot import DotGraph, HtmlLabel
+from PropertyGrapher.grapher.layout import (
+    GRID_STRATEGY,
+    LAYOUT_STRATEGIES,
+    LayoutError,
+    LayoutStrategy,
+    LayoutTimeout,
+    get_grid_layout,
+    get_layout_strategy,
+    get_positions,
+    load_plain_layout,
+    place_subtree,
+)
+from PropertyGrapher.utils.property_helper import GraphProperty, get_config
+
+# Graphs of snapshots are built without EntityLib
+if TYPE_CHECKING:
+    from EntityLibPy import EntityLib
+
+# Images are rendered one at a time, after their json file is written
+_render_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="render")
+# Renders still running or failed, see wait_for_renders
+_render_futures: List[Future] = []
+
+
+def check_render(future: Future) -> None:
+    exception = future.exception()
+    if exception is None:
+        # Already removed if it was waited for
+        if future in _render_futures:
+            _render_futures.remove(future)
+    else:
+        print(f"Image rendering failed: {type(exception).__name__}: {exception}")
+
+
+def wait_for_renders() -> None:
+    """Wait for the images rendered in background, raise if one of them failed."""
+    failed = [future for future in list(_render_futures) if future.exception()]
+    _render_futures.clear()
+    if failed:
+        raise Exception(f"{len(failed)} image(s) failed to render")
 
 
 @dataclass
@@ -26,26 +87,64 @@ class GraphOrient:
     BottomToTop: str = "BT"
 
 
+@dataclass
+class GraphItem:
+    """Node added to the graph, with the property it is connected from."""
+
+    prop: GraphProperty
+    node_style: Type[BaseNodeStyle]
+    source: Optional[GraphProperty] = None
+    depth: int = 0
+
+
 class PropertyGrapher:
-    """Represent Property's dependencies using Graphviz.Digraph()."""
+    """Represent Property's dependencies as a Graphviz graph."""
 
     _file_suffix = None
     _graph_orient = GraphOrient.BottomToTop
+    _root_node_style = SubSceneNodeStyle
 
     def __init__(
         self, root_prop: GraphProperty, graphs_output_path: Path, view: bool = True
     ):
         self.root_prop = root_prop
+        self.root_props = [root_prop]
         self.output_path = graphs_output_path
-        self.graph = Digraph(
-            comment=f"Dependencies of {root_prop.name}",
-            graph_attr={"rankdir": self._graph_orient, "dpi": "200"},
-            strict=True,
-        )
         self.view = view
 
         self.errors = []
 
+        # Nodes whose hierarchy is hidden, or shown beyond max_depth
+        self.collapsed_nodes: Set[str] = set()
+        self.expanded_nodes: Set[str] = set()
+        self.max_depth: Optional[int] = None
+        # Nodes of the last walk with children, whose hierarchy was not walked
+        self.unexpanded_nodes: Set[str] = set()
+        # Nodes of the last walk whose children were walked
+        self.collapsible_nodes: Set[str] = set()
+        # Strategy of the last layout, chosen from the graph's size
+        self.layout_strategy: Optional[LayoutStrategy] = None
+        # Smallest graph each strategy exceeded its time budget on, by name
+        self.timed_out_strategies: Dict[str, int] = {}
+
+        self.graph = self.create_digraph()
+
+    def create_digraph(self) -> DotGraph:
+        return DotGraph(
+            comment=f"Dependencies of {self.graph_name}",
+            graph_attr={"rankdir": self._graph_orient, "ranksep": "2"},
+        )
+
+    @property
+    def nodes(self) -> Dict[str, dict]:
+        """Attributes of the graph's nodes, by name."""
+        return self.graph.nodes
+
+    @property
+    def edges(self) -> Dict[Tuple[str, str], dict]:
+        """Attributes of the graph's edges, by names of their ends."""
+        return self.graph.edges
+
     @property
     def graph_name(self) -> str:
         return self.root_prop.name
@@ -64,23 +163,27 @@ class PropertyGrapher:
         elif not prop.file_name:
             return prop.property_name
         else:
-            return f"<{prop.property_name}<br/>---------<br/>{prop.file_name}>"
+            return HtmlLabel(
+                f"<{escape(prop.property_name, quote=False)}<br/>---------<br/>"
+                f"{escape(prop.file_name, quote=False)}>"
+            )
 
     def add_node(
         self,
         prop: GraphProperty,
-        graph: Digraph,
+        graph: DotGraph,
         node_style: BaseNodeStyle,
         name: str = None,
     ):
-        graph.node(
-            name if name else prop.name,
+        name = name if name else prop.name
+        attributes = dict(
             label=self.get_prop_label(prop),
             shape=node_style.shape,
             fillcolor=node_style.color,
             style=node_style.style,
             tooltip=prop.file_path,
         )
+        graph.node(name, **attributes)
 
     def get_arrow_style(
         self,
@@ -102,24 +205,20 @@ class PropertyGrapher:
         self,
         source_prop: GraphProperty,
         destination_prop: GraphProperty,
-        graph: Digraph,
+        graph: DotGraph,
         node_style: BaseNodeStyle,
     ) -> None:
 
         arrow_style = self.get_arrow_style(source_prop, destination_prop, node_style)
         if arrow_style:
-            graph.edge(
-                source_prop.name,
-                destination_prop.name,
-                color=arrow_style.color,
-                style=arrow_style.style,
-            )
+            attributes = dict(color=arrow_style.color, style=arrow_style.style)
+            graph.edge(source_prop.name, destination_prop.name, **attributes)
 
     def add_and_connect(
         self,
         source_prop: GraphProperty,
         destination_prop: GraphProperty,
-        graph: Digraph,
+        graph: DotGraph,
         node_style: BaseNodeStyle,
     ) -> None:
 
@@ -141,61 +240,465 @@ class PropertyGrapher:
         for error in list(set(self.errors)):
             print(f"\t- {error}")
 
-    def generate_graph(self) -> Optional[dict]:
-        print(f"Generate graph for {self.root_prop.name}")
-        if self.create_graph(self.root_prop, self.graph):
-            self.graph.attr(ranksep="2")
-            self.log_errors()
+    def layout(self, graph: DotGraph = None, deadline: float = None) -> dict:
+        """Layout the graph built so far and return its geometry records.
+
+        The engine and its parameters are chosen from the graph's size,
+        the strategy is recorded in the records' `layout` key.
+        The layout has `timeout_s` seconds of the `layout` config, or until
+        deadline, a time.monotonic() value. Engines running past it are killed,
+        and the next cheaper strategy is tried with the remaining time, down
+        to a grid layout. Strategies that were killed are skipped for graphs
+        at least as big afterwards. Engines failing fall back the same way.
+        """
+        graph = graph or self.graph
+        layout_config = get_config().get("layout", {})
+        if deadline is None:
+            deadline = time.monotonic() + layout_config.get("timeout_s", 60)
+        nodes_count = len(graph.nodes)
+        edges_count = len(graph.edges)
+        strategy = get_layout_strategy(nodes_count, edges_count, layout_config)
+        if graph is self.graph and strategy != self.layout_strategy:
+            print(
+                f"Layout {nodes_count} nodes and {edges_count} edges"
+                f" with {strategy.name}"
+            )
+            self.layout_strategy = strategy
+
+        timed_out = []
+        failed = []
+        graph_data = None
+        for candidate in LAYOUT_STRATEGIES[LAYOUT_STRATEGIES.index(strategy) :]:
+            if self.timed_out_strategies.get(candidate.name, math.inf) <= nodes_count:
+                timed_out.append(candidate.name)
+                continue
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                output = graph.pipe(
+                    "plain", candidate.engine, list(candidate.args), timeout=timeout
+                )
+            except LayoutTimeout as exception:
+                error = (
+                    f"Layout of {self.graph_name} with {candidate.name}: {exception}, "
+                    "falling back to a cheaper layout"
+                )
+                print(error)
+                self.errors.append(error)
+                timed_out.append(candidate.name)
+                self.timed_out_strategies[candidate.name] = min(
+                    nodes_count,
+                    self.timed_out_strategies.get(candidate.name, nodes_count),
+                )
+                continue
+            except LayoutError as exception:
+                error = (
+                    f"Layout of {self.graph_name} with {candidate.name} failed: "
+                    f"{exception}, falling back to a cheaper layout"
+                )
+                print(error)
+                self.errors.append(error)
+                failed.append(candidate.name)
+                continue
+            graph_data = load_plain_layout(output, graph.nodes)
+            used_strategy = candidate
+            break
+
+        if graph_data is None:
+            used_strategy = GRID_STRATEGY
+            graph_data = get_grid_layout(graph.nodes, graph.edges)
+
+        graph_data["layout"] = {
+            "strategy": used_strategy.name,
+            "engine": used_strategy.engine,
+            "args": list(used_strategy.args),
+            "nodes": nodes_count,
+            "edges": edges_count,
+            "timed_out": timed_out,
+            "failed": failed,
+        }
+        return graph_data
+
+    def generate_graph(self) -> dict:
+        print(f"Generate graph for {self.graph_name}")
+        for _ in self.iter_graph(self.graph):
+            pass
+        self.log_errors()
+        return self.layout()
+
+    def generate_graph_progressively(
+        self,
+        first_depth: int = 2,
+        batch_size: int = 50,
+        lock: ContextManager = None,
+    ) -> Iterator[dict]:
+        """Yield successive layouts while the graph's hierarchy is loaded.
+
+        A first layout is yielded once the root and its `first_depth` levels
+        are added, then a new one every time `batch_size` more nodes are
+        discovered. The batch size doubles after each layout, so the
+        number of intermediate layouts stays logarithmic in the graph size.
+        The last yielded layout is the complete graph.
+        All layouts share the `timeout_s` budget of the `layout` config, once
+        it is spent they are grid layouts, see layout.
+        lock is held while properties are loaded, but not while laying out.
+        """
+        print(f"Generate graph progressively for {self.graph_name}")
+        deadline = time.monotonic() + get_config().get("layout", {}).get(
+            "timeout_s", 60
+        )
+        lock = lock or nullcontext()
+        items = self.iter_graph(self.graph)
+        pending = 0
+        laid_out = False
+        while True:
+            with lock:
+                item = next(items, None)
+            if item is None:
+                break
+
+            pending += 1
+            if not laid_out and item.depth <= first_depth:
+                continue
+            if not laid_out or pending >= batch_size:
+                yield self.layout(deadline=deadline)
+                if laid_out:
+                    batch_size *= 2
+                laid_out = True
+                pending = 0
+
+        self.log_errors()
+        yield self.layout(deadline=deadline)
+
+    def generate_graph_files(
+        self,
+        graph_data: dict,
+        graph_output_path: str = None,
+        image_format: Optional[str] = "png",
+        background: bool = False,
+    ) -> Optional[Future]:
+        """Write graph_data's json file, then render the graph's image.
+
+        If background is set, the image is rendered by another thread,
+        so callers only needing json don't wait for it. Its failures are
+        printed, and raised by wait_for_renders.
+        """
+        graph_output_path = graph_output_path or self.graph_output_path
+        with open(f"{graph_output_path}.json", "w") as json_file:
+            json.dump(graph_data, json_file, indent=2, sort_keys=True)
+        print(f"{graph_output_path}.json created")
 
-            json_string = self.graph.pipe("json").decode()
+        if not image_format:
+            return None
 
-            return json.loads(json_string)
+        # Graph may still change while the image is rendered
+        source = self.get_render_source(graph_data)
+        if background:
+            future = _render_executor.submit(
+                self.render_image, source, graph_data, graph_output_path, image_format
+            )
+            _render_futures.append(future)
+            future.add_done_callback(check_render)
+            return future
+        self.render_image(source, graph_data, graph_output_path, image_format)
         return None
 
-    def generate_graph_files(self, graph_data: dict) -> None:
-        with open(f"{self.graph_output_path}.json", "w") as json_file:
-            json.dump(graph_data, json_file, indent=2, sort_keys=True)
+    def get_render_source(self, graph_data: dict) -> str:
+        """DOT source images of graph_data are rendered from.
+
+        Grid layouts are not an engine's, their positions are pinned.
+        """
+        if graph_data.get("layout", {}).get("strategy") == GRID_STRATEGY.name:
+            return self.get_pinned_graph(get_positions(graph_data)).source
+        return self.graph.source
+
+    def render_image(
+        self, source: str, graph_data: dict, graph_output_path: str, image_format: str
+    ) -> Optional[str]:
+        """Render the image of graph_data, None if its engine failed or timed out."""
+        render_config = get_config().get("render", {})
+        # Images are laid out again, with the strategy of graph_data
+        layout_record = graph_data.get("layout", {})
+        try:
+            image_path = render.render_graph(
+                source,
+                graph_data,
+                graph_output_path,
+                image_format,
+                engine=layout_record.get("engine", "dot"),
+                engine_args=layout_record.get("args"),
+                pixel_budget=render_config.get("pixel_budget_mp", 50) * 1e6,
+                max_dpi=render_config.get("max_dpi", 200),
+                tile_size=render_config.get("tile_size", 256),
+                workers=render_config.get("tile_workers", 4),
+                timeout=get_config().get("layout", {}).get("timeout_s", 60),
+            )
+        except LayoutError as exception:
+            error = f"Image of {self.graph_name} not rendered: {exception}"
+            print(error)
+            self.errors.append(error)
+            return None
+        print(f"{image_path} created")
+
+        if self.view and image_format != "tiles":
+            graphviz.view(image_path)
+        return image_path
+
+    def iter_graph(self, graph: DotGraph) -> Iterator[GraphItem]:
+        """Add nodes and edges to graph, yielding each node once added."""
+        for item in self.walk():
+            if item.source:
+                self.add_and_connect(
+                    item.source, item.prop, graph, node_style=item.node_style
+                )
+            else:
+                self.add_node(item.prop, graph, node_style=item.node_style)
+            yield item
+
+    def walk(self, release: bool = False) -> Iterator[GraphItem]:
+        """Walk the graph's hierarchy, yielding each node and its source.
+
+        The hierarchy is walked breadth first with an explicit queue, and as
+        GraphProperty loads its prefab and sub scenes on demand, each yielded
+        item only required loading the levels above it.
+        A node shared by several parents or roots is only expanded once per
+        way they override it, and cycles are cut by GraphProperty then
+        reported in errors.
+        With release, properties drop their children once they are yielded,
+        for callers only walking the hierarchy once.
+        """
+        self.unexpanded_nodes = set()
+        self.collapsible_nodes = set()
+
+        # Hierarchy of expanded nodes is walked whatever max_depth
+        props_to_visit = deque()
+        for prop in self.root_props:
+            yield GraphItem(prop, self._root_node_style)
+            props_to_visit.append((prop, 0, False))
+
+        expanded = set()
+        expanded_names = set()
+        while props_to_visit:
+            prop, depth, forced = props_to_visit.popleft()
+
+            # We don't want to display
+            # overriden property's hierarchy
+            if prop.overriden and prop not in self.root_props:
+                continue
+
+            forced = forced or prop.name in self.expanded_nodes
+            if prop.name in self.collapsed_nodes or not (
+                forced or self.max_depth is None or depth < self.max_depth
+            ):
+                if prop.name not in expanded_names and prop.has_children():
+                    self.unexpanded_nodes.add(prop.name)
+                continue
+
+            # Nodes are identified by name in the graph, but two
+            # properties with the same name can come from different files.
+            # Overrides depend on the path a property is reached by: the
+            # property itself can be overridden, and so can the sub scenes
+            # of a prefab, by the file instancing it. A path overriding either
+            # differently is walked too
+            node_key = (
+                prop.name,
+                prop.file_path,
+                prop.overriden,
+                prop.override.file_path if prop.override else None,
+                self.get_overridden_sub_scenes(prop),
+            )
+            if node_key in expanded:
+                continue
+
+            expanded.add(node_key)
+            expanded_names.add(prop.name)
+            self.unexpanded_nodes.discard(prop.name)
+
+            children = []
+            if prop.prefab:
+                children.append((prop.prefab, PrefabNodeStyle))
+            children.extend(
+                (sub_scene, SubSceneNodeStyle) for sub_scene in prop.sub_scenes
+            )
+            if children:
+                self.collapsible_nodes.add(prop.name)
+
+            # Properties don't load references to their own hierarchy
+            for reference in prop.cyclic_references:
+                self.errors.append(
+                    f"Cycle: {prop.file_path} ({prop.name}) references {reference}, "
+                    f"which is already in its hierarchy"
+                )
+
+            for child, node_style in children:
+                yield GraphItem(child, node_style, source=prop, depth=depth + 1)
+                props_to_visit.append((child, depth + 1, forced))
+            if release:
+                prop.release_children()
+
+    @staticmethod
+    def get_overridden_sub_scenes(prop: GraphProperty) -> FrozenSet[str]:
+        """Names of prop's sub scenes overridden by the file instancing it.
+
+        Overrides are checked when the instancing file's prefabs are resolved,
+        which resolves prop's sub scenes: if they are not, none is overridden,
+        and duplicates skipped by the walk don't resolve them.
+        """
+        if prop._sub_scenes is None:
+            return frozenset()
+        return frozenset(
+            sub_scene.name for sub_scene in prop._sub_scenes if sub_scene.overriden
+        )
 
-        self.graph.render(
-            self.graph_output_path,
-            view=self.view,
-            format="png",
+    def copy(self) -> "PropertyGrapher":
+        """Get a grapher of the same properties, with its own graph and nodes' state.
+
+        Properties are shared, the copy's walks don't load them again.
+        """
+        grapher = copy.copy(self)
+        grapher.root_props = list(self.root_props)
+        grapher.errors = list(self.errors)
+        grapher.collapsed_nodes = set(self.collapsed_nodes)
+        grapher.expanded_nodes = set(self.expanded_nodes)
+        grapher.unexpanded_nodes = set(self.unexpanded_nodes)
+        grapher.collapsible_nodes = set(self.collapsible_nodes)
+        grapher.timed_out_strategies = dict(self.timed_out_strategies)
+        grapher.graph = self.graph.copy()
+        return grapher
+
+    def set_node_expanded(self, name: str, expanded: bool) -> None:
+        """Show or hide a node's hierarchy, call rebuild_graph to apply it."""
+        if expanded:
+            self.collapsed_nodes.discard(name)
+            self.expanded_nodes.add(name)
+        else:
+            self.expanded_nodes.discard(name)
+            self.collapsed_nodes.add(name)
+
+    def rebuild_graph(self) -> None:
+        """Build the graph again, only loading newly expanded properties."""
+        self.graph = self.create_digraph()
+        for _ in self.iter_graph(self.graph):
+            pass
+
+    def layout_incrementally(self, previous_layout: dict, anchor: str) -> dict:
+        """Layout the graph keeping the positions of previous_layout's nodes.
+
+        Nodes added since previous_layout are laid out on their own, then
+        inserted around anchor, only pushing aside the nodes in their ranks.
+        Edges are routed by neato around the pinned nodes.
+        Both share the `timeout_s` budget of a layout, see layout.
+        """
+        deadline = time.monotonic() + get_config().get("layout", {}).get(
+            "timeout_s", 60
         )
-        print(f"{self.graph_output_path}.png and {self.graph_output_path}.json created")
+        positions = get_positions(previous_layout)
+        if anchor not in positions or anchor not in self.nodes:
+            return self.layout(deadline=deadline)
+
+        new_nodes = [name for name in self.nodes if name not in positions]
+        if new_nodes:
+            subtree_nodes = {anchor, *new_nodes}
+            subtree = self.create_digraph()
+            for name in subtree_nodes:
+                subtree.node(name, **self.nodes[name])
+            for (source, destination), attributes in self.edges.items():
+                if source in subtree_nodes and destination in subtree_nodes:
+                    subtree.edge(source, destination, **attributes)
+
+            subtree_positions = get_positions(self.layout(subtree, deadline))
+            positions = place_subtree(positions, subtree_positions, anchor)
+
+        try:
+            output = self.get_pinned_graph(positions).pipe(
+                "plain",
+                engine="neato",
+                args=["-n2"],
+                timeout=max(0.0, deadline - time.monotonic()),
+            )
+        except LayoutError as exception:
+            error = (
+                f"Incremental layout of {self.graph_name}: {exception}, "
+                "laying it out again"
+            )
+            print(error)
+            self.errors.append(error)
+            return self.layout(deadline=deadline)
+        return load_plain_layout(output, self.nodes)
 
-    def create_graph(self, prop: GraphProperty, graph: Digraph) -> bool:
+    def get_pinned_graph(self, positions: Dict[str, Tuple[float, float]]) -> DotGraph:
+        """Copy of the graph with its nodes pinned at positions, for neato -n2.
 
-        # We don't want to display
-        # overriden property's hierarchy
-        if prop.overriden:
-            return False
+        neato would translate the drawing to the origin, moving pinned nodes.
+        """
+        pinned_graph = self.graph.copy()
+        pinned_graph.attr(splines="true", notranslate="true")
+        for name in self.nodes:
+            x, y = positions[name]
+            pinned_graph.node(name, pos=f"{x},{y}!")
+        return pinned_graph
 
-        if prop == self.root_prop:
-            self.add_node(prop, graph, node_style=SubSceneNodeStyle)
 
-        elif not prop.prefab and not prop.sub_scenes:
-            return False
+class CombinedPropertyGrapher(PropertyGrapher):
+    """Represent several Properties' dependencies in a single graph.
 
-        if prop.prefab:
-            sub_graph = graph
-            self.add_and_connect(
-                prop,
-                prop.prefab,
-                sub_graph,
-                node_style=PrefabNodeStyle,
-            )
-            self.create_graph(prop.prefab, sub_graph)
-
-        for sub_scene in prop.sub_scenes:
-            self.add_and_connect(
-                prop,
-                sub_scene,
-                graph,
-                node_style=SubSceneNodeStyle,
-            )
-            self.create_graph(sub_scene, graph)
+    Nodes shared between roots are added and expanded once,
+    roots are highlighted with their own style.
+    """
+
+    _root_node_style = RootNodeStyle
+
+    def __init__(
+        self,
+        root_props: List[GraphProperty],
+        graphs_output_path: Path,
+        view: bool = True,
+        name: str = None,
+    ):
+        # Name is needed to create the graph
+        self.name = name or f"combined_{len(root_props)}_entities"
+        super().__init__(root_props[0], graphs_output_path, view=view)
+        self.root_props = root_props
 
-        return True
+    @property
+    def graph_name(self) -> str:
+        return self.name
+
+
+def get_entity_files(paths: List[Path]) -> List[Path]:
+    """Get entity files from paths, directories are searched recursively."""
+    files = []
+    for path in paths:
+        if path.is_dir():
+            files.extend(sorted(path.rglob("*.entity")))
+        else:
+            files.append(path)
+    return files
+
+
+def get_grapher(
+    entity_lib: EntityLib,
+    files_to_open: List[Path],
+    output_path: Path,
+    view: bool = True,
+) -> PropertyGrapher:
+    """Get a grapher for a single file, or a combined one for several files."""
+    entity_files = get_entity_files(files_to_open)
+    if not entity_files:
+        raise FileNotFoundError(
+            f"No entity file found in {[path.as_posix() for path in files_to_open]}"
+        )
+
+    root_props = [
+        GraphProperty.load_from_file(entity_lib, file_path)
+        for file_path in entity_files
+    ]
+    if len(files_to_open) == 1 and len(root_props) == 1:
+        return PropertyGrapher(root_props[0], output_path, view=view)
+
+    name = files_to_open[0].name if len(files_to_open) == 1 else None
+    return CombinedPropertyGrapher(root_props, output_path, view=view, name=name)
 
 
 def create_graph(
@@ -204,17 +707,42 @@ def create_graph(
     output_path: Path,
     view=True,
     generate_files=True,
+    image_format: Optional[str] = "png",
 ):
-
-    prop_graph = PropertyGrapher(
-        GraphProperty.load_from_file(entity_lib, file_to_open),
+    return create_combined_graph(
+        entity_lib,
+        [file_to_open],
         output_path,
         view=view,
+        generate_files=generate_files,
+        image_format=image_format,
     )
+
+
+def create_combined_graph(
+    entity_lib: EntityLib,
+    files_to_open: List[Path],
+    output_path: Path,
+    view=True,
+    generate_files=True,
+    image_format: Optional[str] = "png",
+):
+    prop_graph = get_grapher(entity_lib, files_to_open, output_path, view=view)
     graph_data = prop_graph.generate_graph()
 
     if generate_files:
-        prop_graph.generate_graph_files(graph_data)
+        prop_graph.generate_graph_files(
+            graph_data, image_format=image_format, background=True
+        )
 
     return graph_data
 
+
+def create_graph_progressively(
+    entity_lib: EntityLib,
+    files_to_open: List[Path],
+    output_path: Path,
+) -> Iterator[dict]:
+    """Yield the layouts of files_to_open's graph while it is being loaded."""
+    prop_graph = get_grapher(entity_lib, files_to_open, output_path, view=False)
+    yield from prop_graph.generate_graph_progressively()
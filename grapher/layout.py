@@ -0,0 +1,363 @@
+import math
+import subprocess
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+Position = Tuple[float, float]
+
+POINTS_PER_INCH = 72.0
+
+# Version of the compact geometry records written to graphs' json files.
+# Files written before them hold Graphviz's json output, without version
+LAYOUT_FORMAT_VERSION = 2
+
+
+@dataclass(frozen=True)
+class LayoutStrategy:
+    """Engine and arguments laying out graphs up to max_nodes and max_edges."""
+
+    name: str
+    engine: str = "dot"
+    args: Tuple[str, ...] = ()
+    max_nodes: Optional[int] = None
+    max_edges: Optional[int] = None
+
+
+# From the most faithful to the cheapest, each one used up to the largest
+# benchmark graph it lays out within 4s, see benchmarks/layout_strategies.py.
+# dot's time is mostly spent in network simplex, placing nodes within ranks,
+# so bigger graphs bound its iterations (nslimit, nslimit1) and crossing
+# minimization's (mclimit), at the cost of wider and less aligned layouts,
+# then draw straight edges. The last strategy has no limits: sfdp, without
+# ranks, was slower than dot_simple without overlap removal, and its overlap
+# removal needs a Graphviz built with its triangulation library.
+LAYOUT_STRATEGIES = [
+    LayoutStrategy("dot", max_nodes=4000, max_edges=8000),
+    LayoutStrategy(
+        "dot_fast",
+        args=("-Gnslimit=0.2", "-Gnslimit1=0.2", "-Gmclimit=0.2", "-Gsearchsize=10"),
+        max_nodes=8000,
+        max_edges=16000,
+    ),
+    LayoutStrategy(
+        "dot_simple",
+        args=("-Gnslimit=0.02", "-Gnslimit1=0.02", "-Gmclimit=0.01", "-Gsplines=line"),
+    ),
+]
+
+# Last resort once all strategies exceeded their time budget, nodes are placed
+# by get_grid_layout, neato only renders images from their positions
+GRID_STRATEGY = LayoutStrategy("grid", engine="neato", args=("-n2",))
+
+
+def get_layout_strategy(
+    nodes_count: int, edges_count: int, thresholds: Dict[str, dict] = None
+) -> LayoutStrategy:
+    """Get the first strategy the graph fits in, the last one has no limits.
+
+    thresholds override strategies' limits by name,
+    e.g. {"dot": {"max_nodes": 1000}}.
+    """
+    thresholds = thresholds or {}
+    for strategy in LAYOUT_STRATEGIES:
+        limits = thresholds.get(strategy.name, {})
+        max_nodes = limits.get("max_nodes", strategy.max_nodes)
+        max_edges = limits.get("max_edges", strategy.max_edges)
+        if (max_nodes is None or nodes_count <= max_nodes) and (
+            max_edges is None or edges_count <= max_edges
+        ):
+            return strategy
+    return LAYOUT_STRATEGIES[-1]
+
+
+class LayoutError(Exception):
+    """Layout engine could not lay the graph out."""
+
+
+class LayoutTimeout(LayoutError):
+    """Layout engine ran longer than its time budget, and was killed."""
+
+
+class LayoutFormatError(Exception):
+    """Layout file does not hold geometry records of LAYOUT_FORMAT_VERSION."""
+
+
+def check_layout_format(graph_data: dict, file_path: str) -> None:
+    """Raise LayoutFormatError if graph_data was not written in the current format."""
+    version = graph_data.get("version")
+    if version is None:
+        raise LayoutFormatError(
+            f"{file_path} holds Graphviz's json output, written by an older "
+            "PropertyGrapher: generate its graph again"
+        )
+    if version != LAYOUT_FORMAT_VERSION:
+        raise LayoutFormatError(
+            f"{file_path} has layout format version {version}, "
+            f"only version {LAYOUT_FORMAT_VERSION} can be read"
+        )
+
+
+def run_engine(
+    source: str,
+    engine: str = "dot",
+    output_format: str = "json",
+    args: List[str] = None,
+    timeout: Optional[float] = None,
+) -> bytes:
+    """Run a Graphviz layout engine on DOT source.
+
+    The engine is killed if it runs longer than timeout seconds, raising
+    LayoutTimeout, other failures raise LayoutError.
+    """
+    try:
+        process = subprocess.run(
+            [engine, f"-T{output_format}", *(args or [])],
+            input=source.encode(),
+            capture_output=True,
+            timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        raise LayoutTimeout(f"{engine} exceeded its {timeout:.1f}s time budget")
+    except OSError as exception:
+        raise LayoutError(f"{engine} could not be run: {exception}")
+    if process.returncode:
+        raise LayoutError(
+            f"{engine} failed with code {process.returncode}: "
+            f"{process.stderr.decode(errors='replace')}"
+        )
+    return process.stdout
+
+
+def get_positions(graph_data: dict) -> Dict[str, Position]:
+    """Get nodes' positions from a layout, in points."""
+    return {
+        node_data["name"]: tuple(node_data["pos"])
+        for node_data in graph_data.get("objects", [])
+    }
+
+
+def get_bounding_box(positions: Iterable[Position]) -> Tuple[float, float, float, float]:
+    x_values, y_values = zip(*positions)
+    return min(x_values), min(y_values), max(x_values), max(y_values)
+
+
+def place_subtree(
+    positions: Dict[str, Position],
+    subtree_positions: Dict[str, Position],
+    anchor: str,
+    margin: float = 100.0,
+) -> Dict[str, Position]:
+    """Insert a laid out subtree in existing positions, around its anchor node.
+
+    The subtree is translated so its anchor keeps its position. Existing
+    nodes in the ranks the subtree spans are pushed aside to make room for
+    it, all the other nodes keep their positions.
+    """
+    anchor_x, anchor_y = positions[anchor]
+    subtree_anchor_x, subtree_anchor_y = subtree_positions[anchor]
+    offset_x, offset_y = anchor_x - subtree_anchor_x, anchor_y - subtree_anchor_y
+
+    new_positions = {
+        name: (x + offset_x, y + offset_y)
+        for name, (x, y) in subtree_positions.items()
+        if name not in positions
+    }
+    if not new_positions:
+        return dict(positions)
+
+    min_x, min_y, max_x, max_y = get_bounding_box(new_positions.values())
+    right_shift = max(0.0, max_x - anchor_x) + margin
+    left_shift = max(0.0, anchor_x - min_x) + margin
+
+    placed_positions = {}
+    for name, (x, y) in positions.items():
+        if name != anchor and min_y - margin <= y <= max_y + margin:
+            x = x + right_shift if x >= anchor_x else x - left_shift
+        placed_positions[name] = (x, y)
+
+    placed_positions.update(new_positions)
+    return placed_positions
+
+
+def split_plain_line(line: str) -> Iterator[str]:
+    """Split a line of plain output in its fields.
+
+    Quoted strings are unquoted, HTML-like strings are kept as one field.
+    """
+    i = 0
+    while i < len(line):
+        if line[i] == " ":
+            i += 1
+        elif line[i] == '"':
+            end = line.find('"', i + 1)
+            while line[end - 1] == "\\":
+                end = line.find('"', end + 1)
+            yield line[i + 1 : end].replace('\\"', '"')
+            i = end + 1
+        elif line[i] == "<":
+            end, depth = i, 0
+            while True:
+                depth += {"<": 1, ">": -1}.get(line[end], 0)
+                end += 1
+                if not depth:
+                    break
+            yield line[i:end]
+            i = end
+        else:
+            end = line.find(" ", i)
+            end = len(line) if end == -1 else end
+            yield line[i:end]
+            i = end
+
+
+def load_plain_layout(output: bytes, nodes: Dict[str, dict]) -> dict:
+    """Parse plain output of a layout engine into compact geometry records.
+
+    Plain output only holds geometry and styles, nodes' other attributes are
+    taken from nodes. Records keep the shape of the json output's, with only
+    what is displayed, and coordinates in points:
+
+        {
+            "version": LAYOUT_FORMAT_VERSION,
+            "bb": [x_min, y_min, x_max, y_max],
+            "objects": [
+                {"_gvid", "name", "label", "tooltip", "fillcolor",
+                 "pos": [x, y], "rect": [x, y, width, height]}
+            ],
+            "edges": [
+                {"_gvid", "tail", "head", "color", "style", "points": [[x, y]]}
+            ],
+        }
+    """
+    graph_data = {
+        "version": LAYOUT_FORMAT_VERSION,
+        "bb": [0.0, 0.0, 0.0, 0.0],
+        "objects": [],
+        "edges": [],
+    }
+    node_ids = {}
+    for line in output.decode().splitlines():
+        fields = list(split_plain_line(line))
+        if not fields:
+            continue
+
+        if fields[0] == "graph":
+            width, height = (float(value) * POINTS_PER_INCH for value in fields[2:4])
+            graph_data["bb"] = [0.0, 0.0, width, height]
+
+        elif fields[0] == "node":
+            name = fields[1]
+            x, y, width, height = (
+                float(value) * POINTS_PER_INCH for value in fields[2:6]
+            )
+            attributes = nodes.get(name, {})
+            node_ids[name] = len(graph_data["objects"])
+            graph_data["objects"].append(
+                {
+                    "_gvid": node_ids[name],
+                    "name": name,
+                    "label": attributes.get("label", name),
+                    "tooltip": attributes.get("tooltip", ""),
+                    # Fields end with style, shape, color and fillcolor
+                    "fillcolor": fields[-1],
+                    "pos": [x, y],
+                    "rect": [x - width / 2, y - height / 2, width, height],
+                }
+            )
+
+        elif fields[0] == "edge":
+            points_count = int(fields[3])
+            coordinates = [
+                float(value) * POINTS_PER_INCH
+                for value in fields[4 : 4 + points_count * 2]
+            ]
+            graph_data["edges"].append(
+                {
+                    "_gvid": len(graph_data["edges"]),
+                    "tail": node_ids[fields[1]],
+                    "head": node_ids[fields[2]],
+                    # Fields end with style and color
+                    "style": fields[-2],
+                    "color": fields[-1],
+                    "points": [
+                        coordinates[i : i + 2] for i in range(0, len(coordinates), 2)
+                    ],
+                }
+            )
+    return graph_data
+
+
+def get_label_size(label: str) -> Tuple[float, float]:
+    """Estimate a node's size from its label, in points."""
+    lines = label.strip("<>").split("<br/>")
+    width = max(54.0, 7.0 * max(len(line) for line in lines) + 16.0)
+    return width, 18.0 * len(lines) + 18.0
+
+
+def get_grid_layout(
+    nodes: Dict[str, dict],
+    edges: Dict[Tuple[str, str], dict],
+    margin: float = 36.0,
+) -> dict:
+    """Place nodes on a grid, in their order, without any layout engine.
+
+    Records are the ones of load_plain_layout, edges are straight.
+    """
+    graph_data = {
+        "version": LAYOUT_FORMAT_VERSION,
+        "bb": [0.0, 0.0, 0.0, 0.0],
+        "objects": [],
+        "edges": [],
+    }
+    if not nodes:
+        return graph_data
+
+    sizes = {
+        name: get_label_size(attributes.get("label", name))
+        for name, attributes in nodes.items()
+    }
+    cell_width = max(width for width, _ in sizes.values()) + margin
+    cell_height = max(height for _, height in sizes.values()) + margin
+    columns = math.ceil(math.sqrt(len(nodes)))
+
+    node_ids = {}
+    for i, (name, attributes) in enumerate(nodes.items()):
+        row, column = divmod(i, columns)
+        x, y = (column + 0.5) * cell_width, (row + 0.5) * cell_height
+        width, height = sizes[name]
+        node_ids[name] = i
+        graph_data["objects"].append(
+            {
+                "_gvid": i,
+                "name": name,
+                "label": attributes.get("label", name),
+                "tooltip": attributes.get("tooltip", ""),
+                "fillcolor": attributes.get("fillcolor", "lightgrey"),
+                "pos": [x, y],
+                "rect": [x - width / 2, y - height / 2, width, height],
+            }
+        )
+
+    for (tail, head), attributes in edges.items():
+        tail_x, tail_y = graph_data["objects"][node_ids[tail]]["pos"]
+        head_x, head_y = graph_data["objects"][node_ids[head]]["pos"]
+        graph_data["edges"].append(
+            {
+                "_gvid": len(graph_data["edges"]),
+                "tail": node_ids[tail],
+                "head": node_ids[head],
+                "style": attributes.get("style", "solid"),
+                "color": attributes.get("color", "black"),
+                # Straight cubic curve
+                "points": [
+                    [tail_x, tail_y],
+                    [tail_x, tail_y],
+                    [head_x, head_y],
+                    [head_x, head_y],
+                ],
+            }
+        )
+
+    rows = math.ceil(len(nodes) / columns)
+    graph_data["bb"] = [0.0, 0.0, columns * cell_width, rows * cell_height]
+    return graph_data
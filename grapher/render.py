@@ -0,0 +1,240 @@
+"""Render laid out graphs to images sized from their content."""
+import importlib.util
+import json
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from PropertyGrapher.grapher.layout import POINTS_PER_INCH, LayoutTimeout, run_engine
+
+
+def get_bounds(graph_data: dict) -> Tuple[float, float, float, float]:
+    """Get the graph's bounding box from a layout, in points."""
+    x_min, y_min, x_max, y_max = graph_data["bb"]
+    return x_min, y_min, x_max, y_max
+
+
+def get_adaptive_dpi(
+    graph_data: dict, pixel_budget: float, max_dpi: float = 200.0, min_dpi: float = 1.0
+) -> float:
+    """Get the highest dpi, up to max_dpi, keeping the image under pixel_budget."""
+    x_min, y_min, x_max, y_max = get_bounds(graph_data)
+    square_inches = max((x_max - x_min) * (y_max - y_min), 1.0) / POINTS_PER_INCH**2
+    return max(min_dpi, min(max_dpi, math.sqrt(pixel_budget / square_inches)))
+
+
+def render_image(
+    source: str,
+    output_file: str,
+    output_format: str = "png",
+    dpi: float = None,
+    engine: str = "dot",
+    engine_args: List[str] = None,
+    timeout: Optional[float] = None,
+) -> None:
+    """Render DOT source to output_file, graphviz writes it directly."""
+    args = [*(engine_args or []), "-o", output_file]
+    if dpi:
+        args.insert(0, f"-Gdpi={dpi:.2f}")
+    run_engine(source, engine, output_format, args=args, timeout=timeout)
+
+
+def can_slice_tiles() -> bool:
+    """Tell whether Qt, which slices tiles, is installed, without importing it."""
+    return importlib.util.find_spec("PySide2") is not None
+
+
+def slice_tiles(
+    image_path: str,
+    output_dir: Path,
+    first_col: int,
+    first_row: int,
+    cols: int,
+    rows: int,
+    tile_size: int,
+) -> None:
+    """Save a rendered block's tiles in output_dir, named after their col and row."""
+    # Only tiles need Qt, the no GUI mode doesn't import it otherwise
+    from PySide2.QtGui import QImage
+
+    image = QImage(image_path)
+    if image.isNull():
+        raise Exception(f"Rendered block {image_path} could not be read")
+    for col in range(cols):
+        for row in range(rows):
+            tile_path = Path(output_dir, f"{first_col + col}_{first_row + row}.png")
+            tile = image.copy(col * tile_size, row * tile_size, tile_size, tile_size)
+            if not tile.save(tile_path.as_posix(), "PNG"):
+                raise Exception(f"Tile {tile_path.as_posix()} could not be written")
+
+
+def render_tiles(
+    source: str,
+    graph_data: dict,
+    output_dir: Path,
+    tile_size: int = 256,
+    max_dpi: float = 200.0,
+    workers: int = 4,
+    engine: str = "dot",
+    engine_args: List[str] = None,
+    timeout: Optional[float] = None,
+    block_tiles: int = 16,
+) -> None:
+    """Render a pyramid of png tiles, for deep zoom viewers.
+
+    Level 0 fits the whole graph in one tile, each next level doubles the
+    resolution, up to max_dpi. Tiles are written in output_dir/level/col_row.png
+    and described in output_dir/tiles.json.
+
+    The graph is only laid out once, levels are rendered from its positions.
+    Each level is rendered once, in blocks of up to block_tiles by block_tiles
+    tiles for the biggest ones, then sliced into tiles, so the graph is drawn
+    once per block instead of once per tile.
+    timeout bounds the whole pyramid, layout included.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+
+    def get_timeout() -> Optional[float]:
+        if deadline is None:
+            return None
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise LayoutTimeout(f"Tiles exceeded their {timeout:.1f}s time budget")
+        return remaining
+
+    positioned_source = run_engine(
+        source, engine, "dot", args=engine_args, timeout=get_timeout()
+    ).decode()
+
+    x_min, y_min, x_max, y_max = get_bounds(graph_data)
+    width, height = x_max - x_min, y_max - y_min
+    max_scale = max_dpi / POINTS_PER_INCH
+    levels = 1 + max(
+        0, math.ceil(math.log2(max(width, height, 1.0) * max_scale / tile_size))
+    )
+
+    def render_block(
+        level: int, scale: float, col: int, row: int, cols: int, rows: int
+    ) -> None:
+        # Graph coordinates go bottom-up, tiles' rows go top-down
+        block_width, block_height = cols * tile_size, rows * tile_size
+        center_x = x_min + (col * tile_size + block_width / 2) / scale
+        center_y = y_max - (row * tile_size + block_height / 2) / scale
+        level_dir = Path(output_dir, str(level))
+        block_path = Path(level_dir, f"block_{col}_{row}.png").as_posix()
+        run_engine(
+            positioned_source,
+            "neato",
+            "png",
+            args=[
+                "-n2",
+                "-Gdpi=72",
+                f"-Gviewport={block_width},{block_height},{scale},"
+                f"{center_x},{center_y}",
+                "-o",
+                block_path,
+            ],
+            timeout=get_timeout(),
+        )
+        try:
+            slice_tiles(block_path, level_dir, col, row, cols, rows, tile_size)
+        finally:
+            Path(block_path).unlink()
+
+    blocks = []
+    for level in range(levels):
+        scale = max_scale / 2 ** (levels - 1 - level)
+        Path(output_dir, str(level)).mkdir(parents=True, exist_ok=True)
+        level_cols = math.ceil(width * scale / tile_size) or 1
+        level_rows = math.ceil(height * scale / tile_size) or 1
+        for col in range(0, level_cols, block_tiles):
+            for row in range(0, level_rows, block_tiles):
+                blocks.append(
+                    (
+                        level,
+                        scale,
+                        col,
+                        row,
+                        min(block_tiles, level_cols - col),
+                        min(block_tiles, level_rows - row),
+                    )
+                )
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Consume results so a failed block raises
+        list(executor.map(lambda block: render_block(*block), blocks))
+
+    with open(Path(output_dir, "tiles.json"), "w") as description_file:
+        json.dump(
+            {
+                "width": math.ceil(width * max_scale),
+                "height": math.ceil(height * max_scale),
+                "tile_size": tile_size,
+                "levels": levels,
+                "format": "png",
+            },
+            description_file,
+            indent=2,
+        )
+
+
+def render_graph(
+    source: str,
+    graph_data: dict,
+    graph_output_path: str,
+    image_format: str = "png",
+    pixel_budget: float = 5e7,
+    max_dpi: float = 200.0,
+    tile_size: int = 256,
+    workers: int = 4,
+    engine: str = "dot",
+    engine_args: List[str] = None,
+    timeout: Optional[float] = None,
+) -> str:
+    """Render the graph in image_format, return the created file or directory.
+
+    engine and engine_args lay the graph out, as for its layout.
+    Engines running longer than timeout are killed, raising LayoutTimeout,
+    tiles share a single timeout.
+    """
+    if image_format == "png":
+        output_file = f"{graph_output_path}.png"
+        dpi = get_adaptive_dpi(graph_data, pixel_budget, max_dpi=max_dpi)
+        render_image(
+            source,
+            output_file,
+            "png",
+            dpi=dpi,
+            engine=engine,
+            engine_args=engine_args,
+            timeout=timeout,
+        )
+    elif image_format == "svg":
+        # Vector images don't depend on dpi
+        output_file = f"{graph_output_path}.svg"
+        render_image(
+            source,
+            output_file,
+            "svg",
+            engine=engine,
+            engine_args=engine_args,
+            timeout=timeout,
+        )
+    elif image_format == "tiles":
+        output_file = f"{graph_output_path}_tiles"
+        render_tiles(
+            source,
+            graph_data,
+            Path(output_file),
+            tile_size=tile_size,
+            max_dpi=max_dpi,
+            workers=workers,
+            engine=engine,
+            engine_args=engine_args,
+            timeout=timeout,
+        )
+    else:
+        raise Exception(f"Unknown image format {image_format}")
+    return output_file
@@ -0,0 +1,314 @@
+"""Long-lived grapher service, keeping a warm EntityLib between graph requests."""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from EntityLibPy import EntityLib
+
+from PropertyGrapher.grapher.client import DEFAULT_HOST, DEFAULT_PORT, IMAGE_FORMATS
+from PropertyGrapher.grapher.graph import PropertyGrapher, get_grapher
+from PropertyGrapher.grapher.render import can_slice_tiles
+from PropertyGrapher.utils.property_helper import get_file_key, get_property_store
+
+
+def get_file_mtimes(
+    rawdata_path: str, file_paths: List[str]
+) -> Dict[str, Optional[float]]:
+    mtimes = {}
+    for file_path in file_paths:
+        try:
+            mtimes[file_path] = os.stat(Path(rawdata_path, file_path)).st_mtime
+        except OSError:
+            # Embedded sub scenes have no file of their own
+            mtimes[file_path] = None
+    return mtimes
+
+
+class RequestError(Exception):
+    """Request the service can't handle, answered with its HTTP status."""
+
+    def __init__(self, message: str, status: int = 400) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass
+class CachedGrapher:
+    """Grapher with its graph built, and the files it was built from."""
+
+    grapher: PropertyGrapher
+    file_mtimes: Dict[str, Optional[float]] = field(default_factory=dict)
+
+    def is_outdated(self, rawdata_path: str) -> bool:
+        return self.file_mtimes != get_file_mtimes(rawdata_path, list(self.file_mtimes))
+
+
+class GrapherService:
+    """Build graphs from a warm EntityLib, with property and layout caches.
+
+    Graph requests are run by a bounded worker pool, the other routes only
+    take the caches' locks and are run by the HTTP threads. EntityLib is only
+    accessed by one thread at a time, layout and rendering run concurrently,
+    each request with its own copy of the cached grapher.
+    """
+
+    def __init__(
+        self,
+        entity_lib: EntityLib,
+        output_path: Path,
+        workers: int = 4,
+        graph_cache_size: int = 64,
+        layout_cache_size: int = 256,
+    ):
+        self.entity_lib = entity_lib
+        self.output_path = output_path
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="grapher"
+        )
+        self.graph_cache_size = graph_cache_size
+        self.layout_cache_size = layout_cache_size
+
+        self._entity_lib_lock = threading.Lock()
+        self._graphers: Dict[Tuple[str, ...], CachedGrapher] = OrderedDict()
+
+        self._layouts_lock = threading.Lock()
+        # Layouts and the errors laying them out, by their graph's source digest
+        self._layouts: Dict[str, Tuple[dict, List[str]]] = OrderedDict()
+
+        # Requests writing the same files wait for each other, their paths
+        # share a fixed number of locks so they are not kept forever
+        self._output_locks = [threading.Lock() for _ in range(64)]
+
+    @property
+    def rawdata_path(self) -> str:
+        return str(self.entity_lib.rawdata_path)
+
+    def get_grapher(self, file_paths: List[Path]) -> PropertyGrapher:
+        """Get a copy of file_paths' cached grapher, built if needed.
+
+        Copies are the request's own, their layout errors and state
+        are not shared with concurrent requests.
+        """
+        key = tuple(file_path.as_posix() for file_path in file_paths)
+        with self._entity_lib_lock:
+            cached = self._graphers.get(key)
+            if cached and not cached.is_outdated(self.rawdata_path):
+                self._graphers.move_to_end(key)
+                return cached.grapher.copy()
+
+            # Unchanged files are still resolved for the other cached graphs
+            file_keys = get_property_store(self.entity_lib).invalidate_outdated()
+            if file_keys:
+                print(
+                    f"{len(file_keys)} modified files, "
+                    "or inheriting from one, invalidated"
+                )
+            grapher = get_grapher(
+                self.entity_lib, file_paths, self.output_path, view=False
+            )
+            print(f"Generate graph for {grapher.graph_name}")
+            files = {item.prop.file_path for item in grapher.iter_graph(grapher.graph)}
+            grapher.log_errors()
+
+            self._graphers[key] = CachedGrapher(
+                grapher, get_file_mtimes(self.rawdata_path, sorted(files))
+            )
+            while len(self._graphers) > self.graph_cache_size:
+                self._graphers.popitem(last=False)
+            return grapher.copy()
+
+    def get_layout(self, grapher: PropertyGrapher) -> dict:
+        """Get grapher's cached layout, its errors are added to grapher's."""
+        key = hashlib.sha1(grapher.graph.source.encode()).hexdigest()
+        with self._layouts_lock:
+            cached = self._layouts.get(key)
+            if cached is not None:
+                self._layouts.move_to_end(key)
+                graph_data, layout_errors = cached
+                grapher.errors.extend(layout_errors)
+                return graph_data
+
+        errors_count = len(grapher.errors)
+        graph_data = grapher.layout()
+        layout_errors = grapher.errors[errors_count:]
+        with self._layouts_lock:
+            self._layouts[key] = (graph_data, layout_errors)
+            while len(self._layouts) > self.layout_cache_size:
+                self._layouts.popitem(last=False)
+        return graph_data
+
+    def create_graph(
+        self,
+        file_paths: List[Path],
+        output_path: Optional[Path] = None,
+        image_format: Optional[str] = "png",
+    ) -> dict:
+        grapher = self.get_grapher(file_paths)
+        graph_data = self.get_layout(grapher)
+
+        graph_output_path = Path(
+            output_path or self.output_path, grapher.graph_name
+        ).as_posix()
+        with self.get_output_lock(graph_output_path):
+            grapher.generate_graph_files(
+                graph_data, graph_output_path=graph_output_path, image_format=None
+            )
+            image_path = (
+                grapher.render_image(
+                    grapher.get_render_source(graph_data),
+                    graph_data,
+                    graph_output_path,
+                    image_format,
+                )
+                if image_format
+                else None
+            )
+
+        return {
+            "json": f"{graph_output_path}.json",
+            "image": image_path,
+            "errors": sorted(set(grapher.errors)),
+        }
+
+    def get_output_path(self, output_path: Optional[str]) -> Path:
+        """Get a request's output directory, which must be within the service's.
+
+        Relative paths are relative to the service's output directory.
+        """
+        if not output_path:
+            return self.output_path
+        service_output_path = self.output_path.resolve()
+        request_output_path = Path(service_output_path, output_path).resolve()
+        if (
+            request_output_path != service_output_path
+            and service_output_path not in request_output_path.parents
+        ):
+            raise RequestError(
+                f"Output path {output_path} is not within the service's "
+                f"{service_output_path.as_posix()}",
+                status=403,
+            )
+        return request_output_path
+
+    def get_output_lock(self, graph_output_path: str) -> threading.Lock:
+        return self._output_locks[hash(graph_output_path) % len(self._output_locks)]
+
+    def invalidate(self, file_paths: List[str] = None) -> dict:
+        """Forget file_paths' graphs and properties, all of them if None."""
+        with self._entity_lib_lock:
+            store = get_property_store(self.entity_lib)
+            if file_paths is None:
+                store.invalidate()
+                self._graphers.clear()
+            else:
+                file_keys = set(
+                    store.invalidate([Path(file_path) for file_path in file_paths])
+                )
+                for key, cached in list(self._graphers.items()):
+                    if any(
+                        get_file_key(self.entity_lib, Path(file_path)) in file_keys
+                        for file_path in cached.file_mtimes
+                    ):
+                        del self._graphers[key]
+        with self._layouts_lock:
+            self._layouts.clear()
+        return {}
+
+    def status(self) -> dict:
+        with self._entity_lib_lock:
+            cached_graphs = len(self._graphers)
+            stored_files = len(get_property_store(self.entity_lib))
+        with self._layouts_lock:
+            cached_layouts = len(self._layouts)
+        return {
+            "rawdata_path": self.rawdata_path,
+            "cached_graphs": cached_graphs,
+            "stored_files": stored_files,
+            "cached_layouts": cached_layouts,
+        }
+
+    def handle(self, route: str, data: dict) -> dict:
+        if route == "graph":
+            if not isinstance(data.get("files"), list):
+                raise RequestError("Graph requests need a list of files")
+            image_format = data.get("image", "png")
+            if image_format is not None and image_format not in IMAGE_FORMATS:
+                raise RequestError(
+                    f"Unknown image format {image_format}, "
+                    f"expected one of {IMAGE_FORMATS} or null"
+                )
+            if image_format == "tiles" and not can_slice_tiles():
+                raise RequestError(
+                    "Tiles are sliced with Qt, the service has no PySide2 installed"
+                )
+            return self.create_graph(
+                [Path(file_path) for file_path in data["files"]],
+                output_path=self.get_output_path(data.get("output_path")),
+                image_format=image_format,
+            )
+        elif route == "invalidate":
+            return self.invalidate(data.get("files"))
+        elif route == "status":
+            return self.status()
+        raise RequestError(f"Unknown route {route}", status=404)
+
+
+class GrapherRequestHandler(BaseHTTPRequestHandler):
+    """Hand json requests over to the service's worker pool."""
+
+    def read_data(self) -> dict:
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            data = json.loads(self.rfile.read(length).decode() or "{}")
+        except ValueError as exception:
+            raise RequestError(f"Invalid request: {exception}")
+        if not isinstance(data, dict):
+            raise RequestError("Requests' data must be a json object")
+        return data
+
+    def do_POST(self) -> None:
+        service: GrapherService = self.server.service
+        try:
+            data = self.read_data()
+            route = self.path.strip("/")
+            if route == "graph":
+                result = service.executor.submit(service.handle, route, data).result()
+            else:
+                # Not queued behind graph builds
+                result = service.handle(route, data)
+            status = 200
+        except RequestError as exception:
+            result, status = {"error": str(exception)}, exception.status
+        except Exception as exception:
+            result, status = {"error": f"{type(exception).__name__}: {exception}"}, 500
+
+        body = json.dumps(result).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(
+    entity_lib: EntityLib,
+    output_path: Path,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    workers: int = 4,
+) -> None:
+    server = ThreadingHTTPServer((host, port), GrapherRequestHandler)
+    server.service = GrapherService(entity_lib, output_path, workers=workers)
+    print(f"Grapher service listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        server.service.executor.shutdown()
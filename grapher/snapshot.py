@@ -0,0 +1,220 @@
+"""Serializable snapshots of resolved dependency trees.
+
+A snapshot holds the properties a graph's walk loads, with their links and
+flags, so the graph can be built again without loading EntityLib files.
+Snapshots are gzipped json, each property being a list of SNAPSHOT_FIELDS.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from PropertyGrapher.grapher.graph import CombinedPropertyGrapher, PropertyGrapher
+from PropertyGrapher.utils.property_helper import GraphProperty, ResolvedProperty
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_SUFFIX = ".snapshot.json.gz"
+SNAPSHOT_FIELDS = [
+    "file_path",
+    "file_name",
+    "file_key",
+    "property_name",
+    "property_path",
+    "parent",
+    "is_set",
+    "source_is_set",
+    "instance_of",
+    "prefab",
+    "sub_scenes",
+    "override",
+    "overriden",
+    "cyclic_references",
+]
+# Prefab and sub scenes of properties the walk didn't expand are not resolved
+_UNRESOLVED_PREFAB = -1
+
+
+class SnapshotProperty(GraphProperty):
+    """GraphProperty restored from a snapshot, without native property."""
+
+    def __init__(
+        self,
+        file_path: str,
+        file_name: str,
+        file_key: str,
+        property_name: Optional[str],
+        property_path: Optional[str],
+        is_set: bool,
+        source_is_set: Optional[bool],
+        instance_of: Optional[str],
+        overriden: bool,
+        cyclic_references: List[str],
+    ) -> None:
+        # Links are set once all properties are restored
+        super().__init__(
+            ResolvedProperty(None, None, is_set, instance_of),
+            Path(file_path),
+            property_name=property_name,
+            source_is_set=source_is_set,
+            file_key=file_key,
+        )
+        self.file_name = file_name
+        self._property_path = property_path
+        self.cyclic_references = cyclic_references
+        self.overriden = overriden
+
+    def has_children(self) -> bool:
+        # Only resolved children can be walked
+        return bool(self._prefab or self._sub_scenes)
+
+    def get_prefab(self) -> Optional[GraphProperty]:
+        raise Exception(f"Prefab of {self.name} is not resolved in snapshot")
+
+    def get_sub_scenes(self) -> List[GraphProperty]:
+        raise Exception(f"Sub scenes of {self.name} are not resolved in snapshot")
+
+
+def create_snapshot(grapher: PropertyGrapher) -> dict:
+    """Resolve grapher's whole hierarchy and return its snapshot."""
+    # Walk with neither depth limit nor collapsed nodes resolves what
+    # any graph of these roots can need
+    max_depth, collapsed_nodes = grapher.max_depth, grapher.collapsed_nodes
+    grapher.max_depth, grapher.collapsed_nodes = None, set()
+    try:
+        for _ in grapher.walk():
+            pass
+    finally:
+        grapher.max_depth, grapher.collapsed_nodes = max_depth, collapsed_nodes
+
+    ids: Dict[int, int] = {}
+    props: List[GraphProperty] = []
+    props_to_visit = list(grapher.root_props)
+    while props_to_visit:
+        prop = props_to_visit.pop()
+        if id(prop) in ids:
+            continue
+        ids[id(prop)] = len(props)
+        props.append(prop)
+
+        if prop._prefab_loaded and prop._prefab:
+            props_to_visit.append(prop._prefab)
+        props_to_visit.extend(prop._sub_scenes or [])
+        if prop.parent:
+            props_to_visit.append(prop.parent)
+
+    nodes = []
+    for prop in props:
+        if not prop._prefab_loaded:
+            prefab = _UNRESOLVED_PREFAB
+        else:
+            prefab = ids[id(prop._prefab)] if prop._prefab else None
+        sub_scenes = prop._sub_scenes
+        nodes.append(
+            [
+                prop.file_path,
+                prop.file_name,
+                prop.file_key,
+                prop.property_name,
+                prop._property_path,
+                ids[id(prop.parent)] if prop.parent else None,
+                prop._is_set,
+                prop.source_is_set,
+                prop._instance_of,
+                prefab,
+                None
+                if sub_scenes is None
+                else [ids[id(sub_scene)] for sub_scene in sub_scenes],
+                ids[id(prop.override)] if prop.override else None,
+                prop.overriden,
+                prop.cyclic_references,
+            ]
+        )
+
+    return {
+        "version": SNAPSHOT_VERSION,
+        "name": grapher.graph_name,
+        "combined": isinstance(grapher, CombinedPropertyGrapher),
+        "roots": [ids[id(prop)] for prop in grapher.root_props],
+        "fields": SNAPSHOT_FIELDS,
+        "nodes": nodes,
+    }
+
+
+def load_snapshot_props(snapshot: dict) -> List[SnapshotProperty]:
+    """Restore snapshot's properties, return its roots."""
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        raise Exception(f"Unsupported snapshot version {snapshot.get('version')}")
+
+    nodes = [dict(zip(snapshot["fields"], node)) for node in snapshot["nodes"]]
+    props = [
+        SnapshotProperty(
+            node["file_path"],
+            node["file_name"],
+            node["file_key"],
+            node["property_name"],
+            node["property_path"],
+            node["is_set"],
+            node["source_is_set"],
+            node["instance_of"],
+            node["overriden"],
+            node["cyclic_references"],
+        )
+        for node in nodes
+    ]
+
+    for prop, node in zip(props, nodes):
+        if node["parent"] is not None:
+            prop.parent = props[node["parent"]]
+        if node["prefab"] != _UNRESOLVED_PREFAB:
+            prop._prefab_loaded = True
+            prop._prefab = props[node["prefab"]] if node["prefab"] is not None else None
+        if node["sub_scenes"] is not None:
+            prop._sub_scenes = [props[i] for i in node["sub_scenes"]]
+        if node["override"] is not None:
+            prop.override = props[node["override"]]
+
+    return [props[i] for i in snapshot["roots"]]
+
+
+def write_snapshot(snapshot: dict, snapshot_path: str) -> None:
+    with gzip.open(snapshot_path, "wt") as snapshot_file:
+        json.dump(snapshot, snapshot_file, separators=(",", ":"))
+
+
+def read_snapshot(snapshot_path: str) -> dict:
+    with gzip.open(snapshot_path, "rt") as snapshot_file:
+        return json.load(snapshot_file)
+
+
+def get_snapshot_path(grapher: PropertyGrapher, output_path: Path = None) -> str:
+    return Path(
+        output_path or grapher.output_path, f"{grapher.graph_name}{SNAPSHOT_SUFFIX}"
+    ).as_posix()
+
+
+def get_grapher_from_snapshot(
+    snapshot: dict, output_path: Path, view: bool = True
+) -> PropertyGrapher:
+    """Get a grapher of snapshot's hierarchy, which never loads EntityLib files."""
+    root_props = load_snapshot_props(snapshot)
+    if not snapshot["combined"]:
+        return PropertyGrapher(root_props[0], output_path, view=view)
+    return CombinedPropertyGrapher(
+        root_props, output_path, view=view, name=snapshot["name"]
+    )
+
+
+def create_graph_from_snapshot(
+    snapshot_path: Path,
+    output_path: Path,
+    view: bool = True,
+    image_format: Optional[str] = "png",
+) -> dict:
+    grapher = get_grapher_from_snapshot(
+        read_snapshot(snapshot_path.as_posix()), output_path, view=view
+    )
+    graph_data = grapher.generate_graph()
+    grapher.generate_graph_files(graph_data, image_format=image_format, background=True)
+    return graph_data
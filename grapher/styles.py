@@ -1,5 +1,7 @@
 from dataclasses import dataclass
 
+# Colors are given in hex, so the viewer can read them back from layouts
+
 
 @dataclass
 class BaseNodeStyle:
@@ -11,19 +13,25 @@ class BaseNodeStyle:
 @dataclass
 class SubSceneNodeStyle(BaseNodeStyle):
     """Node style for sub scene representation."""
-    color: str = "cadetblue1"
+    color: str = "#98f5ff"  # cadetblue1
 
 
 @dataclass
 class OverridenSubSceneNodeStyle(BaseNodeStyle):
     """Node style for overriden sub scene representation."""
-    color: str = "darkorange"
+    color: str = "#ff8c00"  # darkorange
+
+
+@dataclass
+class RootNodeStyle(BaseNodeStyle):
+    """Node style for the roots of a combined graph."""
+    color: str = "#ffd700"  # gold
 
 
 @dataclass
 class PrefabNodeStyle(BaseNodeStyle):
     """Node style for prefab representation."""
-    color: str = "aquamarine"
+    color: str = "#7fffd4"  # aquamarine
 
 
 @dataclass
@@ -35,24 +43,24 @@ class BaseArrowStyle:
 @dataclass
 class PrefabArrowStyle(BaseArrowStyle):
     """Arrow style for prefab connection."""
-    color: str = "red"
+    color: str = "#ff0000"  # red
 
 
 @dataclass
 class SubSceneArrowStyle(BaseArrowStyle):
     """Arrow style for sub scene connection."""
-    color: str = "blue"
+    color: str = "#0000ff"  # blue
 
 
 @dataclass
 class EditedPrefabSubSceneArrow:
     """Arrow style for edited prefab sub scene connection."""
-    color: str = "blue"
+    color: str = "#0000ff"  # blue
     style: str = "dashed"
 
 
 @dataclass
 class OverridePrefabSubSceneArrow:
     """Arrow style for edited prefab sub scene connection."""
-    color: str = "firebrick2"
+    color: str = "#ee2c2c"  # firebrick2
     style: str = "dotted"
@@ -0,0 +1,50 @@
+"""Snapshots of hand written hierarchies, graphed without EntityLib."""
+from typing import Dict, List
+
+from PropertyGrapher.grapher.snapshot import SNAPSHOT_FIELDS, SNAPSHOT_VERSION
+
+
+def get_snapshot(
+    props: Dict[str, dict], roots: List[str], name: str = None, combined: bool = False
+) -> dict:
+    """Get the snapshot of props, by id, linked to each other by their ids.
+
+    Each property needs its `file_path`, its `prefab` and `sub_scenes` ids
+    are resolved as empty when not given.
+    """
+    ids = {prop_id: i for i, prop_id in enumerate(props)}
+
+    def get_id(prop_id: str):
+        return None if prop_id is None else ids[prop_id]
+
+    nodes = []
+    for prop in props.values():
+        file_name = prop["file_path"].rsplit("/", 1)[-1]
+        node = {
+            "file_path": prop["file_path"],
+            "file_name": file_name,
+            "file_key": prop["file_path"],
+            "property_name": prop.get("property_name"),
+            "property_path": prop.get("property_path"),
+            "parent": get_id(prop.get("parent")),
+            "is_set": prop.get("is_set", True),
+            "source_is_set": prop.get("source_is_set"),
+            "instance_of": prop.get("instance_of"),
+            "prefab": get_id(prop.get("prefab")),
+            "sub_scenes": [
+                get_id(sub_scene) for sub_scene in prop.get("sub_scenes", [])
+            ],
+            "override": get_id(prop.get("override")),
+            "overriden": prop.get("overriden", False),
+            "cyclic_references": prop.get("cyclic_references", []),
+        }
+        nodes.append([node[field] for field in SNAPSHOT_FIELDS])
+
+    return {
+        "version": SNAPSHOT_VERSION,
+        "name": name or props[roots[0]]["file_path"],
+        "combined": combined,
+        "roots": [ids[prop_id] for prop_id in roots],
+        "fields": SNAPSHOT_FIELDS,
+        "nodes": nodes,
+    }
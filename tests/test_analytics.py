@@ -0,0 +1,87 @@
+import unittest
+
+from PropertyGrapher.grapher.analytics import DependencyGraph, iter_report_rows
+
+
+def get_graph(dependencies: dict, prefabs: dict = None) -> DependencyGraph:
+    prefabs = prefabs or {}
+    graph = DependencyGraph()
+    for file_path in sorted(set(dependencies) | set(prefabs)):
+        prefab = prefabs.get(file_path)
+        file_dependencies = dependencies.get(file_path, [])
+        graph.add_file(
+            file_path, prefab, file_dependencies + ([prefab] if prefab else [])
+        )
+    return graph
+
+
+class DependencyGraphTest(unittest.TestCase):
+    def setUp(self) -> None:
+        # b and c depend on each other, e on itself
+        self.graph = get_graph(
+            {"a": ["b", "d"], "b": ["c"], "c": ["b"], "e": ["e"]},
+        )
+        self.rows = {row["file"]: row for row in iter_report_rows(self.graph)}
+
+    def test_components(self) -> None:
+        component_of, components = self.graph.get_components()
+        index = self.graph.get_index
+
+        self.assertEqual(component_of[index("b")], component_of[index("c")])
+        self.assertEqual(
+            len({component_of[index(file_path)] for file_path in "abcde"}), 4
+        )
+        # Components come after the ones they depend on
+        self.assertLess(component_of[index("b")], component_of[index("a")])
+        self.assertLess(component_of[index("d")], component_of[index("a")])
+        self.assertEqual(sorted(map(len, components)), [1, 1, 1, 2])
+
+    def test_cycles(self) -> None:
+        self.assertIsNotNone(self.rows["b"]["component"])
+        self.assertEqual(self.rows["b"]["component"], self.rows["c"]["component"])
+        self.assertIsNotNone(self.rows["e"]["component"])
+        self.assertIsNone(self.rows["a"]["component"])
+        self.assertIsNone(self.rows["d"]["component"])
+
+    def test_closures(self) -> None:
+        closure_sizes = {name: row["closure_size"] for name, row in self.rows.items()}
+        # A file is not its own dependency, even in a cycle
+        self.assertEqual(closure_sizes, {"a": 3, "b": 1, "c": 1, "d": 0, "e": 0})
+        depths = {name: row["depth"] for name, row in self.rows.items()}
+        self.assertEqual(depths, {"a": 1, "b": 0, "c": 0, "d": 0, "e": 0})
+
+    def test_fan_in_and_out(self) -> None:
+        fan_in = {name: row["fan_in"] for name, row in self.rows.items()}
+        fan_out = {name: row["fan_out"] for name, row in self.rows.items()}
+        self.assertEqual(fan_in, {"a": 0, "b": 2, "c": 1, "d": 1, "e": 1})
+        self.assertEqual(fan_out, {"a": 2, "b": 1, "c": 1, "d": 0, "e": 1})
+        # d is only referenced
+        self.assertFalse(self.rows["d"]["resolved"])
+
+    def test_prefab_depths(self) -> None:
+        graph = get_graph({}, {"a": "p", "p": "q", "x": "y", "y": "x"})
+        rows = {row["file"]: row for row in iter_report_rows(graph)}
+
+        self.assertEqual(rows["a"]["prefab_depth"], 2)
+        self.assertEqual(rows["p"]["prefab_depth"], 1)
+        self.assertEqual(rows["q"]["prefab_depth"], 0)
+        # Prefab cycles are cut
+        self.assertEqual(
+            graph.get_prefab_chain(graph.get_index("x")),
+            [graph.get_index("x"), graph.get_index("y")],
+        )
+
+    def test_deep_chain(self) -> None:
+        # Deeper than the recursion limit
+        count = 5000
+        graph = get_graph({str(i): [str(i + 1)] for i in range(count)})
+        rows = {row["file"]: row for row in iter_report_rows(graph)}
+
+        self.assertEqual(rows["0"]["depth"], count)
+        self.assertEqual(rows["0"]["closure_size"], count)
+        self.assertEqual(rows[str(count)]["closure_size"], 0)
+
+    def test_paths(self) -> None:
+        graph = DependencyGraph()
+        self.assertEqual(graph.get_index("a/./b.entity"), graph.get_index("a/b.entity"))
+        self.assertEqual(graph.files, ["a/b.entity"])
@@ -0,0 +1,72 @@
+import unittest
+
+from PropertyGrapher.grapher.dot import DotGraph, HtmlLabel, quote
+
+
+class QuoteTest(unittest.TestCase):
+    def test_quote(self) -> None:
+        self.assertEqual(quote("a.entity"), '"a.entity"')
+        self.assertEqual(quote('say "hi"'), '"say \\"hi\\""')
+        self.assertEqual(quote("C:\\rawdata"), '"C:\\rawdata"')
+
+    def test_html_label(self) -> None:
+        label = "<Name<br/>---------<br/>a.entity>"
+        self.assertEqual(quote(HtmlLabel(label)), label)
+        # Only labels built as HTML are, not names looking like HTML
+        self.assertEqual(quote("<Default>"), '"<Default>"')
+        self.assertEqual(quote(label), f'"{label}"')
+
+
+class DotGraphTest(unittest.TestCase):
+    def test_source(self) -> None:
+        graph = DotGraph(comment="Dependencies", graph_attr={"rankdir": "BT"})
+        graph.node("a", label="A", shape="box", fillcolor="red")
+        graph.node(
+            "b", label=HtmlLabel("<B<br/>b.entity>"), shape="box", fillcolor="red"
+        )
+        graph.node("c", shape="ellipse")
+        graph.edge("a", "b", color="blue")
+
+        self.assertEqual(
+            graph.source,
+            "// Dependencies\n"
+            "digraph {\n"
+            '\tgraph [rankdir="BT"]\n'
+            '\tnode [fillcolor="red" shape="box"]\n'
+            '\t"a" [label="A"]\n'
+            '\t"b" [label=<B<br/>b.entity>]\n'
+            # Previous defaults not given anymore are reset
+            '\tnode [shape="ellipse" fillcolor=""]\n'
+            '\t"c"\n'
+            '\tedge [color="blue"]\n'
+            '\t"a" -> "b"\n'
+            "}\n",
+        )
+
+    def test_deduplication(self) -> None:
+        graph = DotGraph()
+        graph.node("a", label="A")
+        graph.node("a", tooltip="a.entity")
+        graph.edge("a", "b", color="blue")
+        graph.edge("a", "b", style="dashed")
+
+        self.assertEqual(graph.nodes, {"a": {"label": "A", "tooltip": "a.entity"}})
+        self.assertEqual(
+            graph.edges, {("a", "b"): {"color": "blue", "style": "dashed"}}
+        )
+        self.assertEqual(graph.source.count('"a" [label="A" tooltip="a.entity"]'), 1)
+        self.assertEqual(graph.source.count('"a" -> "b"'), 1)
+
+    def test_copy(self) -> None:
+        graph = DotGraph(graph_attr={"rankdir": "BT"})
+        graph.node("a", label="A")
+        graph.edge("a", "b")
+
+        graph_copy = graph.copy()
+        graph_copy.node("a", label="Copy")
+        graph_copy.node("c")
+        graph_copy.attr(splines="true")
+
+        self.assertEqual(graph.nodes, {"a": {"label": "A"}})
+        self.assertEqual(graph.graph_attr, {"rankdir": "BT"})
+        self.assertEqual(graph_copy.edges, graph.edges)
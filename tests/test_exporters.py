@@ -0,0 +1,50 @@
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+from PropertyGrapher.grapher.dot import quote
+from PropertyGrapher.grapher.exporters import DotExporter
+from PropertyGrapher.grapher.snapshot import get_grapher_from_snapshot
+from PropertyGrapher.tests.snapshots import get_snapshot
+
+# P.entity is both a sub scene of R and the prefab of A, walked in this order
+SHARED_NAME = {
+    "R": {"file_path": "R.entity", "sub_scenes": ["A", "B"]},
+    "A": {
+        "file_path": "A.entity",
+        "property_name": "A",
+        "parent": "R",
+        "instance_of": "P.entity",
+        "prefab": "P",
+    },
+    "B": {"file_path": "P.entity", "parent": "R"},
+    "P": {"file_path": "P.entity", "parent": "A"},
+}
+
+
+class DotExporterTest(unittest.TestCase):
+    def get_grapher(self):
+        return get_grapher_from_snapshot(
+            get_snapshot(SHARED_NAME, ["R"]), Path(tempfile.mkdtemp()), view=False
+        )
+
+    def test_last_attributes(self) -> None:
+        output_file = io.StringIO()
+        DotExporter(self.get_grapher(), output_file).export()
+        lines = output_file.getvalue().splitlines()
+
+        # Nodes walked again are only written again if their attributes changed
+        grapher = self.get_grapher()
+        grapher.rebuild_graph()
+        for name, attributes in grapher.nodes.items():
+            node_statement = f"\t{quote(name)} ["
+            statements = [line for line in lines if line.startswith(node_statement)]
+            self.assertEqual(len(statements), 2 if name == "P.entity" else 1)
+            # dot applies the last ones, as DotGraph does
+            self.assertIn(f"fillcolor={quote(attributes['fillcolor'])}", statements[-1])
+        self.assertEqual(len([line for line in lines if " -> " in line]), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
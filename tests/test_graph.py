@@ -0,0 +1,205 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from PropertyGrapher.grapher.snapshot import get_grapher_from_snapshot
+from PropertyGrapher.tests.snapshots import get_snapshot
+
+# Level instancing the prefab P twice, A overriding P's sub scene X with X2
+# while B keeps it. X instances Q, only reachable through B
+OVERRIDDEN_PREFAB = {
+    "L": {"file_path": "L.entity", "sub_scenes": ["A", "B"]},
+    "A": {
+        "file_path": "A.entity",
+        "property_name": "A",
+        "parent": "L",
+        "instance_of": "P.entity",
+        "prefab": "P_A",
+        "sub_scenes": ["X2"],
+    },
+    "B": {
+        "file_path": "B.entity",
+        "property_name": "B",
+        "parent": "L",
+        "instance_of": "P.entity",
+        "prefab": "P_B",
+    },
+    "P_A": {"file_path": "P.entity", "parent": "A", "sub_scenes": ["X_A"]},
+    "P_B": {"file_path": "P.entity", "parent": "B", "sub_scenes": ["X_B"]},
+    "X2": {
+        "file_path": "X2.entity",
+        "property_name": "X",
+        "property_path": "X",
+        "parent": "A",
+        "override": "X_A",
+    },
+    "X_A": {
+        "file_path": "X.entity",
+        "property_name": "X",
+        "property_path": "X",
+        "parent": "P_A",
+        "instance_of": "Q.entity",
+        "prefab": "Q_A",
+        "overriden": True,
+    },
+    "X_B": {
+        "file_path": "X.entity",
+        "property_name": "X",
+        "property_path": "X",
+        "parent": "P_B",
+        "instance_of": "Q.entity",
+        "prefab": "Q_B",
+    },
+    "Q_A": {"file_path": "Q.entity", "parent": "X_A"},
+    "Q_B": {"file_path": "Q.entity", "parent": "X_B"},
+}
+
+# Chain of sub scenes R > S > T, T instancing U
+CHAIN = {
+    "R": {"file_path": "R.entity", "sub_scenes": ["S"]},
+    "S": {
+        "file_path": "S.entity",
+        "property_name": "S",
+        "parent": "R",
+        "sub_scenes": ["T"],
+    },
+    "T": {
+        "file_path": "T.entity",
+        "property_name": "T",
+        "parent": "S",
+        "instance_of": "U.entity",
+        "prefab": "U",
+    },
+    "U": {"file_path": "U.entity", "parent": "T"},
+}
+
+
+class WalkTest(unittest.TestCase):
+    def get_grapher(self, props: dict, roots: list = None):
+        roots = roots or [next(iter(props))]
+        snapshot = get_snapshot(props, roots, combined=len(roots) > 1)
+        return get_grapher_from_snapshot(snapshot, Path(tempfile.mkdtemp()), view=False)
+
+    def test_prefab_overridden_by_one_parent(self) -> None:
+        grapher = self.get_grapher(OVERRIDDEN_PREFAB)
+        items = list(grapher.walk())
+
+        sources = {
+            (item.source.file_path, item.prop.file_path)
+            for item in items
+            if item.source
+        }
+        self.assertIn(("B.entity", "P.entity"), sources)
+        self.assertIn(("P.entity", "X.entity"), sources)
+        self.assertIn(("X.entity", "Q.entity"), sources)
+        self.assertIn(("A.entity", "X2.entity"), sources)
+
+    def get_names(self, grapher) -> list:
+        return [item.prop.name for item in grapher.walk()]
+
+    def test_walk(self) -> None:
+        grapher = self.get_grapher(CHAIN)
+        items = list(grapher.walk())
+
+        self.assertEqual(
+            [(item.prop.name, item.depth) for item in items],
+            [("R.entity", 0), ("S", 1), ("T", 2), ("U.entity", 3)],
+        )
+        self.assertIsNone(items[0].source)
+        self.assertEqual(grapher.collapsible_nodes, {"R.entity", "S", "T"})
+        self.assertEqual(grapher.unexpanded_nodes, set())
+
+    def test_max_depth(self) -> None:
+        grapher = self.get_grapher(CHAIN)
+        grapher.max_depth = 1
+
+        self.assertEqual(self.get_names(grapher), ["R.entity", "S"])
+        self.assertEqual(grapher.unexpanded_nodes, {"S"})
+        self.assertEqual(grapher.collapsible_nodes, {"R.entity"})
+
+    def test_expanded_node(self) -> None:
+        grapher = self.get_grapher(CHAIN)
+        grapher.max_depth = 1
+        grapher.set_node_expanded("S", True)
+
+        # Expanded nodes' hierarchy is walked whatever max_depth
+        self.assertEqual(self.get_names(grapher), ["R.entity", "S", "T", "U.entity"])
+        self.assertEqual(grapher.unexpanded_nodes, set())
+
+    def test_collapsed_node(self) -> None:
+        grapher = self.get_grapher(CHAIN)
+        grapher.set_node_expanded("S", False)
+
+        self.assertEqual(self.get_names(grapher), ["R.entity", "S"])
+        self.assertEqual(grapher.unexpanded_nodes, {"S"})
+
+        grapher.set_node_expanded("S", True)
+        grapher.rebuild_graph()
+        self.assertEqual(set(grapher.nodes), {"R.entity", "S", "T", "U.entity"})
+        self.assertEqual(
+            set(grapher.edges), {("R.entity", "S"), ("S", "T"), ("T", "U.entity")}
+        )
+
+    def test_shared_node(self) -> None:
+        # Both roots instance S, only expanded once
+        props = {
+            "R1": {"file_path": "R1.entity", "instance_of": "S.entity", "prefab": "S1"},
+            "R2": {"file_path": "R2.entity", "instance_of": "S.entity", "prefab": "S2"},
+            "S1": {"file_path": "S.entity", "parent": "R1", "sub_scenes": ["T1"]},
+            "S2": {"file_path": "S.entity", "parent": "R2", "sub_scenes": ["T2"]},
+            "T1": {"file_path": "T.entity", "property_name": "T", "parent": "S1"},
+            "T2": {"file_path": "T.entity", "property_name": "T", "parent": "S2"},
+        }
+        grapher = self.get_grapher(props, roots=["R1", "R2"])
+        items = list(grapher.walk())
+
+        self.assertEqual(
+            [item.prop.name for item in items if not item.source],
+            ["R1.entity", "R2.entity"],
+        )
+        self.assertEqual([item.prop.name for item in items].count("T"), 1)
+
+    def test_shared_sub_scene_not_resolved_again(self) -> None:
+        # Both roots have the same sub scene, which has its own sub scene
+        props = {
+            "R1": {"file_path": "R1.entity", "sub_scenes": ["S1"]},
+            "R2": {"file_path": "R2.entity", "sub_scenes": ["S2"]},
+            "S1": {
+                "file_path": "S.entity",
+                "property_name": "S",
+                "parent": "R1",
+                "sub_scenes": ["T1"],
+            },
+            "S2": {
+                "file_path": "S.entity",
+                "property_name": "S",
+                "parent": "R2",
+                "sub_scenes": ["T2"],
+            },
+            "T1": {"file_path": "T.entity", "property_name": "T", "parent": "S1"},
+            "T2": {"file_path": "T.entity", "property_name": "T", "parent": "S2"},
+        }
+        grapher = self.get_grapher(props, roots=["R1", "R2"])
+        # Snapshots' properties raise if their sub scenes are resolved again
+        (shared,) = grapher.root_props[1].sub_scenes
+        shared._sub_scenes = None
+
+        names = [item.prop.name for item in grapher.walk()]
+        self.assertEqual(names.count("S"), 2)
+        self.assertEqual(names.count("T"), 1)
+
+    def test_html_label(self) -> None:
+        props = {
+            "R": {"file_path": "R.entity", "sub_scenes": ["S"]},
+            "S": {
+                "file_path": "S&T.entity",
+                "property_name": "<Default>",
+                "parent": "R",
+            },
+        }
+        grapher = self.get_grapher(props)
+        grapher.rebuild_graph()
+
+        label = grapher.nodes["<Default>"]["label"]
+        self.assertEqual(label, "<&lt;Default&gt;<br/>---------<br/>S&amp;T.entity>")
+        self.assertIn(f"label={label}", grapher.graph.source)
@@ -0,0 +1,116 @@
+import tempfile
+import unittest
+from importlib.util import find_spec
+from pathlib import Path
+
+HAS_QT = find_spec("PySide2") is not None and find_spec("EntityLibPy") is not None
+
+if HAS_QT:
+    from PySide2.QtCore import QCoreApplication, QObject
+
+    from PropertyGrapher.ui.jobs import GraphJobScheduler, get_initial_depth
+    from PropertyGrapher.ui.prefetch import Prefetcher
+
+    class Subscriber(QObject):
+        """Keep the job it requested as tabs do, and the one it had once finished."""
+
+        def __init__(self) -> None:
+            super().__init__()
+            self.job = None
+            self.layouts = []
+            self.finished_jobs = []
+            self.jobs_when_finished = []
+            self.errors = []
+
+        def set_job(self, job) -> None:
+            self.job = job
+
+        def set_layout(self, graph_data: dict) -> None:
+            self.layouts.append(graph_data)
+
+        def set_job_finished(self, job) -> None:
+            self.finished_jobs.append(job)
+            self.jobs_when_finished.append(self.job)
+
+        def set_job_failed(self, error: str) -> None:
+            self.errors.append(error)
+
+
+@unittest.skipUnless(HAS_QT, "PySide2 and EntityLibPy are needed")
+class RequestTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+
+    def setUp(self) -> None:
+        # Without workers, jobs are only finished by the tests
+        self.scheduler = GraphJobScheduler(Path(tempfile.mkdtemp()), workers=0)
+        self.file_paths = [Path("rawdata", "a.entity")]
+
+    def finish(self, job, graph_data: dict) -> None:
+        job.graph_data = graph_data
+        job.done = True
+        job.finished.emit(job)
+
+    def test_request_done_job(self) -> None:
+        first = Subscriber()
+        first.job = self.scheduler.request(first, self.file_paths)
+        graph_data = {"objects": [{"name": "a.entity"}]}
+        self.finish(first.job, graph_data)
+
+        second = Subscriber()
+        second.job = self.scheduler.request(second, self.file_paths)
+
+        self.assertIs(second.job, first.job)
+        self.assertEqual(second.layouts, [graph_data])
+        self.assertEqual(second.finished_jobs, [first.job])
+        # Job is received before being caught up with its results
+        self.assertEqual(second.jobs_when_finished, [first.job])
+        self.assertEqual(second.errors, [])
+
+    def get_prefetcher(self) -> "Prefetcher":
+        # As if a worker was left to prefetches
+        self.scheduler._max_prefetches = 1
+        return Prefetcher(self.scheduler, "rawdata")
+
+    def test_open_prefetched_job(self) -> None:
+        prefetcher = self.get_prefetcher()
+        prefetcher.prefetch("a.entity")
+        (prefetched,) = prefetcher._jobs.values()
+        self.finish(prefetched, {"objects": [{"name": "a.entity"}]})
+
+        # Opened as GraphicsView.open_dependencies_graph does
+        tab = Subscriber()
+        tab.job = self.scheduler.request(
+            tab, [prefetcher.get_graph_path("a.entity")], max_depth=get_initial_depth()
+        )
+        self.assertIs(tab.job, prefetched)
+        self.assertFalse(tab.job.prefetch)
+        self.assertEqual(tab.finished_jobs, [prefetched])
+
+        prefetcher.hand_over(tab.job)
+        self.assertEqual(len(prefetcher._jobs), 0)
+        self.assertFalse(prefetched.cancelled)
+        self.assertEqual(prefetched.subscribers, [tab])
+
+    def test_failed_prefetch(self) -> None:
+        prefetcher = self.get_prefetcher()
+        prefetcher.prefetch("a.entity")
+        (prefetched,) = prefetcher._jobs.values()
+        prefetched.error = "Exception: failed"
+        prefetched.failed.emit(prefetched.error)
+
+        self.assertEqual(len(prefetcher._jobs), 0)
+        self.assertTrue(prefetched.cancelled)
+
+    def test_prefetch_without_free_worker(self) -> None:
+        scheduler = GraphJobScheduler(Path(tempfile.mkdtemp()), workers=1)
+        prefetcher = Prefetcher(scheduler, "rawdata")
+
+        self.assertFalse(prefetcher.enabled)
+        prefetcher.prefetch("a.entity")
+        self.assertEqual(len(prefetcher._jobs), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,178 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from PropertyGrapher.grapher.dot import DotGraph
+from PropertyGrapher.grapher.layout import (
+    GRID_STRATEGY,
+    LAYOUT_FORMAT_VERSION,
+    LAYOUT_STRATEGIES,
+    LayoutError,
+    LayoutFormatError,
+    LayoutTimeout,
+    check_layout_format,
+    get_grid_layout,
+    get_positions,
+    get_layout_strategy,
+    load_plain_layout,
+    split_plain_line,
+)
+from PropertyGrapher.grapher.snapshot import get_grapher_from_snapshot
+from PropertyGrapher.tests.snapshots import get_snapshot
+
+HIERARCHY = {
+    "L": {"file_path": "L.entity", "sub_scenes": ["A"]},
+    "A": {"file_path": "A.entity", "property_name": "A", "parent": "L"},
+}
+PLAIN_OUTPUT = (
+    b"graph 1 2 3\n"
+    b"node L.entity 1 2 1 0.5 L.entity solid box black lightgrey\n"
+    b"node A 1 1 1 0.5 A solid box black lightblue\n"
+    b"edge L.entity A 4 1 2 1 1.7 1 1.3 1 1 solid black\n"
+    b"stop\n"
+)
+
+
+class LayoutFallbackTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.grapher = get_grapher_from_snapshot(
+            get_snapshot(HIERARCHY, ["L"]), Path(tempfile.mkdtemp()), view=False
+        )
+        for _ in self.grapher.iter_graph(self.grapher.graph):
+            pass
+
+    def test_engine_failure(self) -> None:
+        failure = LayoutError("dot failed with code 1: Error: syntax error")
+        with mock.patch.object(DotGraph, "pipe", side_effect=[failure, PLAIN_OUTPUT]):
+            graph_data = self.grapher.layout()
+
+        self.assertEqual(graph_data["layout"]["failed"], [LAYOUT_STRATEGIES[0].name])
+        self.assertEqual(graph_data["layout"]["strategy"], LAYOUT_STRATEGIES[1].name)
+        self.assertEqual(
+            [node_data["name"] for node_data in graph_data["objects"]],
+            ["L.entity", "A"],
+        )
+        self.assertEqual(len(self.grapher.errors), 1)
+
+    def test_all_engines_failing(self) -> None:
+        failures = [LayoutError("failed")] * (len(LAYOUT_STRATEGIES) - 1)
+        failures.append(LayoutTimeout("timed out"))
+        with mock.patch.object(DotGraph, "pipe", side_effect=failures):
+            graph_data = self.grapher.layout()
+
+        self.assertEqual(graph_data["layout"]["strategy"], GRID_STRATEGY.name)
+        self.assertEqual(
+            graph_data["layout"]["failed"],
+            [strategy.name for strategy in LAYOUT_STRATEGIES[:-1]],
+        )
+        self.assertEqual(
+            graph_data["layout"]["timed_out"], [LAYOUT_STRATEGIES[-1].name]
+        )
+        self.assertEqual(len(graph_data["objects"]), 2)
+        self.assertEqual(len(graph_data["edges"]), 1)
+
+
+def run_pinned_neato(graph: DotGraph, *args, **kwargs) -> bytes:
+    """Plain output of neato -n2 on graph's pinned nodes.
+
+    Without notranslate, the drawing is translated to the origin, as neato does.
+    """
+    positions = {
+        name: [float(value) for value in attributes["pos"].rstrip("!").split(",")]
+        for name, attributes in graph.nodes.items()
+    }
+    offset_x = offset_y = 0.0
+    if graph.graph_attr.get("notranslate") != "true":
+        offset_x = min(x for x, _ in positions.values()) - 36.0
+        offset_y = min(y for _, y in positions.values()) - 18.0
+    lines = ["graph 1 10 10"]
+    for name, (x, y) in positions.items():
+        x, y = (x - offset_x) / 72.0, (y - offset_y) / 72.0
+        lines.append(f'node "{name}" {x} {y} 1 0.5 "{name}" solid box black grey')
+    lines.append("stop")
+    return "\n".join(lines).encode()
+
+
+class IncrementalLayoutTest(unittest.TestCase):
+    def test_pinned_positions(self) -> None:
+        grapher = get_grapher_from_snapshot(
+            get_snapshot(HIERARCHY, ["L"]), Path(tempfile.mkdtemp()), view=False
+        )
+        grapher.rebuild_graph()
+        previous_layout = load_plain_layout(PLAIN_OUTPUT, grapher.nodes)
+
+        with mock.patch.object(
+            DotGraph, "pipe", autospec=True, side_effect=run_pinned_neato
+        ):
+            graph_data = grapher.layout_incrementally(previous_layout, "L.entity")
+
+        self.assertEqual(get_positions(graph_data), get_positions(previous_layout))
+
+
+class PlainLayoutTest(unittest.TestCase):
+    def test_split_plain_line(self) -> None:
+        self.assertEqual(
+            list(split_plain_line('node "a b" 1.5 <x<br/><b>y</b>> "say \\"hi\\""')),
+            ["node", "a b", "1.5", "<x<br/><b>y</b>>", 'say "hi"'],
+        )
+        self.assertEqual(list(split_plain_line("")), [])
+
+    def test_load_plain_layout(self) -> None:
+        nodes = {
+            "L.entity": {"label": "L.entity", "tooltip": "rawdata/L.entity"},
+            "A": {"label": "<A<br/>---------<br/>A.entity>", "tooltip": "A.entity"},
+        }
+        graph_data = load_plain_layout(PLAIN_OUTPUT, nodes)
+
+        self.assertEqual(graph_data["bb"], [0.0, 0.0, 144.0, 216.0])
+        root, child = graph_data["objects"]
+        self.assertEqual(root["name"], "L.entity")
+        self.assertEqual(root["tooltip"], "rawdata/L.entity")
+        self.assertEqual(root["fillcolor"], "lightgrey")
+        self.assertEqual(root["pos"], [72.0, 144.0])
+        self.assertEqual(root["rect"], [36.0, 126.0, 72.0, 36.0])
+        self.assertEqual(child["label"], nodes["A"]["label"])
+        self.assertEqual(child["fillcolor"], "lightblue")
+
+        (edge,) = graph_data["edges"]
+        self.assertEqual((edge["tail"], edge["head"]), (0, 1))
+        self.assertEqual((edge["style"], edge["color"]), ("solid", "black"))
+        self.assertEqual(edge["points"][0], [72.0, 144.0])
+        self.assertEqual(len(edge["points"]), 4)
+
+    def test_layout_format(self) -> None:
+        graph_data = load_plain_layout(PLAIN_OUTPUT, {})
+        self.assertEqual(graph_data["version"], LAYOUT_FORMAT_VERSION)
+        check_layout_format(graph_data, "L.entity.json")
+
+        # Graphviz's json output, written before versioned records
+        graphviz_data = {"bb": "0,0,144,216", "objects": [{"name": "L.entity"}]}
+        with self.assertRaisesRegex(LayoutFormatError, "generate its graph again"):
+            check_layout_format(graphviz_data, "L.entity.json")
+        with self.assertRaisesRegex(LayoutFormatError, "version 3"):
+            check_layout_format({"version": 3}, "L.entity.json")
+
+
+class GridLayoutTest(unittest.TestCase):
+    def test_grid_layout(self) -> None:
+        nodes = {name: {"label": name} for name in "abcde"}
+        graph_data = get_grid_layout(nodes, {("a", "e"): {"color": "red"}})
+
+        self.assertEqual(
+            [node_data["name"] for node_data in graph_data["objects"]], list("abcde")
+        )
+        # Five nodes fit in three columns and two rows
+        positions = {tuple(node_data["pos"]) for node_data in graph_data["objects"]}
+        self.assertEqual(len(positions), 5)
+        self.assertEqual(len({y for _, y in positions}), 2)
+        (edge,) = graph_data["edges"]
+        self.assertEqual((edge["tail"], edge["head"], edge["color"]), (0, 4, "red"))
+
+
+class LayoutStrategyTest(unittest.TestCase):
+    def test_layout_strategy(self) -> None:
+        self.assertEqual(get_layout_strategy(10, 10), LAYOUT_STRATEGIES[0])
+        self.assertEqual(get_layout_strategy(10**6, 10**6), LAYOUT_STRATEGIES[-1])
+        thresholds = {LAYOUT_STRATEGIES[0].name: {"max_nodes": 5}}
+        self.assertEqual(get_layout_strategy(10, 10, thresholds), LAYOUT_STRATEGIES[1])
@@ -0,0 +1,21 @@
+import contextlib
+import io
+import unittest
+from unittest import mock
+
+from PropertyGrapher.__main__ import run_grapher
+
+
+class RunGrapherTest(unittest.TestCase):
+    def test_tiles_without_qt(self) -> None:
+        # Refused when the arguments are parsed, before EntityLib is imported
+        stderr = io.StringIO()
+        with mock.patch(
+            "PropertyGrapher.grapher.render.can_slice_tiles", return_value=False
+        ), contextlib.redirect_stderr(stderr), self.assertRaises(SystemExit):
+            run_grapher(["rawdata", "schema", "-ng", "-f", "a.entity", "-i", "tiles"])
+        self.assertIn("PySide2", stderr.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
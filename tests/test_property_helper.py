@@ -0,0 +1,39 @@
+import gc
+import unittest
+
+from PropertyGrapher.utils import property_helper
+from PropertyGrapher.utils.property_helper import (
+    get_container_table,
+    get_property_store,
+)
+
+
+class FakeEntityLib:
+    """Stands for EntityLib, the caches only need to reference it weakly."""
+
+    rawdata_path = "rawdata"
+
+
+class CachesTest(unittest.TestCase):
+    def test_container_table_released(self) -> None:
+        entity_lib = FakeEntityLib()
+        table = get_container_table(entity_lib)
+        self.assertIs(get_container_table(entity_lib), table)
+
+        del entity_lib
+        gc.collect()
+        self.assertEqual(len(property_helper._CONTAINER_TABLES), 0)
+
+    def test_property_store_released(self) -> None:
+        entity_lib = FakeEntityLib()
+        store = get_property_store(entity_lib)
+        self.assertIs(get_property_store(entity_lib), store)
+        self.assertIs(store.entity_lib, entity_lib)
+
+        del entity_lib
+        gc.collect()
+        self.assertEqual(len(property_helper._PROPERTY_STORES), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+
+from PropertyGrapher.ui.search_index import NodeSearchIndex
+
+NODES_DATA = [
+    {"name": "Level.entity", "label": "Level.entity", "tooltip": "levels/Level.entity"},
+    {
+        "name": "Tree",
+        "label": "<Tree<br/>---------<br/>OakTree.entity>",
+        "tooltip": "props/trees/OakTree.entity",
+    },
+    {"name": "Rock", "label": "<Rock<br/>---------<br/>Rock.entity>", "tooltip": ""},
+    {"name": "Streetlight", "label": "Streetlight", "tooltip": "props/Street.entity"},
+]
+
+
+class NodeSearchIndexTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.index = NodeSearchIndex(NODES_DATA)
+
+    def test_prefix(self) -> None:
+        self.assertEqual(len(self.index), 4)
+        # Labels' parts and paths' parts are terms
+        self.assertEqual(self.index.search("oak", prefix_only=True), [1])
+        self.assertEqual(self.index.search("props", prefix_only=True), [1, 3])
+        self.assertEqual(self.index.search("TRE", prefix_only=True), [1])
+        self.assertEqual(self.index.search("tree", prefix_only=True), [1])
+
+    def test_substring(self) -> None:
+        self.assertEqual(self.index.search_substring("tree"), [1, 3])
+        self.assertEqual(self.index.search_substring(".entity"), [0, 1, 2, 3])
+        self.assertEqual(self.index.search_substring("missing"), [])
+
+    def test_prefix_matches_first(self) -> None:
+        self.assertEqual(self.index.search("street"), [3])
+        self.assertEqual(self.index.search("tree"), [1, 3])
+        self.assertEqual(self.index.search("rock"), [2])
+        self.assertEqual(self.index.search("ock"), [2])
+        self.assertEqual(self.index.search(""), [])
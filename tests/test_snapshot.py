@@ -0,0 +1,69 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from PropertyGrapher.grapher.snapshot import (
+    create_snapshot,
+    get_grapher_from_snapshot,
+    read_snapshot,
+    write_snapshot,
+)
+from PropertyGrapher.tests.snapshots import get_snapshot
+from PropertyGrapher.tests.test_graph import CHAIN, OVERRIDDEN_PREFAB
+
+
+def get_edges(grapher) -> list:
+    return [
+        (item.source.name if item.source else None, item.prop.name, item.prop.file_path)
+        for item in grapher.walk()
+    ]
+
+
+class SnapshotTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.output_path = Path(tempfile.mkdtemp())
+
+    def test_round_trip(self) -> None:
+        for props in [CHAIN, OVERRIDDEN_PREFAB]:
+            grapher = get_grapher_from_snapshot(
+                get_snapshot(props, [next(iter(props))]), self.output_path
+            )
+            snapshot = create_snapshot(grapher)
+
+            snapshot_path = Path(self.output_path, "graph.snapshot.json.gz")
+            write_snapshot(snapshot, snapshot_path.as_posix())
+            restored = read_snapshot(snapshot_path.as_posix())
+            self.assertEqual(restored, snapshot)
+
+            restored_grapher = get_grapher_from_snapshot(restored, self.output_path)
+            self.assertEqual(get_edges(restored_grapher), get_edges(grapher))
+            self.assertEqual(create_snapshot(restored_grapher), snapshot)
+
+    def test_overrides(self) -> None:
+        grapher = get_grapher_from_snapshot(
+            get_snapshot(OVERRIDDEN_PREFAB, ["L"]), self.output_path
+        )
+        restored_grapher = get_grapher_from_snapshot(
+            create_snapshot(grapher), self.output_path
+        )
+        overridden = [
+            item.prop.file_path
+            for item in restored_grapher.walk()
+            if item.prop.overriden
+        ]
+        self.assertEqual(overridden, ["X.entity"])
+
+    def test_combined(self) -> None:
+        snapshot = get_snapshot(CHAIN, ["R", "T"], name="combined", combined=True)
+        grapher = get_grapher_from_snapshot(snapshot, self.output_path)
+        self.assertEqual(grapher.graph_name, "combined")
+        self.assertEqual(len(grapher.root_props), 2)
+
+        restored = create_snapshot(grapher)
+        self.assertTrue(restored["combined"])
+        self.assertEqual(len(restored["roots"]), 2)
+
+    def test_version(self) -> None:
+        snapshot = dict(get_snapshot(CHAIN, ["R"]), version=0)
+        with self.assertRaises(Exception):
+            get_grapher_from_snapshot(snapshot, self.output_path)
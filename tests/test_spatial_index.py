@@ -0,0 +1,35 @@
+import unittest
+
+from PropertyGrapher.ui.spatial_index import GridIndex
+
+
+class GridIndexTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.index = GridIndex(cell_size=100.0)
+        self.index.insert("a", 10, 10, 20, 20)
+        # Spans four cells
+        self.index.insert("b", 90, 90, 20, 20)
+        self.index.insert("c", 1000, 1000, 50, 50)
+        self.index.insert("d", -250, 30, 10, 10)
+
+    def test_query(self) -> None:
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(self.index.query(0, 0, 50, 50), {"a"})
+        self.assertEqual(self.index.query(0, 0, 100, 100), {"a", "b"})
+        self.assertEqual(self.index.query(105, 105, 10, 10), {"b"})
+        self.assertEqual(self.index.query(-300, 0, 100, 100), {"d"})
+
+    def test_empty_regions(self) -> None:
+        self.assertEqual(self.index.query(500, 500, 100, 100), set())
+        self.assertEqual(self.index.query(5000, 5000, 10, 10), set())
+        # Same cell, without intersecting
+        self.assertEqual(self.index.query(50, 50, 5, 5), set())
+        self.assertEqual(GridIndex().query(0, 0, 100, 100), set())
+
+    def test_large_region(self) -> None:
+        # Region overlapping more cells than are occupied
+        self.assertEqual(
+            self.index.query(-(10**6), -(10**6), 2 * 10**6, 2 * 10**6),
+            {"a", "b", "c", "d"},
+        )
+        self.assertEqual(self.index.query(-(10**6), 500, 2 * 10**6, 2 * 10**6), {"c"})
@@ -1,4 +1,5 @@
 from math import sqrt
+from typing import List
 
 from PySide2.QtCore import QPointF, Qt
 from PySide2.QtGui import QPolygonF, QPainterPath, QPen, QPainter
@@ -12,37 +13,50 @@ from PySide2.QtWidgets import (
 
 class Arrow(QGraphicsItem):
     def __init__(
-        self, arrow_data: dict, scene: QGraphicsScene, parent: QWidget = None
+        self,
+        arrow_data: dict,
+        scene: QGraphicsScene,
+        parent: QWidget = None,
+        points: List[QPointF] = None,
+        arrow_head: QPolygonF = None,
     ) -> None:
         super().__init__(parent=parent)
+        self.set_data(arrow_data, points=points, arrow_head=arrow_head)
+
+        scene.addItem(self)
+        self.setZValue(100)
+
+    def set_data(
+        self,
+        arrow_data: dict,
+        points: List[QPointF] = None,
+        arrow_head: QPolygonF = None,
+    ) -> None:
+        """Display arrow_data, arrows can be recycled to display another edge.
+
+        Points and arrow head can be given when already computed, see LayoutGeometry.
+        """
+        self.prepareGeometryChange()
         self.pen = self.get_pen(arrow_data)
         self.head_node_id = arrow_data.get("head")
         self.tail_node_id = arrow_data.get("tail")
-        self.points = self.get_points(arrow_data)
+        self.points = points or self.get_points(arrow_data)
 
         self.path = self.get_path()
-
-        scene.addItem(self)
-        self.setZValue(100)
+        if arrow_head is None:
+            arrow_head = self.arrow_head_calc(self.points[0], self.points[-1])
+        self.arrow_head = arrow_head
 
     @staticmethod
     def get_points(arrow_data: dict):
-
-        for item in arrow_data["_draw_"]:
-            points = item.get("points")
-            if points:
-                return [QPointF(*point) for point in points]
-
-        raise Exception("Arrow should always have points")
+        points = arrow_data.get("points")
+        if not points:
+            raise Exception("Arrow should always have points")
+        return [QPointF(*point) for point in points]
 
     @staticmethod
     def get_pen(arrow_data: dict):
-        color = None
-        for item in arrow_data["_draw_"]:
-            color = item.get("color")
-            if color:
-                break
-
+        color = arrow_data.get("color")
         if not color:
             raise Exception("Arrow should always have a color")
 
@@ -97,13 +111,7 @@ class Arrow(QGraphicsItem):
         painter.setPen(self.pen)
         painter.strokePath(self.path, painter.pen())
 
-        triangle_source = self.arrow_head_calc(
-            self.path.pointAtPercent(0),
-            self.points[-1],
-        )
-
-        if triangle_source is not None:
-            painter.drawPolyline(triangle_source)
+        painter.drawPolyline(self.arrow_head)
 
         painter.setRenderHint(painter.Antialiasing)
         painter.setRenderHint(painter.SmoothPixmapTransform)
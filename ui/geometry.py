@@ -0,0 +1,96 @@
+from typing import List
+
+import numpy as np
+from PySide2.QtCore import QPointF, QRectF
+from PySide2.QtGui import QPolygonF
+
+
+class LayoutGeometry:
+    """Geometry of a layout's nodes and edges, extracted once in arrays.
+
+    Rects, bounds and arrow heads are computed for all items at once.
+    Edges' points are stored in a single buffer, edge i's points being
+    edge_points[edge_offsets[i]:edge_offsets[i + 1]]. Edges without points
+    have empty rects and arrow heads, and are not drawn.
+    """
+
+    _arrow_height = _arrow_width = 5
+
+    def __init__(self, graph_data: dict) -> None:
+        nodes_data = graph_data.get("objects", [])
+        edges_data = graph_data.get("edges", [])
+
+        # Rects are x, y, width, height
+        self.node_rects = np.array(
+            [node_data["rect"] for node_data in nodes_data], dtype=float
+        ).reshape(-1, 4)
+
+        points_counts = np.fromiter(
+            (len(edge_data["points"]) for edge_data in edges_data),
+            dtype=np.int64,
+            count=len(edges_data),
+        )
+        self.edge_offsets = np.zeros(len(edges_data) + 1, dtype=np.int64)
+        np.cumsum(points_counts, out=self.edge_offsets[1:])
+        self.edge_has_points = points_counts > 0
+        self.edge_points = np.array(
+            [point for edge_data in edges_data for point in edge_data["points"]],
+            dtype=float,
+        ).reshape(-1, 2)
+
+        self.edge_rects = self.get_edge_rects()
+        self.arrow_heads = self.get_arrow_heads()
+
+    def get_edge_rects(self) -> np.ndarray:
+        rects = np.zeros((len(self.edge_has_points), 4))
+        if not len(self.edge_points):
+            return rects
+
+        # Control points' rect contains the curve. reduceat would give edges
+        # without points their next edge's first point, they are skipped
+        starts = self.edge_offsets[:-1][self.edge_has_points]
+        minimums = np.minimum.reduceat(self.edge_points, starts)
+        maximums = np.maximum.reduceat(self.edge_points, starts)
+        rects[self.edge_has_points] = np.hstack([minimums, maximums - minimums])
+        return rects
+
+    def get_arrow_heads(self) -> np.ndarray:
+        """Get arrow heads' left, end and right points, for all edges."""
+        heads = np.zeros((len(self.edge_has_points), 3, 2))
+        if not len(self.edge_points):
+            return heads
+
+        start_points = self.edge_points[self.edge_offsets[:-1][self.edge_has_points]]
+        end_points = self.edge_points[self.edge_offsets[1:][self.edge_has_points] - 1]
+
+        directions = start_points - end_points
+        lengths = np.linalg.norm(directions, axis=1, keepdims=True)
+        directions /= np.where(lengths == 0, 1, lengths)
+        perpendiculars = np.stack([-directions[:, 1], directions[:, 0]], axis=1)
+
+        base_points = end_points + self._arrow_height * directions
+        heads[self.edge_has_points] = np.stack(
+            [
+                base_points + self._arrow_width * perpendiculars,
+                end_points,
+                base_points - self._arrow_width * perpendiculars,
+            ],
+            axis=1,
+        )
+        return heads
+
+    def get_bounding_rect(self) -> QRectF:
+        rects = np.vstack([self.node_rects, self.edge_rects[self.edge_has_points]])
+        if not len(rects):
+            return QRectF()
+
+        x_min, y_min = rects[:, :2].min(axis=0)
+        x_max, y_max = (rects[:, :2] + rects[:, 2:]).max(axis=0)
+        return QRectF(x_min, y_min, x_max - x_min, y_max - y_min)
+
+    def get_edge_points(self, index: int) -> List[QPointF]:
+        start, end = self.edge_offsets[index], self.edge_offsets[index + 1]
+        return [QPointF(x, y) for x, y in self.edge_points[start:end].tolist()]
+
+    def get_arrow_head(self, index: int) -> QPolygonF:
+        return QPolygonF([QPointF(x, y) for x, y in self.arrow_heads[index].tolist()])
@@ -1,10 +1,18 @@
 import json
 import os
 from pathlib import Path
+from typing import Dict, Iterator, List, Set, Tuple
 
 from EntityLibPy import EntityLib
-from PySide2.QtCore import QPoint, QPointF
-from PySide2.QtGui import QMouseEvent, Qt, QWheelEvent
+from PySide2.QtCore import QPoint, QPointF, QRectF, QTimer
+from PySide2.QtGui import (
+    QColor,
+    QMouseEvent,
+    QPainter,
+    QResizeEvent,
+    Qt,
+    QWheelEvent,
+)
 from PySide2.QtWidgets import (
     QGraphicsView,
     QAction,
@@ -15,8 +23,14 @@ from PySide2.QtWidgets import (
 )
 
 
+from PropertyGrapher.grapher.layout import check_layout_format
 from PropertyGrapher.ui.node import Node
 from PropertyGrapher.ui.arrow import Arrow
+from PropertyGrapher.ui.geometry import LayoutGeometry
+from PropertyGrapher.ui.minimap import Minimap
+from PropertyGrapher.ui.prefetch import Prefetcher
+from PropertyGrapher.ui.search_index import NodeSearchIndex
+from PropertyGrapher.ui.spatial_index import GridIndex
 
 
 class MouseEffectsData:
@@ -27,12 +41,115 @@ class MouseEffectsData:
     zoom_factor = 1
 
 
+class FilterMode:
+
+    Highlight: str = "Highlight matches"
+    Dim: str = "Dim others"
+    Hide: str = "Hide others"
+
+
+class VirtualizedItems:
+    """Layout data of a virtualized scene, and its displayed items.
+
+    Graphics items only exist for the layout data intersecting the
+    visible region, items leaving it are hidden and recycled.
+    When they would be too small to read, or too many to create, none
+    are shown and nodes are drawn as placeholders instead.
+    """
+
+    def __init__(self, graph_data: dict, geometry: LayoutGeometry) -> None:
+        self.nodes_data: List[dict] = graph_data.get("objects", [])
+        self.arrows_data: List[dict] = graph_data.get("edges", [])
+        self.geometry = geometry
+
+        self.nodes_index = GridIndex()
+        for i, rect in enumerate(geometry.node_rects.tolist()):
+            self.nodes_index.insert(i, *rect)
+
+        self.arrows_index = GridIndex()
+        for i, (rect, has_points) in enumerate(
+            zip(geometry.edge_rects.tolist(), geometry.edge_has_points.tolist())
+        ):
+            if has_points:
+                self.arrows_index.insert(i, *rect)
+
+        self.visible_nodes: Dict[int, Node] = {}
+        self.visible_arrows: Dict[int, Arrow] = {}
+        self.nodes_pool: List[Node] = []
+        self.arrows_pool: List[Arrow] = []
+
+        self.show_placeholders = False
+        self._colors: Dict[str, QColor] = {}
+
+    def query(self, region: QRectF) -> Tuple[Set[int], Set[int]]:
+        """Get the nodes and the arrows intersecting region."""
+        rect = (region.x(), region.y(), region.width(), region.height())
+        return self.nodes_index.query(*rect), self.arrows_index.query(*rect)
+
+    def draw_placeholders(self, painter: QPainter, region: QRectF) -> None:
+        painter.setPen(Qt.NoPen)
+        rects = self.geometry.node_rects
+        for i in self.nodes_index.query(
+            region.x(), region.y(), region.width(), region.height()
+        ):
+            color = self.nodes_data[i].get("fillcolor") or "#ffffff"
+            if color not in self._colors:
+                self._colors[color] = QColor(color)
+            painter.fillRect(QRectF(*rects[i].tolist()), self._colors[color])
+
+    def update_nodes(self, visible: Set[int], scene: QGraphicsScene) -> None:
+        for i in set(self.visible_nodes) - visible:
+            node = self.visible_nodes.pop(i)
+            node.proxy.hide()
+            self.nodes_pool.append(node)
+
+        for i in visible - set(self.visible_nodes):
+            rect = self.geometry.node_rects[i].tolist()
+            if self.nodes_pool:
+                node = self.nodes_pool.pop()
+                node.set_data(self.nodes_data[i], rect=rect)
+                node.proxy.show()
+            else:
+                node = Node(self.nodes_data[i], scene, rect=rect)
+            self.visible_nodes[i] = node
+
+    def update_arrows(self, visible: Set[int], scene: QGraphicsScene) -> None:
+        for i in set(self.visible_arrows) - visible:
+            arrow = self.visible_arrows.pop(i)
+            arrow.hide()
+            self.arrows_pool.append(arrow)
+
+        for i in visible - set(self.visible_arrows):
+            points = self.geometry.get_edge_points(i)
+            arrow_head = self.geometry.get_arrow_head(i)
+            if self.arrows_pool:
+                arrow = self.arrows_pool.pop()
+                arrow.set_data(
+                    self.arrows_data[i], points=points, arrow_head=arrow_head
+                )
+                arrow.show()
+            else:
+                arrow = Arrow(
+                    self.arrows_data[i], scene, points=points, arrow_head=arrow_head
+                )
+            self.visible_arrows[i] = arrow
+
+
 class GraphicsView(QGraphicsView):
 
     _zoom_in_factor = 1.25
     _zoom_out_factor = 1 / _zoom_in_factor
     _scene_margin = 250
 
+    # Graphs with more items than this are virtualized,
+    # only visible items, plus a margin ratio of the view, are created
+    _virtualize_above = 2000
+    _visible_margin = 0.5
+    # Virtualized graphs only draw placeholders below this scale,
+    # or when more items than this would be shown
+    _detail_scale = 0.2
+    _max_visible_items = 2000
+
     def __init__(
         self, entity_lib: EntityLib, scene: QGraphicsScene, parent: QWidget = None
     ) -> None:
@@ -44,45 +161,198 @@ class GraphicsView(QGraphicsView):
 
         self.setViewportMargins(10, 10, 10, 10)
         self.setContextMenuPolicy(Qt.CustomContextMenu)
+        # Hovered nodes are tracked without any button pressed
+        self.setMouseTracking(True)
         self.customContextMenuRequested.connect(self.context_menu)
 
         # Anchors needs to be set to NoAnchor to enable translate and zoom
         self.setTransformationAnchor(QGraphicsView.NoAnchor)
         self.setResizeAnchor(QGraphicsView.NoAnchor)
 
+        self.geometry = LayoutGeometry({})
+        self.virtualized_items = None
+        self.nodes: Dict[int, Node] = {}
+        self.arrows: List[Arrow] = []
+
+        # Search in the loaded graph's nodes, kept between reloads
+        self.nodes_data: List[dict] = []
+        self.search_index = NodeSearchIndex([])
+        self.search_query = ""
+        self.search_prefix_only = False
+        self.filter_mode = FilterMode.Highlight
+        self.matches: List[int] = []
+        self._matches_set: Set[int] = set()
+        self._matches_ids: Set[int] = set()
+        self.current_match = -1
+
+        self._visible_items_timer = QTimer(self)
+        self._visible_items_timer.setSingleShot(True)
+        self._visible_items_timer.timeout.connect(self.update_visible_items)
+
+        self.minimap = Minimap(self)
+
     @property
     def rawdata_path(self) -> str:
         return str(self.entity_lib.rawdata_path)
 
     def open_in_property_editor(self, file_path: str) -> None:
         from PropertyEditor.__main__ import main as editor_main
-        
+
         editor_main(self.entity_lib, file_to_open=file_path)
 
-    def open_dependencies_graph(self, file_path: Path) -> None:
+    @property
+    def prefetcher(self) -> Prefetcher:
+        return self.parent().main_window.prefetcher
+
+    def open_dependencies_graph(self, file_path: str) -> None:
+        # Same path as the prefetcher's, to get its graph
         self.parent().main_window.create_graph(
-            Path(
-                self.rawdata_path,
-                file_path,
-            )
+            self.prefetcher.get_graph_path(file_path)
         )
 
+    def toggle_node_expanded(self, name: str) -> None:
+        self.parent().toggle_node_expanded(name)
+
     def reset_scene(self):
         # As QGraphicsScene.clear() method leads to a crash
         # just create a new scene instead
         self.scene = QGraphicsScene()
         self.mouse_effects_data = MouseEffectsData()
+        self.virtualized_items = None
+        self.nodes = {}
+        self.arrows = []
         self.setScene(self.scene)
 
     def load_file(self, file_path: Path) -> None:
         with open(file_path.as_posix()) as json_file:
-            self.load_graph(json.load(json_file))
+            graph_data = json.load(json_file)
+        check_layout_format(graph_data, file_path.as_posix())
+        self.load_graph(graph_data)
 
     def load_graph(self, graph_data: dict) -> None:
         self.reset_scene()
-        self.create_graphics_items(graph_data)
+        self.nodes_data = graph_data.get("objects", [])
+        self.search_index = NodeSearchIndex(self.nodes_data)
+
+        # Scene is sized from the layout, not from its items which
+        # may not all exist, see load_virtualized_graph
+        self.geometry = LayoutGeometry(graph_data)
+        self.scene.setSceneRect(self.geometry.get_bounding_rect())
         self.resize_scene()
 
+        items_count = len(self.nodes_data) + len(graph_data.get("edges", []))
+        if items_count > self._virtualize_above:
+            self.load_virtualized_graph(graph_data)
+        else:
+            self.create_graphics_items(graph_data)
+
+        self.minimap.set_graph(graph_data)
+        self.search(self.search_query, self.search_prefix_only, self.filter_mode)
+
+    def load_virtualized_graph(self, graph_data: dict) -> None:
+        self.virtualized_items = VirtualizedItems(graph_data, self.geometry)
+        self.update_visible_items()
+
+    def get_visible_region(self) -> QRectF:
+        region = self.mapToScene(self.viewport().rect()).boundingRect()
+        margin_x = region.width() * self._visible_margin
+        margin_y = region.height() * self._visible_margin
+        return region.adjusted(-margin_x, -margin_y, margin_x, margin_y)
+
+    def schedule_visible_items_update(self) -> None:
+        """Update visible items once current events are processed."""
+        self.minimap.update()
+        if self.virtualized_items:
+            self._visible_items_timer.start(0)
+
+    def update_visible_items(self) -> None:
+        if not self.virtualized_items:
+            return
+
+        nodes, arrows = set(), set()
+        show_placeholders = self.transform().m11() < self._detail_scale
+        if not show_placeholders:
+            nodes, arrows = self.virtualized_items.query(self.get_visible_region())
+            if len(nodes) + len(arrows) > self._max_visible_items:
+                nodes, arrows = set(), set()
+                show_placeholders = True
+
+        self.virtualized_items.update_nodes(nodes, self.scene)
+        self.virtualized_items.update_arrows(arrows, self.scene)
+        if show_placeholders != self.virtualized_items.show_placeholders:
+            self.virtualized_items.show_placeholders = show_placeholders
+            self.viewport().update()
+        self.apply_search_style()
+
+    def drawForeground(self, painter: QPainter, rect: QRectF) -> None:
+        super().drawForeground(painter, rect)
+        if self.virtualized_items and self.virtualized_items.show_placeholders:
+            self.virtualized_items.draw_placeholders(painter, rect)
+
+    def iter_nodes(self) -> Iterator[Tuple[int, Node]]:
+        if self.virtualized_items:
+            yield from self.virtualized_items.visible_nodes.items()
+        else:
+            yield from self.nodes.items()
+
+    def iter_arrows(self) -> Iterator[Arrow]:
+        if self.virtualized_items:
+            yield from self.virtualized_items.visible_arrows.values()
+        else:
+            yield from self.arrows
+
+    def search(self, query: str, prefix_only: bool, filter_mode: str) -> List[int]:
+        """Highlight the nodes matching query, and filter the others."""
+        self.search_query = query
+        self.search_prefix_only = prefix_only
+        self.filter_mode = filter_mode
+
+        self.matches = self.search_index.search(query, prefix_only=prefix_only)
+        self._matches_set = set(self.matches)
+        # Arrows reference nodes by id
+        self._matches_ids = {self.nodes_data[i]["_gvid"] for i in self.matches}
+        self.current_match = -1
+        self.apply_search_style()
+        return self.matches
+
+    def apply_search_style(self) -> None:
+        """Style existing items from the current search, the scene is kept as is."""
+        searching = bool(self.search_query)
+        dim = searching and self.filter_mode == FilterMode.Dim
+        hide = searching and self.filter_mode == FilterMode.Hide
+
+        for i, node in self.iter_nodes():
+            match = i in self._matches_set
+            node.set_highlighted(match)
+            node.proxy.setOpacity(0.15 if dim and not match else 1.0)
+            node.proxy.setVisible(match or not hide)
+
+        for arrow in self.iter_arrows():
+            match = (
+                arrow.tail_node_id in self._matches_ids
+                or arrow.head_node_id in self._matches_ids
+            )
+            arrow.setOpacity(0.15 if dim and not match else 1.0)
+            arrow.setVisible(match or not hide)
+
+    def center_on_match(self, step: int = 1) -> int:
+        """Center the view on the next match, return its index in matches."""
+        if not self.matches:
+            return -1
+
+        self.current_match = (self.current_match + step) % len(self.matches)
+        node_data = self.nodes_data[self.matches[self.current_match]]
+        x, y, width, height = Node.get_pos_and_size(node_data)
+        self.center_on(QPointF(x + width / 2, y + height / 2))
+        return self.current_match
+
+    def center_on(self, scene_position: QPointF) -> None:
+        # View is moved by translating its transformation, see NoAnchor
+        center = self.mapToScene(self.viewport().rect().center())
+        delta = center - scene_position
+        self.translate(delta.x(), delta.y())
+        self.schedule_visible_items_update()
+
     def resize_scene(self) -> None:
         scene_rect = self.scene.sceneRect()
         self.scene.setSceneRect(
@@ -97,12 +367,22 @@ class GraphicsView(QGraphicsView):
         self.create_arrows(graph_data)
 
     def create_arrows(self, graph_data: dict) -> None:
-        for arrow in graph_data.get("edges", []):
-            Arrow(arrow, self.scene)
+        for i, arrow in enumerate(graph_data.get("edges", [])):
+            if not self.geometry.edge_has_points[i]:
+                continue
+            self.arrows.append(
+                Arrow(
+                    arrow,
+                    self.scene,
+                    points=self.geometry.get_edge_points(i),
+                    arrow_head=self.geometry.get_arrow_head(i),
+                )
+            )
 
     def create_nodes(self, graph_data: dict) -> None:
-        for node in graph_data.get("objects", []):
-            Node(node, self.scene)
+        rects = self.geometry.node_rects.tolist()
+        for i, node in enumerate(graph_data.get("objects", [])):
+            self.nodes[i] = Node(node, self.scene, rect=rects[i])
 
     def context_menu(self, point: QPoint) -> None:
         menu = QMenu(self)
@@ -112,15 +392,25 @@ class GraphicsView(QGraphicsView):
 
             open_dependencies_graph = QAction("Open in PropertyGrapher", self)
             open_dependencies_graph.triggered.connect(
-                lambda: self.open_dependencies_graph(
-                    Path(
-                        self.rawdata_path,
-                        proxy.widget().file_path,
-                    )
-                )
+                lambda: self.open_dependencies_graph(proxy.widget().file_path)
             )
             menu.addAction(open_dependencies_graph)
 
+            # Leaves have nothing to expand or collapse
+            node_name = proxy.widget().name
+            if self.parent().is_node_expandable(node_name):
+                toggle_label = "Expand"
+            elif self.parent().is_node_collapsible(node_name):
+                toggle_label = "Collapse"
+            else:
+                toggle_label = None
+            if toggle_label:
+                toggle_expanded = QAction(toggle_label, self)
+                toggle_expanded.triggered.connect(
+                    lambda: self.toggle_node_expanded(node_name)
+                )
+                menu.addAction(toggle_expanded)
+
             # Property editor is another tool,
             # optional for the use of the Property grapher
             # Load the module from here to avoid circular imports
@@ -159,6 +449,7 @@ class GraphicsView(QGraphicsView):
         self.mouse_effects_data.zoom_factor = (
             self.mouse_effects_data.zoom_factor * _zoom_factor
         )
+        self.schedule_visible_items_update()
 
     def move_after_zoom(
         self, event: QWheelEvent, mouse_scene_position: QPointF
@@ -168,6 +459,7 @@ class GraphicsView(QGraphicsView):
 
         delta = self.mapToScene(event.pos()) - self.mouse_effects_data.wheel_position
         self.translate(delta.x(), delta.y())
+        self.schedule_visible_items_update()
 
     def wheelEvent(self, event: QWheelEvent) -> None:
         mouse_scene_position = self.mapToScene(event.pos())
@@ -185,9 +477,37 @@ class GraphicsView(QGraphicsView):
             self.mouse_effects_data.previous_position = event.pos()
 
             self.translate(delta.x(), delta.y())
+            self.schedule_visible_items_update()
+        else:
+            self.set_hovered_node(event.pos())
 
         self.mouse_effects_data.wheel_position = None
 
+    def set_hovered_node(self, point: QPoint) -> None:
+        """Let the prefetcher build the hovered node's graph."""
+        proxy = self.scene.itemAt(self.mapToScene(point), self.viewportTransform())
+        if isinstance(proxy, QGraphicsProxyWidget):
+            self.prefetcher.set_hovered_file(proxy.widget().file_path)
+        else:
+            self.prefetcher.set_hovered_file(None)
+
+    def scrollContentsBy(self, dx: int, dy: int) -> None:
+        # Scrollbars and keyboard also move the view
+        super().scrollContentsBy(dx, dy)
+        self.schedule_visible_items_update()
+
+    def resizeEvent(self, event: QResizeEvent) -> None:
+        super().resizeEvent(event)
+        self.place_minimap()
+        self.schedule_visible_items_update()
+
+    def place_minimap(self) -> None:
+        margin = 20
+        self.minimap.move(
+            self.width() - self.minimap.width() - margin,
+            self.height() - self.minimap.height() - margin,
+        )
+
     def mouseReleaseEvent(self, event: QMouseEvent) -> None:
         if self.mouse_effects_data.is_moving:
             self.mouse_effects_data.is_moving = False
@@ -0,0 +1,340 @@
+import threading
+from itertools import count
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from EntityLibPy import EntityLib
+from PySide2.QtCore import QObject, Signal
+
+from PropertyGrapher.grapher.graph import PropertyGrapher, get_grapher
+from PropertyGrapher.utils.property_helper import get_config, get_property_store
+
+JobKey = Tuple[Tuple[str, ...], Optional[int], FrozenSet[str], FrozenSet[str]]
+
+
+def get_initial_depth() -> Optional[int]:
+    """Depth of newly opened graphs, see `initial_depth` in `config.json`."""
+    return get_config().get("viewer", {}).get("initial_depth")
+
+
+class GraphJob(QObject):
+    """Build of a graph, shared by the tabs that requested it.
+
+    Signals are emitted from a worker thread, and received by
+    the tabs in the GUI thread. finished gives the job, subscribers
+    caught up by GraphJobScheduler.request get it first with set_job.
+    """
+
+    layout_ready = Signal(object)
+    finished = Signal(object)
+    failed = Signal(str)
+
+    def __init__(
+        self,
+        key: JobKey,
+        file_paths: List[Path],
+        max_depth: Optional[int],
+        collapsed_nodes: FrozenSet[str],
+        expanded_nodes: FrozenSet[str],
+    ) -> None:
+        super().__init__()
+        self.key = key
+        self.file_paths = file_paths
+        self.max_depth = max_depth
+        self.collapsed_nodes = collapsed_nodes
+        self.expanded_nodes = expanded_nodes
+        self.sequence = 0
+        # Only requested by the prefetcher, see GraphJobScheduler.request
+        self.prefetch = False
+        # Files modified since they were loaded are loaded again
+        self.reload = False
+
+        self.subscribers: List[QObject] = []
+        self.grapher: Optional[PropertyGrapher] = None
+        # Last layout, given right away to tabs subscribing to a started job
+        self.graph_data: Optional[dict] = None
+        self.error: Optional[str] = None
+        self.done = False
+        self.cancelled = False
+
+
+class IncrementalLayoutJob(GraphJob):
+    """Expansion or collapse of a node in a tab's own grapher.
+
+    The grapher's graph is built again, then laid out keeping the positions
+    of previous_layout, see PropertyGrapher.layout_incrementally.
+    These jobs are neither shared nor cached.
+    """
+
+    def __init__(
+        self, grapher: PropertyGrapher, anchor: str, previous_layout: dict
+    ) -> None:
+        super().__init__(
+            (),
+            [],
+            grapher.max_depth,
+            frozenset(grapher.collapsed_nodes),
+            frozenset(grapher.expanded_nodes),
+        )
+        self.grapher = grapher
+        self.anchor = anchor
+        self.previous_layout = previous_layout
+
+
+class GraphJobScheduler:
+    """Build graphs with a bounded number of workers.
+
+    Requests for a graph already being built, or built and still displayed,
+    are merged in its job. Incremental layouts, waited for by a user's click,
+    are started first, then pending jobs of the visible tab, and jobs no tab
+    waits for anymore are cancelled.
+    Prefetch jobs are only started when no other job is pending, the most
+    recent first, and always leave a worker to the tabs' jobs.
+    EntityLib is only accessed by one thread at a time, see entity_lib_lock,
+    layouts run concurrently.
+    Properties are resolved once for all jobs, in EntityLib's property store,
+    so overlapping graphs only load the files they don't share.
+    """
+
+    def __init__(self, output_path: Path, workers: int = 2) -> None:
+        self.entity_lib: Optional[EntityLib] = None
+        self.output_path = output_path
+        self.entity_lib_lock = threading.RLock()
+
+        self._jobs: Dict[JobKey, GraphJob] = {}
+        self._pending: List[GraphJob] = []
+        self._visible_job: Optional[GraphJob] = None
+        self._sequence = count()
+        self._condition = threading.Condition()
+        self._running_prefetches = 0
+        self._max_prefetches = workers - 1
+
+        self._workers = [
+            threading.Thread(target=self.run_jobs, name=f"graph_job_{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    @property
+    def can_prefetch(self) -> bool:
+        """Prefetch jobs can be started, leaving a worker to the tabs' jobs."""
+        return self._max_prefetches > 0
+
+    @staticmethod
+    def get_job_key(
+        file_paths: List[Path],
+        max_depth: Optional[int],
+        collapsed_nodes: FrozenSet[str],
+        expanded_nodes: FrozenSet[str],
+    ) -> JobKey:
+        return (
+            tuple(file_path.as_posix() for file_path in file_paths),
+            max_depth,
+            collapsed_nodes,
+            expanded_nodes,
+        )
+
+    def request(
+        self,
+        subscriber: QObject,
+        file_paths: List[Path],
+        max_depth: Optional[int] = None,
+        collapsed_nodes: FrozenSet[str] = frozenset(),
+        expanded_nodes: FrozenSet[str] = frozenset(),
+        reload: bool = False,
+        prefetch: bool = False,
+    ) -> GraphJob:
+        """Subscribe to the job building this graph, started if needed.
+
+        subscriber's `set_layout`, `set_job_finished` and `set_job_failed`
+        are connected to the job. Its `set_job` is then called with the job,
+        so it can release it from any of them, and they are called right
+        away with what the job already built, before it is returned.
+        With reload, a new job is started anyway, loading again the files
+        modified since they were loaded.
+        With prefetch, a new job has a low priority, until another
+        subscriber requests it.
+        """
+        key = self.get_job_key(file_paths, max_depth, collapsed_nodes, expanded_nodes)
+        with self._condition:
+            job = self._jobs.get(key)
+            if job is None or job.cancelled or job.error or reload:
+                job = GraphJob(key, file_paths, max_depth, collapsed_nodes, expanded_nodes)
+                job.sequence = next(self._sequence)
+                job.prefetch = prefetch
+                job.reload = reload
+                self._jobs[key] = job
+                self._pending.append(job)
+            elif not prefetch:
+                job.prefetch = False
+            job.subscribers.append(subscriber)
+            self._condition.notify_all()
+
+            # Workers update jobs and emit their signals under the same lock,
+            # so each result is either caught up here or received once connected
+            job.layout_ready.connect(subscriber.set_layout)
+            job.finished.connect(subscriber.set_job_finished)
+            job.failed.connect(subscriber.set_job_failed)
+            graph_data, done, error = job.graph_data, job.done, job.error
+
+        subscriber.set_job(job)
+        if graph_data is not None:
+            subscriber.set_layout(graph_data)
+        if done:
+            subscriber.set_job_finished(job)
+        elif error:
+            subscriber.set_job_failed(error)
+        return job
+
+    def request_incremental_layout(
+        self,
+        subscriber: QObject,
+        grapher: PropertyGrapher,
+        anchor: str,
+        previous_layout: dict,
+    ) -> IncrementalLayoutJob:
+        """Build grapher's graph again and lay it out around anchor.
+
+        subscriber's `set_incremental_layout` and `set_incremental_layout_failed`
+        are connected to the job. grapher is used by a worker until either
+        is called, or until the job is cancelled and its layout ends.
+        """
+        job = IncrementalLayoutJob(grapher, anchor, previous_layout)
+        job.layout_ready.connect(subscriber.set_incremental_layout)
+        job.failed.connect(subscriber.set_incremental_layout_failed)
+        with self._condition:
+            job.sequence = next(self._sequence)
+            job.subscribers.append(subscriber)
+            self._pending.append(job)
+            self._condition.notify_all()
+        return job
+
+    def cancel_incremental_layout(self, job: IncrementalLayoutJob) -> None:
+        with self._condition:
+            job.cancelled = True
+            if job in self._pending:
+                self._pending.remove(job)
+
+    def unsubscribe(self, job: GraphJob, subscriber: QObject) -> None:
+        """Stop sending job's results to subscriber, cancel it if it was the last one."""
+        job.layout_ready.disconnect(subscriber.set_layout)
+        job.finished.disconnect(subscriber.set_job_finished)
+        job.failed.disconnect(subscriber.set_job_failed)
+
+        with self._condition:
+            if subscriber in job.subscribers:
+                job.subscribers.remove(subscriber)
+            if job.subscribers:
+                return
+
+            job.cancelled = True
+            if job in self._pending:
+                self._pending.remove(job)
+            if self._jobs.get(job.key) is job:
+                del self._jobs[job.key]
+            if self._visible_job is job:
+                self._visible_job = None
+
+    def set_visible_job(self, job: Optional[GraphJob]) -> None:
+        with self._condition:
+            self._visible_job = job
+
+    def pop_next_job(self) -> Optional[GraphJob]:
+        """Pop the job to start, None if only prefetches can't start yet."""
+        incremental = [
+            job for job in self._pending if isinstance(job, IncrementalLayoutJob)
+        ]
+        if incremental:
+            job = incremental[0]
+        elif self._visible_job in self._pending:
+            job = self._visible_job
+        else:
+            requested = [job for job in self._pending if not job.prefetch]
+            if requested:
+                job = min(requested, key=lambda pending_job: pending_job.sequence)
+            elif self._pending and self._running_prefetches < self._max_prefetches:
+                # Most recent prefetch is the most likely to be opened next
+                job = max(self._pending, key=lambda pending_job: pending_job.sequence)
+            else:
+                return None
+        self._pending.remove(job)
+        return job
+
+    def run_jobs(self) -> None:
+        while True:
+            with self._condition:
+                job = self.pop_next_job()
+                while job is None:
+                    self._condition.wait()
+                    job = self.pop_next_job()
+                prefetch = job.prefetch
+                self._running_prefetches += prefetch
+
+            try:
+                if isinstance(job, IncrementalLayoutJob):
+                    self.run_incremental_layout(job)
+                else:
+                    self.run_job(job)
+            finally:
+                with self._condition:
+                    self._running_prefetches -= prefetch
+                    self._condition.notify_all()
+
+    def run_job(self, job: GraphJob) -> None:
+        try:
+            with self.entity_lib_lock:
+                if job.reload:
+                    store = get_property_store(self.entity_lib)
+                    file_keys = store.invalidate_outdated()
+                    if file_keys:
+                        print(
+                            f"{len(file_keys)} modified files, "
+                            "or inheriting from one, invalidated"
+                        )
+                grapher = get_grapher(
+                    self.entity_lib, job.file_paths, self.output_path, view=False
+                )
+            grapher.max_depth = job.max_depth
+            grapher.collapsed_nodes = set(job.collapsed_nodes)
+            grapher.expanded_nodes = set(job.expanded_nodes)
+            job.grapher = grapher
+
+            layouts = grapher.generate_graph_progressively(lock=self.entity_lib_lock)
+            for graph_data in layouts:
+                if job.cancelled:
+                    # Closing the generator stops loading properties
+                    layouts.close()
+                    return
+                with self._condition:
+                    job.graph_data = graph_data
+                    job.layout_ready.emit(graph_data)
+        except Exception as exception:
+            with self._condition:
+                job.error = f"{type(exception).__name__}: {exception}"
+                job.failed.emit(job.error)
+            return
+
+        with self._condition:
+            job.done = True
+            job.finished.emit(job)
+
+    def run_incremental_layout(self, job: IncrementalLayoutJob) -> None:
+        try:
+            with self.entity_lib_lock:
+                job.grapher.rebuild_graph()
+            graph_data = job.grapher.layout_incrementally(
+                job.previous_layout, job.anchor
+            )
+        except Exception as exception:
+            with self._condition:
+                job.error = f"{type(exception).__name__}: {exception}"
+                if not job.cancelled:
+                    job.failed.emit(job.error)
+            return
+
+        with self._condition:
+            job.graph_data = graph_data
+            job.done = True
+            if not job.cancelled:
+                job.layout_ready.emit(graph_data)
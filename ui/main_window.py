@@ -13,13 +13,17 @@ from PySide2.QtWidgets import (
     QPushButton,
     QWidget,
     QFileDialog,
+    QMessageBox,
 )
 
-from PySide2.QtCore import QCoreApplication, Qt, QDir, QSize
+from PySide2.QtCore import QCoreApplication, Qt, QDir, QSize, QThread, Signal
 import sys
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
+from PropertyGrapher.ui.jobs import GraphJobScheduler
+from PropertyGrapher.ui.prefetch import Prefetcher
 from PropertyGrapher.ui.tabs import ViewerTabs, ViewerTab
+from PropertyGrapher.utils.property_helper import get_config
 
 
 class MenuButton(QPushButton):
@@ -49,8 +53,35 @@ class MenuButton(QPushButton):
         self.setIconSize(QSize(self.icon_size, self.icon_size))
 
 
+class EntityLibLoader(QThread):
+    """Load EntityLib and its schema in background."""
+
+    loaded = Signal(object)
+    failed = Signal(str)
+
+    def __init__(self, rawdata_path: str, schema_path: str, parent: QWidget = None):
+        super().__init__(parent)
+        self.rawdata_path = rawdata_path
+        self.schema_path = schema_path
+
+    def run(self) -> None:
+        try:
+            entity_lib = EntityLib(self.rawdata_path, self.schema_path)
+        except Exception as exception:
+            self.failed.emit(f"{type(exception).__name__}: {exception}")
+            return
+        self.loaded.emit(entity_lib)
+
+
 class GraphViewer(QMainWindow):
-    def __init__(self, entity_lib: EntityLib, output_path: Path):
+    def __init__(
+        self,
+        entity_lib: Optional[EntityLib],
+        output_path: Path,
+        rawdata_path: str = None,
+        schema_path: str = None,
+    ):
+        """Initialize, EntityLib is loaded in background if not given."""
         super().__init__()
 
         QDir.addSearchPath(
@@ -62,15 +93,64 @@ class GraphViewer(QMainWindow):
             ),
         )
         self.entity_lib = entity_lib
+        self.rawdata_path = rawdata_path or str(entity_lib.rawdata_path)
         self.output_path = output_path
         self._current_file: Optional[Path] = None
 
+        # Graphs of all tabs are built by the scheduler's workers
+        self.scheduler = GraphJobScheduler(
+            output_path,
+            workers=get_config().get("viewer", {}).get("graph_workers", 2),
+        )
+        self.scheduler.entity_lib = entity_lib
+        self.prefetcher = Prefetcher(self.scheduler, self.rawdata_path, self)
+
+        # Graphs requested while EntityLib is loading
+        self._pending_graphs: List[List[Path]] = []
+        self._entity_lib_loader = None
+
         self.create_ui()
         self.set_full_screen()
 
         self.setWindowIcon(QIcon(f"{QDir.searchPaths('grapher_icons')[0]}/app.png"))
         self.setWindowTitle("Property Grapher")
 
+        if not self.entity_lib:
+            self.load_entity_lib(rawdata_path, schema_path)
+
+    def load_entity_lib(self, rawdata_path: str, schema_path: str) -> None:
+        self.set_menu_enabled(False)
+        self.statusBar().showMessage("Loading EntityLib...")
+
+        self._entity_lib_loader = EntityLibLoader(rawdata_path, schema_path, self)
+        self._entity_lib_loader.loaded.connect(self.set_entity_lib)
+        self._entity_lib_loader.failed.connect(self.set_entity_lib_failed)
+        self._entity_lib_loader.start()
+
+    def set_entity_lib(self, entity_lib: EntityLib) -> None:
+        self.entity_lib = entity_lib
+        self.scheduler.entity_lib = entity_lib
+        self.set_menu_enabled(True)
+        self.statusBar().clearMessage()
+
+        pending_graphs, self._pending_graphs = self._pending_graphs, []
+        for file_paths in pending_graphs:
+            self.create_combined_graph(file_paths)
+
+    def set_entity_lib_failed(self, error: str) -> None:
+        """Nothing can be graphed without EntityLib, show why and close."""
+        print(f"Failed to load EntityLib: {error}")
+        self.statusBar().showMessage(f"Failed to load EntityLib: {error}")
+        self._pending_graphs = []
+        QMessageBox.critical(
+            self, "Property Grapher", f"Failed to load EntityLib:\n{error}"
+        )
+        self.close()
+
+    def set_menu_enabled(self, enabled: bool) -> None:
+        self.open_button.setEnabled(enabled)
+        self.open_directory_button.setEnabled(enabled)
+
     def create_ui(self):
 
         main_frame = QFrame(self)
@@ -79,13 +159,18 @@ class GraphViewer(QMainWindow):
         menu_layout = QVBoxLayout()
         menu_layout.setAlignment(Qt.AlignTop | Qt.AlignCenter)
 
-        open_button = MenuButton("Open property as graph", "open_2")
-        open_button.clicked.connect(self.open_entity_graph)
+        self.open_button = MenuButton("Open properties as graph", "open_2")
+        self.open_button.clicked.connect(self.open_entity_graph)
+        self.open_directory_button = MenuButton(
+            "Open directory's properties as a combined graph", "open_1"
+        )
+        self.open_directory_button.clicked.connect(self.open_directory_graph)
         self.reload_button = MenuButton("Reload property's graph", "reload_2")
         self.reload_button.clicked.connect(self.reload_graph)
         self.reload_button.setEnabled(False)
 
-        menu_layout.addWidget(open_button)
+        menu_layout.addWidget(self.open_button)
+        menu_layout.addWidget(self.open_directory_button)
         menu_layout.addWidget(self.reload_button)
 
         main_layout.addLayout(menu_layout)
@@ -93,44 +178,73 @@ class GraphViewer(QMainWindow):
         self.tabs = ViewerTabs()
         self.tabs.setMovable(True)
         self.tabs.setTabsClosable(True)
-        self.tabs.tabCloseRequested.connect(self.tabs.removeTab)
+        self.tabs.tabCloseRequested.connect(self.tabs.close_tab)
         self.tabs.currentChanged.connect(self.tabs.current_changed)
         main_layout.addWidget(self.tabs)
 
         self.setCentralWidget(main_frame)
+        self.statusBar().addPermanentWidget(self.tabs.memory_label)
 
     def get_default_dir(self) -> str:
         current_widget = self.tabs.currentWidget()
         if current_widget:
             return current_widget.current_entity.as_posix()
         else:
-            return str(self.entity_lib.rawdata_path)
+            return self.rawdata_path
 
     def open_entity_graph(self):
         dialog = QFileDialog()
 
         default_dir = self.get_default_dir()
         dialog.setDirectory(default_dir)
-        file_name = dialog.getOpenFileName(
+        file_names = dialog.getOpenFileNames(
             self,
-            "Open property File",
+            "Open property Files",
             default_dir,
         )
-        file_path = file_name[0]
-        if not file_path:
+        file_paths = file_names[0]
+        if not file_paths:
             return
 
-        self.create_graph(Path(file_path))
+        if len(file_paths) == 1:
+            self.create_graph(Path(file_paths[0]))
+        else:
+            self.create_combined_graph([Path(file_path) for file_path in file_paths])
+
+    def open_directory_graph(self):
+        directory = QFileDialog.getExistingDirectory(
+            self,
+            "Open properties directory",
+            self.get_default_dir(),
+        )
+        if not directory:
+            return
+
+        self.create_combined_graph([Path(directory)])
 
     def reload_graph(self):
         self.tabs.currentWidget().reload_graph()
 
     def create_graph(self, file_path: Path) -> None:
+        if not self.entity_lib:
+            self._pending_graphs.append([file_path])
+            return
+
         widget = ViewerTab(self)
         widget.load_graph(file_path)
         self.tabs.addTab(widget, widget.label)
         self.tabs.setCurrentWidget(widget)
 
+    def create_combined_graph(self, file_paths: List[Path]) -> None:
+        if not self.entity_lib:
+            self._pending_graphs.append(file_paths)
+            return
+
+        widget = ViewerTab(self)
+        widget.load_graphs(file_paths)
+        self.tabs.addTab(widget, widget.label)
+        self.tabs.setCurrentWidget(widget)
+
     def set_full_screen(self):
 
         title_bar_height = self.style().pixelMetric(
@@ -144,8 +258,18 @@ class GraphViewer(QMainWindow):
 
 
 def create_window(
-    entity_lib: EntityLib, output_path: Path, file_path: Optional[Path] = None
+    entity_lib: Optional[EntityLib],
+    output_path: Path,
+    file_path: Optional[Path] = None,
+    file_paths: Optional[List[Path]] = None,
+    rawdata_path: str = None,
+    schema_path: str = None,
 ) -> GraphViewer:
+    """Create or raise the grapher's window.
+
+    Without entity_lib, it is loaded from rawdata_path and schema_path
+    in background while the window is already displayed.
+    """
 
     app = QApplication.instance()
     existing_pyside2_app = bool(app)
@@ -161,13 +285,20 @@ def create_window(
                 main_window = window
                 break
     if not main_window:
-        main_window = GraphViewer(entity_lib, output_path)
+        main_window = GraphViewer(
+            entity_lib,
+            output_path,
+            rawdata_path=rawdata_path,
+            schema_path=schema_path,
+        )
         main_window.show()
 
     main_window.raise_()
 
     if file_path and file_path.suffix == ".entity":
         main_window.create_graph(file_path=file_path)
+    elif file_paths:
+        main_window.create_combined_graph(file_paths)
 
     if not existing_pyside2_app:
         sys.exit(app.exec_())
@@ -0,0 +1,155 @@
+from typing import List, Optional, Tuple
+
+from PySide2.QtCore import QPointF, QRectF, Qt, QTimer
+from PySide2.QtGui import (
+    QColor,
+    QMouseEvent,
+    QPainter,
+    QPaintEvent,
+    QPen,
+    QPixmap,
+    QPolygonF,
+)
+from PySide2.QtWidgets import QGraphicsView, QWidget
+
+from PropertyGrapher.ui.node import Node
+
+MinimapNode = Tuple[QRectF, str]
+MinimapEdge = Tuple[Tuple[Tuple[float, float], ...], str]
+
+
+class Minimap(QWidget):
+    """Overview of the whole layout, with the view's visible region.
+
+    The layout is drawn from its data into a cached low resolution pixmap,
+    paint events only draw the visible region over it. Layouts set while
+    one was just drawn, as during progressive layouts, are drawn at most
+    once per interval, the last one always being drawn.
+    """
+
+    _max_size = 220
+    _redraw_interval_ms = 250
+    _background_color = QColor(245, 245, 245, 230)
+    _viewport_color = QColor("red")
+
+    def __init__(self, view: QGraphicsView) -> None:
+        super().__init__(parent=view)
+        self.view = view
+
+        self.bounds = QRectF()
+        self.scale = 1.0
+        self.pixmap = QPixmap()
+
+        self.nodes: List[MinimapNode] = []
+        self.edges: List[MinimapEdge] = []
+
+        self._pending_graph: Optional[dict] = None
+        self._redraw_timer = QTimer(self)
+        self._redraw_timer.setSingleShot(True)
+        self._redraw_timer.timeout.connect(self.draw_pending_graph)
+
+        self.setCursor(Qt.PointingHandCursor)
+        self.hide()
+
+    @staticmethod
+    def get_layout_items(
+        graph_data: dict,
+    ) -> Tuple[List[MinimapNode], List[MinimapEdge]]:
+        nodes = [
+            (
+                QRectF(*Node.get_pos_and_size(node_data)),
+                node_data.get("fillcolor") or "#ffffff",
+            )
+            for node_data in graph_data.get("objects", [])
+        ]
+        edges = [
+            (tuple(tuple(point) for point in arrow_data["points"]), arrow_data["color"])
+            for arrow_data in graph_data.get("edges", [])
+        ]
+        return nodes, edges
+
+    def set_graph(self, graph_data: dict) -> None:
+        if self._redraw_timer.isActive():
+            self._pending_graph = graph_data
+        else:
+            self.draw_graph(graph_data)
+            self._redraw_timer.start(self._redraw_interval_ms)
+
+    def draw_pending_graph(self) -> None:
+        if self._pending_graph is not None:
+            graph_data, self._pending_graph = self._pending_graph, None
+            self.set_graph(graph_data)
+
+    def draw_graph(self, graph_data: dict) -> None:
+        self.nodes, self.edges = self.get_layout_items(graph_data)
+        if not self.nodes:
+            self.hide()
+            return
+
+        bounds = QRectF()
+        for rect, _ in self.nodes:
+            bounds = bounds.united(rect)
+        self.set_bounds(bounds)
+        self.draw_layout()
+        # Size follows the layout's bounds
+        self.view.place_minimap()
+
+        self.show()
+        self.update()
+
+    def set_bounds(self, bounds: QRectF) -> None:
+        self.bounds = bounds
+        self.scale = self._max_size / max(bounds.width(), bounds.height(), 1.0)
+        self.pixmap = QPixmap(
+            max(1, int(bounds.width() * self.scale)),
+            max(1, int(bounds.height() * self.scale)),
+        )
+        self.setFixedSize(self.pixmap.size())
+
+    def map_from_scene(self, point: QPointF) -> QPointF:
+        return (point - self.bounds.topLeft()) * self.scale
+
+    def map_to_scene(self, point: QPointF) -> QPointF:
+        return point / self.scale + self.bounds.topLeft()
+
+    def map_rect_from_scene(self, rect: QRectF) -> QRectF:
+        return QRectF(
+            self.map_from_scene(rect.topLeft()), self.map_from_scene(rect.bottomRight())
+        )
+
+    def draw_layout(self) -> None:
+        painter = QPainter(self.pixmap)
+        painter.setCompositionMode(QPainter.CompositionMode_Source)
+        painter.fillRect(self.pixmap.rect(), self._background_color)
+        painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
+
+        for points, color in self.edges:
+            painter.setPen(QPen(QColor(color), 1))
+            painter.drawPolyline(
+                QPolygonF([self.map_from_scene(QPointF(*point)) for point in points])
+            )
+
+        painter.setPen(Qt.NoPen)
+        for rect, color in self.nodes:
+            painter.fillRect(self.map_rect_from_scene(rect), QColor(color))
+        painter.end()
+
+    def paintEvent(self, event: QPaintEvent) -> None:
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self.pixmap)
+
+        visible_rect = self.view.mapToScene(self.view.viewport().rect()).boundingRect()
+        painter.setPen(QPen(self._viewport_color, 2))
+        painter.drawRect(self.map_rect_from_scene(visible_rect))
+        painter.end()
+
+    def navigate(self, event: QMouseEvent) -> None:
+        self.view.center_on(self.map_to_scene(QPointF(event.pos())))
+
+    def mousePressEvent(self, event: QMouseEvent) -> None:
+        if event.button() == Qt.LeftButton:
+            self.navigate(event)
+
+    def mouseMoveEvent(self, event: QMouseEvent) -> None:
+        if event.buttons() & Qt.LeftButton:
+            self.navigate(event)
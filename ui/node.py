@@ -1,4 +1,4 @@
-from typing import Tuple, List
+from typing import Optional, Sequence, Tuple, List
 
 from PySide2.QtCore import Qt
 from PySide2.QtWidgets import QGraphicsScene, QWidget, QVBoxLayout, QLabel
@@ -6,54 +6,69 @@ from PySide2.QtWidgets import QGraphicsScene, QWidget, QVBoxLayout, QLabel
 
 class Node(QWidget):
     def __init__(
-        self, node_data: dict, scene: QGraphicsScene, parent: QWidget = None
+        self,
+        node_data: dict,
+        scene: QGraphicsScene,
+        parent: QWidget = None,
+        rect: Optional[Sequence[float]] = None,
     ) -> None:
 
         super().__init__(parent=parent)
 
-        self.id = node_data["_gvid"]
-        self.name = node_data["name"]
-        self.file_path = node_data["tooltip"]
-        self.x, self.y, self.width, self.height = self.get_pos_and_size(node_data)
-
         layout = QVBoxLayout(self)
         layout.setMargin(0)
         layout.setSpacing(0)
 
-        self.label = QLabel(node_data["label"], self)
+        self.label = QLabel(self)
         self.label.setAlignment(Qt.AlignCenter | Qt.AlignCenter)
         layout.addWidget(self.label)
 
+        self.highlighted = False
+        self._style_sheet = ""
+        self.set_data(node_data, rect=rect)
+
+        self.proxy = scene.addWidget(self)
+        self.proxy.setZValue(1000)
+
+    def set_data(
+        self, node_data: dict, rect: Optional[Sequence[float]] = None
+    ) -> None:
+        """Display node_data, nodes can be recycled to display another node.
+
+        rect is the node's x, y, width and height, read from node_data if not given.
+        """
+        self.id = node_data["_gvid"]
+        self.name = node_data["name"]
+        self.file_path = node_data["tooltip"]
+        self.x, self.y, self.width, self.height = rect or self.get_pos_and_size(
+            node_data
+        )
+
+        self.label.setText(node_data["label"])
+
         self.set_position()
         self.set_color(node_data)
         self.setToolTip(self.file_path)
-
-        proxy = scene.addWidget(self)
-        proxy.setZValue(1000)
         self.setFixedSize(int(self.width), int(self.height))
 
     def set_color(self, node_data: dict) -> None:
-        for item in node_data["_draw_"]:
-            color = item.get("color")
-            if color and color != "#000000":
-                self.setStyleSheet(f"background-color: {color};")
+        color = node_data.get("fillcolor")
+        self._style_sheet = f"background-color: {color};" if color else ""
+        self.update_style_sheet()
 
-    @staticmethod
-    def get_pos_and_size(node_data: dict) -> Tuple[float, float, float, float]:
-
-        for item in node_data["_draw_"]:
-            points = item.get("points")
-            if points:
-                x_values = [v[0] for v in points]
-                y_values = [v[1] for v in points]
+    def set_highlighted(self, highlighted: bool) -> None:
+        if highlighted != self.highlighted:
+            self.highlighted = highlighted
+            self.update_style_sheet()
 
-                x = min(x_values)
-                y = min(y_values)
-                width = max(x_values) - x
-                height = max(y_values) - y
-                return x, y, width, height
+    def update_style_sheet(self) -> None:
+        highlight = "border: 4px solid red;" if self.highlighted else ""
+        self.setStyleSheet(self._style_sheet + highlight)
 
-        raise Exception("Node has no points, this should not happen")
+    @staticmethod
+    def get_pos_and_size(node_data: dict) -> Tuple[float, float, float, float]:
+        x, y, width, height = node_data["rect"]
+        return x, y, width, height
 
     def set_position(self) -> None:
         self.move(int(self.x), int(self.y))
@@ -0,0 +1,152 @@
+from collections import OrderedDict
+from pathlib import Path
+from typing import List
+
+from PySide2.QtCore import QObject, QTimer
+
+from PropertyGrapher.grapher.graph import PropertyGrapher
+from PropertyGrapher.ui.jobs import (
+    GraphJob,
+    GraphJobScheduler,
+    JobKey,
+    get_initial_depth,
+)
+from PropertyGrapher.utils.memory import get_process_memory
+from PropertyGrapher.utils.property_helper import get_config
+
+
+class Prefetcher(QObject):
+    """Build in background the graphs likely to be opened next.
+
+    Targets are the node under the cursor, once hovered for `hover_delay_ms`,
+    and the direct prefabs and sub scenes of the graphs loaded in tabs.
+    Prefetched graphs are jobs of the scheduler, with a low priority, so
+    opening one of them subscribes to its built or started job, which is
+    then handed over to the tab.
+    Up to `max_graphs` of them are kept, the least recently requested are
+    released first, and none are started while the process memory is over
+    `memory_budget_mb`, see the `prefetch` key of `config.json`.
+    Prefetching is disabled when the scheduler has a single worker.
+    """
+
+    def __init__(
+        self, scheduler: GraphJobScheduler, rawdata_path: str, parent: QObject = None
+    ) -> None:
+        super().__init__(parent)
+        self.scheduler = scheduler
+        self.rawdata_path = rawdata_path
+
+        prefetch_config = get_config().get("prefetch", {})
+        self.max_graphs = prefetch_config.get("max_graphs", 8)
+        self.memory_budget = (
+            prefetch_config.get("memory_budget_mb", 3072) * 1024 * 1024
+        )
+
+        # Jobs by key, least recently requested first
+        self._jobs = OrderedDict()
+
+        self._hovered_file = None
+        self._hover_timer = QTimer(self)
+        self._hover_timer.setSingleShot(True)
+        self._hover_timer.setInterval(prefetch_config.get("hover_delay_ms", 500))
+        self._hover_timer.timeout.connect(self.prefetch_hovered_file)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_graphs > 0 and self.scheduler.can_prefetch
+
+    def get_graph_path(self, file_path: str) -> Path:
+        """Path a graph is opened with, see GraphicsView.open_dependencies_graph."""
+        return Path(self.rawdata_path, file_path)
+
+    def prefetch(self, file_path: str) -> None:
+        if not self.enabled:
+            return
+
+        file_paths = [self.get_graph_path(file_path)]
+        key = self.scheduler.get_job_key(
+            file_paths, get_initial_depth(), frozenset(), frozenset()
+        )
+        if key in self._jobs:
+            self._jobs.move_to_end(key)
+            return
+
+        memory = get_process_memory()
+        if memory is not None and memory > self.memory_budget:
+            return
+
+        job = self.scheduler.request(
+            self, file_paths, max_depth=get_initial_depth(), prefetch=True
+        )
+        self._jobs[key] = job
+        self.check_budget()
+
+    def set_hovered_file(self, file_path: str) -> None:
+        """Prefetch file_path's graph if it stays hovered."""
+        if file_path == self._hovered_file:
+            return
+        self._hovered_file = file_path
+        if file_path:
+            self._hover_timer.start()
+        else:
+            self._hover_timer.stop()
+
+    def prefetch_hovered_file(self) -> None:
+        if self._hovered_file:
+            self.prefetch(self._hovered_file)
+
+    def prefetch_dependencies(self, grapher: PropertyGrapher) -> None:
+        """Prefetch the graphs of grapher's roots' prefabs and sub scenes.
+
+        They are already loaded by the graph's walk, getting them loads nothing.
+        """
+        file_paths: List[str] = []
+        for root_prop in grapher.root_props:
+            if root_prop._prefab_loaded and root_prop._prefab:
+                file_paths.append(root_prop._prefab.file_path)
+            for sub_scene in root_prop._sub_scenes or []:
+                # Embedded sub scenes have no file of their own
+                if sub_scene.file_key != root_prop.file_key:
+                    file_paths.append(sub_scene.file_path)
+
+        # Requested in reverse so the first ones are started first
+        file_paths = list(dict.fromkeys(file_paths))[: self.max_graphs]
+        for file_path in reversed(file_paths):
+            self.prefetch(file_path)
+
+    def hand_over(self, job: GraphJob) -> None:
+        """Stop keeping job once a tab opened it, the tab's subscription keeps it."""
+        if self._jobs.get(job.key) is job:
+            self.release(job.key)
+
+    def release(self, key: JobKey) -> None:
+        job = self._jobs.pop(key)
+        self.scheduler.unsubscribe(job, self)
+
+    def check_budget(self) -> None:
+        while len(self._jobs) > self.max_graphs:
+            self.release(next(iter(self._jobs)))
+
+        # Memory is not released right away, so only release one graph per check
+        memory = get_process_memory()
+        if memory is not None and memory > self.memory_budget and self._jobs:
+            self.release(next(iter(self._jobs)))
+
+    def set_job(self, job: GraphJob) -> None:
+        pass
+
+    def set_layout(self, graph_data: dict) -> None:
+        pass
+
+    def set_job_finished(self, job: GraphJob) -> None:
+        self.check_budget()
+
+    def set_job_failed(self, error: str) -> None:
+        # Failed jobs are replaced by a new one when requested again
+        for key, job in list(self._jobs.items()):
+            if job.error:
+                self.release(key)
+
+    def clear(self) -> None:
+        for key in list(self._jobs):
+            self.release(key)
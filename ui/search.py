@@ -0,0 +1,90 @@
+from PySide2.QtCore import QTimer
+from PySide2.QtWidgets import (
+    QCheckBox,
+    QComboBox,
+    QHBoxLayout,
+    QLabel,
+    QLineEdit,
+    QPushButton,
+    QWidget,
+)
+
+from PropertyGrapher.ui.graphics_view import FilterMode, GraphicsView
+
+
+class SearchBar(QWidget):
+    """Search nodes of a GraphicsView, and jump from one match to the other."""
+
+    _search_delay = 150
+
+    def __init__(self, view: GraphicsView, parent: QWidget = None) -> None:
+        super().__init__(parent=parent)
+        self.view = view
+
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.query_edit = QLineEdit(self)
+        self.query_edit.setPlaceholderText("Search nodes by name, label or file")
+        self.query_edit.setClearButtonEnabled(True)
+        self.query_edit.textChanged.connect(self.schedule_search)
+        self.query_edit.returnPressed.connect(lambda: self.go_to_match(1))
+        layout.addWidget(self.query_edit)
+
+        self.prefix_check_box = QCheckBox("Starts with", self)
+        self.prefix_check_box.toggled.connect(self.search)
+        layout.addWidget(self.prefix_check_box)
+
+        self.filter_combo_box = QComboBox(self)
+        self.filter_combo_box.addItems(
+            [FilterMode.Highlight, FilterMode.Dim, FilterMode.Hide]
+        )
+        self.filter_combo_box.currentTextChanged.connect(self.search)
+        layout.addWidget(self.filter_combo_box)
+
+        previous_button = QPushButton("<", self)
+        previous_button.setFixedWidth(30)
+        previous_button.setToolTip("Previous match")
+        previous_button.clicked.connect(lambda: self.go_to_match(-1))
+        layout.addWidget(previous_button)
+
+        next_button = QPushButton(">", self)
+        next_button.setFixedWidth(30)
+        next_button.setToolTip("Next match")
+        next_button.clicked.connect(lambda: self.go_to_match(1))
+        layout.addWidget(next_button)
+
+        self.matches_label = QLabel(self)
+        layout.addWidget(self.matches_label)
+
+        # Searching is delayed while typing
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.timeout.connect(self.search)
+
+    def schedule_search(self) -> None:
+        self._search_timer.start(self._search_delay)
+
+    def search(self) -> None:
+        self.view.search(
+            self.query_edit.text(),
+            self.prefix_check_box.isChecked(),
+            self.filter_combo_box.currentText(),
+        )
+        self.update_matches_label()
+
+    def go_to_match(self, step: int) -> None:
+        if self._search_timer.isActive():
+            self._search_timer.stop()
+            self.search()
+        self.view.center_on_match(step)
+        self.update_matches_label()
+
+    def update_matches_label(self) -> None:
+        if not self.view.search_query:
+            self.matches_label.clear()
+            return
+
+        count = len(self.view.matches)
+        current = self.view.current_match + 1 if count else 0
+        self.matches_label.setText(f"{current} / {count}")
@@ -0,0 +1,96 @@
+import bisect
+import re
+from typing import Dict, List, Set
+
+_LABEL_SEPARATORS = re.compile(r"<br/>|-{3,}|[<>]")
+
+
+class NodeSearchIndex:
+    """Index of nodes' names, labels and file paths, for prefix or substring search.
+
+    Prefix search runs a binary search in the sorted terms of every node,
+    terms include each part of paths. Substring search runs str.find on all
+    the nodes' texts joined together, then maps offsets back to nodes.
+    """
+
+    def __init__(self, nodes_data: List[dict]) -> None:
+        self._terms: List[str] = []
+        self._term_nodes: List[int] = []
+
+        texts = []
+        self._offsets: List[int] = []
+        offset = 0
+
+        terms = []
+        for i, node_data in enumerate(nodes_data):
+            node_texts = self.get_node_texts(node_data)
+            for term in self.get_terms(node_texts):
+                terms.append((term, i))
+
+            text = "\n".join(node_texts).lower() + "\n"
+            texts.append(text)
+            self._offsets.append(offset)
+            offset += len(text)
+
+        terms.sort()
+        self._terms = [term for term, _ in terms]
+        self._term_nodes = [i for _, i in terms]
+        self._text = "".join(texts)
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    @staticmethod
+    def get_node_texts(node_data: dict) -> List[str]:
+        label = _LABEL_SEPARATORS.sub("\n", node_data.get("label", ""))
+        return [
+            node_data.get("name", ""),
+            *filter(None, (part.strip() for part in label.split("\n"))),
+            node_data.get("tooltip", ""),
+        ]
+
+    @staticmethod
+    def get_terms(texts: List[str]) -> Set[str]:
+        terms = set()
+        for text in texts:
+            text = text.lower()
+            terms.add(text)
+            terms.update(filter(None, re.split(r"[/\\]", text)))
+        return terms
+
+    def search_prefix(self, query: str) -> List[int]:
+        query = query.lower()
+        matches: Dict[int, None] = {}
+        i = bisect.bisect_left(self._terms, query)
+        while i < len(self._terms) and self._terms[i].startswith(query):
+            matches[self._term_nodes[i]] = None
+            i += 1
+        return sorted(matches)
+
+    def search_substring(self, query: str) -> List[int]:
+        query = query.lower()
+        matches = []
+        start = self._text.find(query)
+        while start != -1:
+            node = bisect.bisect_right(self._offsets, start) - 1
+            matches.append(node)
+
+            # Skip to the next node, its own text may match again
+            if node + 1 == len(self._offsets):
+                break
+            start = self._text.find(query, self._offsets[node + 1])
+        return matches
+
+    def search(self, query: str, prefix_only: bool = False) -> List[int]:
+        """Get matching nodes' indices, prefix matches first."""
+        if not query:
+            return []
+
+        prefix_matches = self.search_prefix(query)
+        if prefix_only:
+            return prefix_matches
+
+        prefix_set = set(prefix_matches)
+        return prefix_matches + [
+            i for i in self.search_substring(query) if i not in prefix_set
+        ]
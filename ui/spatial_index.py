@@ -0,0 +1,90 @@
+from collections import defaultdict
+from typing import Dict, Hashable, Iterator, List, Optional, Set, Tuple
+
+
+class GridIndex:
+    """Uniform grid of rectangles, to find those intersecting a region.
+
+    Each rectangle is stored in every cell it overlaps, so a query only
+    looks at the rectangles of the cells overlapped by its region.
+    Regions are clamped to the occupied cells' bounds, and regions overlapping
+    more cells than are occupied only look at the occupied ones.
+    """
+
+    def __init__(self, cell_size: float = 500.0) -> None:
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], List[Hashable]] = defaultdict(list)
+        self._rects: Dict[Hashable, Tuple[float, float, float, float]] = {}
+        # First and last occupied column and row
+        self._bounds: Optional[Tuple[int, int, int, int]] = None
+
+    def __len__(self) -> int:
+        return len(self._rects)
+
+    def get_cells_range(
+        self, x: float, y: float, width: float, height: float
+    ) -> Tuple[range, range]:
+        return (
+            range(int(x // self.cell_size), int((x + width) // self.cell_size) + 1),
+            range(int(y // self.cell_size), int((y + height) // self.cell_size) + 1),
+        )
+
+    def insert(
+        self, key: Hashable, x: float, y: float, width: float, height: float
+    ) -> None:
+        self._rects[key] = (x, y, width, height)
+        columns, rows = self.get_cells_range(x, y, width, height)
+        for column in columns:
+            for row in rows:
+                self._cells[(column, row)].append(key)
+
+        bounds = (columns[0], rows[0], columns[-1], rows[-1])
+        if self._bounds is not None:
+            bounds = (
+                min(bounds[0], self._bounds[0]),
+                min(bounds[1], self._bounds[1]),
+                max(bounds[2], self._bounds[2]),
+                max(bounds[3], self._bounds[3]),
+            )
+        self._bounds = bounds
+
+    def iter_cells(
+        self, x: float, y: float, width: float, height: float
+    ) -> Iterator[List[Hashable]]:
+        """Yield the keys of the occupied cells overlapped by the region."""
+        if self._bounds is None:
+            return
+        columns, rows = self.get_cells_range(x, y, width, height)
+        first_column, first_row, last_column, last_row = self._bounds
+        columns = range(
+            max(columns.start, first_column), min(columns.stop, last_column + 1)
+        )
+        rows = range(max(rows.start, first_row), min(rows.stop, last_row + 1))
+
+        if len(columns) * len(rows) > len(self._cells):
+            for (column, row), keys in self._cells.items():
+                if column in columns and row in rows:
+                    yield keys
+            return
+
+        for column in columns:
+            for row in rows:
+                keys = self._cells.get((column, row))
+                if keys:
+                    yield keys
+
+    def query(self, x: float, y: float, width: float, height: float) -> Set[Hashable]:
+        keys = set()
+        for cell_keys in self.iter_cells(x, y, width, height):
+            for key in cell_keys:
+                if key in keys:
+                    continue
+                key_x, key_y, key_width, key_height = self._rects[key]
+                if (
+                    key_x <= x + width
+                    and x <= key_x + key_width
+                    and key_y <= y + height
+                    and y <= key_y + key_height
+                ):
+                    keys.add(key)
+        return keys
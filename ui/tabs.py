@@ -1,18 +1,28 @@
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Set
 
 from EntityLibPy import EntityLib
-from PySide2.QtCore import Qt
+from PySide2.QtCore import Qt, QTimer
 from PySide2.QtWidgets import (
     QTabWidget,
     QVBoxLayout,
     QWidget,
     QGraphicsScene,
     QMainWindow,
+    QLabel,
 )
 
-from PropertyGrapher.grapher.graph import create_graph
+from PropertyGrapher.grapher.graph import PropertyGrapher, get_grapher
 from PropertyGrapher.ui.graphics_view import GraphicsView
+from PropertyGrapher.ui.jobs import (
+    GraphJob,
+    GraphJobScheduler,
+    IncrementalLayoutJob,
+    get_initial_depth,
+)
+from PropertyGrapher.ui.search import SearchBar
+from PropertyGrapher.utils.memory import format_memory, get_process_memory
+from PropertyGrapher.utils.property_helper import get_config
 
 
 class ViewerTab(QWidget):
@@ -22,16 +32,45 @@ class ViewerTab(QWidget):
         super().__init__(parent=parent)
 
         self.view = None
+        self.search_bar = None
         self._current_file = None
+        self._current_files: List[Path] = []
         self._label = None
         self.main_window = main_window
 
+        # Job building the graph, possibly shared with other tabs. Its layouts
+        # are displayed while deeper levels are discovered, only the last
+        # received one is displayed when they come faster than the view loads
+        self.job: Optional[GraphJob] = None
+        self._displayed_data: Optional[dict] = None
+        self._layout_timer = QTimer(self)
+        self._layout_timer.setSingleShot(True)
+        self._layout_timer.timeout.connect(self.display_layout)
+
+        # Last layout, kept to rebuild the scene of a hibernated tab
+        self.graph_data: Optional[dict] = None
+        self.hibernated = False
+
+        # Grapher is kept to expand or collapse nodes in place,
+        # its expanded state outlives it when the tab is hibernated
+        self.grapher: Optional[PropertyGrapher] = None
+        self.collapsed_nodes: Set[str] = set()
+        self.expanded_nodes: Set[str] = set()
+        self.unexpanded_nodes: Set[str] = set()
+        self.collapsible_nodes: Set[str] = set()
+        # Expansion or collapse being laid out, the grapher is a worker's until then
+        self.layout_job: Optional[IncrementalLayoutJob] = None
+
         self.create_ui()
 
     @property
     def entity_lib(self) -> EntityLib:
         return self.main_window.entity_lib
 
+    @property
+    def scheduler(self) -> GraphJobScheduler:
+        return self.main_window.scheduler
+
     @property
     def label(self) -> str:
         """Get tab label."""
@@ -45,7 +84,7 @@ class ViewerTab(QWidget):
         if self.parent():
             tabs_widget = self.parent().parent()
             tabs_widget.setTabText(
-                tabs_widget.currentIndex(),
+                tabs_widget.indexOf(self),
                 self.label,
             )
 
@@ -56,44 +95,313 @@ class ViewerTab(QWidget):
     @current_prop.setter
     def current_prop(self, file_path: Path):
         self._current_file = file_path
-        self.label = file_path.name
         self.main_window.reload_button.setEnabled(True)
 
     def create_ui(self):
         main_layout = QVBoxLayout(self)
         self.view = GraphicsView(self.entity_lib, QGraphicsScene())
+        self.search_bar = SearchBar(self.view, self)
+        main_layout.addWidget(self.search_bar)
         main_layout.addWidget(self.view)
 
     def load_graph(self, file_path: Path) -> None:
-        graph_data = create_graph(
+        self.load_graphs([file_path])
+
+    def create_grapher(self, file_paths: List[Path]) -> PropertyGrapher:
+        grapher = get_grapher(
             self.entity_lib,
-            file_path,
+            file_paths,
             self.main_window.output_path,
             view=False,
-            generate_files=False,
         )
+        grapher.max_depth = get_initial_depth()
+        grapher.collapsed_nodes = self.collapsed_nodes
+        grapher.expanded_nodes = self.expanded_nodes
+        return grapher
+
+    def get_grapher(self) -> PropertyGrapher:
+        """Get the tab's grapher, created again if it was released.
 
+        Only its roots are loaded, its graph is built again by the
+        incremental layout jobs.
+        """
+        if not self.grapher:
+            # Loading competes with the scheduler's jobs for EntityLib
+            with self.scheduler.entity_lib_lock:
+                self.grapher = self.create_grapher(self._current_files)
+        return self.grapher
+
+    def load_graphs(self, file_paths: List[Path], reload: bool = False) -> None:
+        """Load file_paths in a single graph, directories are searched for entities.
+
+        The graph is built by the scheduler, along with the
+        other tabs' graphs, its layouts are received in set_layout.
+        """
+        self.release_grapher()
+        self._current_files = file_paths
+        self.hibernated = False
+        self.graph_data = None
+        self._displayed_data = None
+        if len(file_paths) > 1:
+            self.label = f"{file_paths[0].name} (+{len(file_paths) - 1})"
+        else:
+            self.label = file_paths[0].name
+
+        self.scheduler.request(
+            self,
+            file_paths,
+            max_depth=get_initial_depth(),
+            collapsed_nodes=frozenset(self.collapsed_nodes),
+            expanded_nodes=frozenset(self.expanded_nodes),
+            reload=reload,
+        )
+        # Tab may have been closed by a job failure it was caught up with
+        if self.job is None:
+            return
+        self.main_window.prefetcher.hand_over(self.job)
+        if self.main_window.tabs.currentWidget() is self:
+            self.scheduler.set_visible_job(self.job)
+
+    def set_job(self, job: GraphJob) -> None:
+        """Receive the requested job, before being caught up with its results."""
+        self.job = job
+
+    def set_layout(self, graph_data: dict) -> None:
+        """Receive a layout of the job, displayed from the event loop."""
         if not graph_data.get("objects"):
-            print(graph_data)
-            raise Exception(f"No property found in {file_path.as_posix()}")
-        self.current_prop = Path(graph_data["objects"][0]["tooltip"])
-        self.view.load_graph(graph_data)
+            return
+
+        if self.graph_data is None:
+            self.current_prop = Path(graph_data["objects"][0]["tooltip"])
+        self.graph_data = graph_data
+        self._layout_timer.start(0)
+
+    def display_layout(self) -> None:
+        if self.hibernated or self.graph_data is self._displayed_data:
+            return
+        self._displayed_data = self.graph_data
+        self.view.load_graph(self.graph_data)
+
+    def set_job_finished(self, job: GraphJob) -> None:
+        if not self.graph_data:
+            self.set_job_failed(
+                "No property found in "
+                f"{[path.as_posix() for path in self._current_files]}"
+            )
+            return
+
+        # Tab gets its own grapher, to expand its nodes without changing
+        # the job's, the properties it already loaded are shared
+        self.grapher = job.grapher.copy()
+        self.grapher.collapsed_nodes = self.collapsed_nodes
+        self.grapher.expanded_nodes = self.expanded_nodes
+        self.unexpanded_nodes = self.grapher.unexpanded_nodes
+        self.collapsible_nodes = self.grapher.collapsible_nodes
+        self.main_window.prefetcher.prefetch_dependencies(self.grapher)
+
+        layout_record = self.graph_data.get("layout", {})
+        fallbacks = []
+        if layout_record.get("timed_out"):
+            fallbacks.append(
+                f"{', '.join(layout_record['timed_out'])} exceeded the layout "
+                "time budget"
+            )
+        if layout_record.get("failed"):
+            fallbacks.append(f"{', '.join(layout_record['failed'])} failed")
+        if fallbacks:
+            self.main_window.statusBar().showMessage(
+                f"{self.label} laid out with {layout_record['strategy']}, "
+                f"{', '.join(fallbacks)}"
+            )
+
+    def set_job_failed(self, error: str) -> None:
+        print(f"Failed to load {self.label}: {error}")
+        self.main_window.statusBar().showMessage(
+            f"Failed to load {self.label}: {error}"
+        )
+        tabs_widget = self.main_window.tabs
+        tabs_widget.close_tab(tabs_widget.indexOf(self))
 
     def reload_graph(self) -> None:
-        self.load_graph(self.current_prop)
+        self.load_graphs(self._current_files, reload=True)
+
+    def is_node_expandable(self, name: str) -> bool:
+        return name in self.unexpanded_nodes
+
+    def is_node_collapsible(self, name: str) -> bool:
+        return name in self.collapsible_nodes
+
+    def toggle_node_expanded(self, name: str) -> None:
+        """Expand or collapse a node's hierarchy in place.
+
+        Only the newly expanded properties are loaded, and
+        the other nodes keep their positions when possible.
+        The graph is built and laid out by the scheduler, and
+        received in set_incremental_layout.
+        """
+        if self.is_loading or not self.graph_data:
+            return
+
+        grapher = self.get_grapher()
+        grapher.set_node_expanded(name, self.is_node_expandable(name))
+        self.layout_job = self.scheduler.request_incremental_layout(
+            self, grapher, name, self.graph_data
+        )
+
+    def set_incremental_layout(self, graph_data: dict) -> None:
+        # Results of cancelled jobs may still be queued
+        if self.layout_job is None or self.layout_job.graph_data is not graph_data:
+            return
+
+        self.unexpanded_nodes = self.layout_job.grapher.unexpanded_nodes
+        self.collapsible_nodes = self.layout_job.grapher.collapsible_nodes
+        self.layout_job = None
+        self.graph_data = graph_data
+        self._displayed_data = self.graph_data
+        self.view.load_graph(self.graph_data)
+
+    def set_incremental_layout_failed(self, error: str) -> None:
+        if self.layout_job is None or self.layout_job.error != error:
+            return
+
+        # Its graph may be partially built, it is created again next time
+        self.layout_job = None
+        self.grapher = None
+        print(f"Failed to lay out {self.label}: {error}")
+        self.main_window.statusBar().showMessage(
+            f"Failed to lay out {self.label}: {error}"
+        )
+
+    @property
+    def is_loading(self) -> bool:
+        # Grapher is only received once the job is finished
+        return (
+            self.job is not None and self.grapher is None
+        ) or self.layout_job is not None
+
+    def release_job(self) -> None:
+        """Unsubscribe from the job, cancelled if no other tab waits for it."""
+        self._layout_timer.stop()
+        if self.job is not None:
+            self.scheduler.unsubscribe(self.job, self)
+            self.job = None
+
+    def release_grapher(self) -> None:
+        self.release_job()
+        if self.layout_job is not None:
+            self.scheduler.cancel_incremental_layout(self.layout_job)
+            self.layout_job = None
+        self.grapher = None
+
+    def hibernate(self) -> None:
+        """Release the scene, its items and properties, only keeping the layout data."""
+        if self.hibernated or self.is_loading or not self.graph_data:
+            return
+        self.view.reset_scene()
+        self.release_grapher()
+        self._displayed_data = None
+        self.hibernated = True
+
+    def wake(self) -> None:
+        """Rebuild the scene of a hibernated tab."""
+        if not self.hibernated:
+            return
+        self.view.load_graph(self.graph_data)
+        self._displayed_data = self.graph_data
+        self.hibernated = False
+
+    def release(self) -> None:
+        """Release everything the tab holds, before it is deleted."""
+        self.release_grapher()
+        self.graph_data = None
+        self.view.reset_scene()
 
 
 class ViewerTabs(QTabWidget):
+    """Tabs of graphs, hibernating inactive ones to stay within budget.
+
+    Once more than `max_live_tabs` tabs have a scene, or the process
+    memory exceeds `memory_budget_mb`, the least recently activated
+    tabs are hibernated, see `config.json`.
+    """
+
+    _budget_check_interval = 2000
+
     def __init__(self, parent: Optional[QWidget] = None):
         super().__init__(parent)
         self.clicked_index = None
 
+        tabs_config = get_config().get("tabs", {})
+        self.max_live_tabs = tabs_config.get("max_live_tabs", 5)
+        self.memory_budget = tabs_config.get("memory_budget_mb", 4096) * 1024 * 1024
+
+        # Least recently activated tab first
+        self._activation_order: List[ViewerTab] = []
+
+        self.memory_label = QLabel()
+        self._budget_timer = QTimer(self)
+        self._budget_timer.timeout.connect(self.check_budget)
+        self._budget_timer.start(self._budget_check_interval)
+
     def current_changed(self, index: int) -> None:
         self.clicked_index = index
 
+        widget = self.widget(index)
+        if not widget:
+            return
+
+        widget.wake()
+        widget.scheduler.set_visible_job(widget.job)
+        if widget in self._activation_order:
+            self._activation_order.remove(widget)
+        self._activation_order.append(widget)
+        self.check_budget()
+
+    def get_live_tabs(self) -> List[ViewerTab]:
+        return [
+            widget
+            for widget in self._activation_order
+            if not widget.hibernated and widget != self.currentWidget()
+        ]
+
+    def check_budget(self) -> None:
+        live_tabs = self.get_live_tabs()
+        for widget in live_tabs[: max(0, len(live_tabs) + 1 - self.max_live_tabs)]:
+            widget.hibernate()
+
+        # Memory is not released right away, so
+        # only hibernate one more tab per check
+        memory = get_process_memory()
+        if memory is not None and memory > self.memory_budget:
+            for widget in self.get_live_tabs():
+                if not widget.is_loading:
+                    widget.hibernate()
+                    break
+
+        self.update_memory_label(memory)
+
+    def update_memory_label(self, memory: Optional[int]) -> None:
+        hibernated = sum(widget.hibernated for widget in self._activation_order)
+        self.memory_label.setText(
+            f"Memory: {format_memory(memory)}"
+            f" | Tabs: {self.count()} ({hibernated} hibernated)"
+        )
+
+    def close_tab(self, index: int) -> None:
+        widget = self.widget(index)
+        if widget is None:
+            return
+
+        # removeTab does not delete the widget
+        self.removeTab(index)
+        if widget in self._activation_order:
+            self._activation_order.remove(widget)
+        widget.release()
+        widget.deleteLater()
+
     def mouseReleaseEvent(self, event):
         if event.button() == Qt.MidButton:
-            self.removeTab(self.clicked_index)
+            self.close_tab(self.clicked_index)
         super(ViewerTabs, self).mouseReleaseEvent(event)
 
     def tab_clicked(self, index):
@@ -101,4 +409,4 @@ class ViewerTabs(QTabWidget):
 
     def clear(self) -> None:
         for i in reversed(range(self.count())):
-            self.removeTab(i)
+            self.close_tab(i)
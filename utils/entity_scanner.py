@@ -0,0 +1,102 @@
+"""Read the references written in .entity files, without EntityLib.
+
+Only the file's JSON is parsed, neither its schema nor its prefab are loaded,
+so a scan gives the references the file declares itself: its instanceOf, and
+the ones of its containers' entries, embedded entries being scanned as part
+of their file. Sub scenes a file inherits from its prefab are the prefab's
+references.
+
+Scans give up, returning None, on what only EntityLib can interpret, so
+callers fall back to a full load. is_set and overrides are never scanned.
+"""
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from PropertyGrapher.utils.property_helper import get_config
+
+INSTANCE_OF_KEY = "InstanceOf"
+
+
+class AmbiguousEntity(Exception):
+    """File content needs EntityLib to be interpreted."""
+
+
+@dataclass
+class ScannedEntity:
+    """References declared in an entity file."""
+
+    instance_of: Optional[str] = None
+    # Files instanced by containers' entries, embedded entries' ones included
+    sub_scenes: List[str] = field(default_factory=list)
+
+    @property
+    def dependencies(self) -> List[str]:
+        if self.instance_of:
+            return [self.instance_of, *self.sub_scenes]
+        return list(self.sub_scenes)
+
+
+def get_instance_of(data: dict) -> Optional[str]:
+    instance_of = data.get(INSTANCE_OF_KEY)
+    if instance_of is not None and not isinstance(instance_of, str):
+        raise AmbiguousEntity(f"{INSTANCE_OF_KEY} is not a path: {instance_of!r}")
+    return instance_of or None
+
+
+def iter_container_entries(data: dict, container_path: str) -> Iterator[dict]:
+    """Yield the entries of the container at container_path, if data has one."""
+    value = data
+    for field_name in container_path.strip("/").split("/"):
+        if not isinstance(value, dict):
+            raise AmbiguousEntity(f"{field_name} of {container_path} is not an object")
+        value = value.get(field_name)
+        if value is None:
+            return
+
+    # Arrays and sets are lists, maps are objects keyed by name
+    if isinstance(value, dict):
+        entries = list(value.values())
+    elif isinstance(value, list):
+        entries = value
+    else:
+        raise AmbiguousEntity(f"{container_path} is not a container")
+
+    for entry in entries:
+        if not isinstance(entry, dict):
+            raise AmbiguousEntity(f"{container_path} has a non object entry")
+        yield entry
+
+
+def scan_object(data: dict, container_paths: List[str], scanned: ScannedEntity) -> None:
+    for container_path in container_paths:
+        for entry in iter_container_entries(data, container_path):
+            instance_of = get_instance_of(entry)
+            if instance_of:
+                scanned.sub_scenes.append(instance_of)
+            else:
+                # Embedded entries' sub scenes are declared in the same file
+                scan_object(entry, container_paths, scanned)
+
+
+def scan_entity(data: dict, container_paths: List[str] = None) -> ScannedEntity:
+    """Scan an entity's parsed JSON, raise AmbiguousEntity if it can't be."""
+    if not isinstance(data, dict):
+        raise AmbiguousEntity("Entity is not an object")
+    container_paths = container_paths or get_config()["containers"]
+
+    scanned = ScannedEntity(instance_of=get_instance_of(data))
+    scan_object(data, container_paths, scanned)
+    return scanned
+
+
+def scan_entity_file(
+    file_path: Path, container_paths: List[str] = None
+) -> Optional[ScannedEntity]:
+    """Scan an entity file, None if it needs EntityLib to be resolved."""
+    try:
+        with open(file_path, "rb") as entity_file:
+            return scan_entity(json.load(entity_file), container_paths)
+    except (OSError, ValueError, AmbiguousEntity):
+        return None
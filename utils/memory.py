@@ -0,0 +1,50 @@
+import os
+import sys
+from typing import Optional
+
+
+def get_process_memory() -> Optional[int]:
+    """Get current process resident memory in bytes, None if unknown."""
+
+    # psutil is optional, only used when available in the environment
+    try:
+        import psutil
+
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+
+    try:
+        with open("/proc/self/statm") as statm_file:
+            return int(statm_file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def get_peak_process_memory() -> Optional[int]:
+    """Get the process' peak resident memory in bytes, None if unknown."""
+
+    try:
+        import psutil
+
+        # Only given on Windows
+        peak = getattr(psutil.Process().memory_info(), "peak_wset", None)
+        if peak is not None:
+            return peak
+    except ImportError:
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux gives kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def format_memory(size: Optional[int]) -> str:
+    if size is None:
+        return "unknown"
+    return f"{size / (1024 * 1024):.0f} MB"
@@ -1,13 +1,20 @@
 from __future__ import annotations
 
+import functools
 import itertools
 import json
 import os
+import threading
+import weakref
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Tuple, Optional, Any
+from typing import TYPE_CHECKING, Dict, Iterable, List, Tuple, Optional, Any, Union
 
-from EntityLibPy import EntityLib, DataKind
-from EntityLibPy import Property as LibProperty
+# Snapshots' properties are used without EntityLib, it is only imported by
+# the functions reading native properties
+if TYPE_CHECKING:
+    from EntityLibPy import EntityLib
+    from EntityLibPy import Property as LibProperty
 
 
 def load_config() -> dict:
@@ -17,21 +24,339 @@ def load_config() -> dict:
         return json.load(config_file)
 
 
-CONFIG = load_config()
+@functools.lru_cache(maxsize=None)
+def get_config() -> dict:
+    """Get config, only loaded once first needed."""
+    return load_config()
+
+
+class ContainerNode:
+    """Node of the configured containers' paths tree.
+
+    Containers sharing a path prefix share the nodes of that prefix,
+    so their common fields are only accessed once per property.
+    """
+
+    def __init__(self) -> None:
+        self.children: Dict[str, ContainerNode] = {}
+        self.is_container = False
+
+    def add_path(self, container_path: str) -> None:
+        node = self
+        for field_name in container_path.strip("/").split("/"):
+            node = node.children.setdefault(field_name, ContainerNode())
+        node.is_container = True
+
+
+class ContainerTable:
+    """Resolve configured containers through direct field access.
+
+    Which fields of a containers' path an object can hold is given by its
+    schema, it is computed once per schema type and per path node.
+    """
+
+    def __init__(self, container_paths: List[str]) -> None:
+        self.root = ContainerNode()
+        for container_path in container_paths:
+            self.root.add_path(container_path)
+
+        self._object_fields: Dict[
+            Tuple[str, int], List[Tuple[str, ContainerNode]]
+        ] = {}
+
+    def get_fields(
+        self, prop: LibProperty, node: ContainerNode
+    ) -> List[Tuple[str, ContainerNode]]:
+        from EntityLibPy import DataKind
+
+        schema = prop.schema
+        if schema.data_kind != DataKind.object:
+            # Other kinds' children depend on data, not only on schema
+            return list(node.children.items())
+
+        key = (schema.name, id(node))
+        fields = self._object_fields.get(key)
+        if fields is None:
+            schema_fields = set(schema.properties.keys())
+            fields = [
+                (field_name, child_node)
+                for field_name, child_node in node.children.items()
+                if field_name in schema_fields
+            ]
+            self._object_fields[key] = fields
+        return fields
+
+    def get_containers(
+        self, prop: LibProperty, node: ContainerNode = None
+    ) -> List[LibProperty]:
+        from EntityLibPy import DataKind
+
+        node = node or self.root
+        if prop.schema.data_kind == DataKind.union:
+            prop = prop.get_union_data()
+
+        containers = []
+        for field_name, child_node in self.get_fields(prop, node):
+            child = get_property_child_by_name(prop, field_name)
+            if not child:
+                continue
+
+            if child_node.is_container:
+                containers.append(child)
+            if child_node.children:
+                containers.extend(self.get_containers(child, child_node))
+        return containers
+
+
+# Container tables are built once per EntityLib, and released with it
+_CONTAINER_TABLES: weakref.WeakKeyDictionary[
+    EntityLib, ContainerTable
+] = weakref.WeakKeyDictionary()
+
+
+def get_container_table(entity_lib: EntityLib) -> ContainerTable:
+    table = _CONTAINER_TABLES.get(entity_lib)
+    if table is None:
+        table = _CONTAINER_TABLES.setdefault(
+            entity_lib, ContainerTable(get_config()["containers"])
+        )
+    return table
+
+
+def get_file_key(entity_lib: EntityLib, file_path: Path) -> str:
+    return os.path.normcase(
+        os.path.normpath(
+            os.path.join(str(entity_lib.rawdata_path), file_path.as_posix())
+        )
+    )
+
+
+def get_file_mtime(file_key: str) -> Optional[float]:
+    try:
+        return os.stat(file_key).st_mtime
+    except OSError:
+        return None
+
+
+@dataclass
+class SubSceneEntry:
+    """Container entry of a property, declaring one of its sub scenes."""
+
+    name: str
+    is_set: bool
+    instance_of: Optional[str] = None
+    # Only for entries instancing a file
+    property_path: Optional[str] = None
+    # Only for embedded entries, resolved as part of their file
+    embedded: Optional[ResolvedProperty] = None
+
+
+class ResolvedProperty:
+    """What the grapher reads from a native property, shared by its views.
+
+    Sub scenes' entries are read on first access, the native property is
+    then released, it keeps its whole loaded document alive.
+    Properties restored without EntityLib have neither EntityLib nor native
+    property, see snapshot.
+    """
+
+    def __init__(
+        self,
+        entity_lib: Optional[EntityLib],
+        prop: Optional[LibProperty],
+        is_set: bool,
+        instance_of: Optional[str],
+        mtime: Optional[float] = None,
+    ) -> None:
+        self.entity_lib = entity_lib
+        self.property = prop
+        self.is_set = is_set
+        self.instance_of = instance_of
+        # File's modification time when loaded, see PropertyStore
+        self.mtime = mtime
+        self._sub_scenes: Optional[List[SubSceneEntry]] = None
+
+    @classmethod
+    def from_property(
+        cls, prop: LibProperty, mtime: Optional[float] = None
+    ) -> ResolvedProperty:
+        return cls(prop.entitylib, prop, prop.is_set, prop.first_instance_of, mtime)
+
+    @property
+    def sub_scenes(self) -> List[SubSceneEntry]:
+        if self._sub_scenes is None:
+            self._sub_scenes = self.get_sub_scenes()
+            self.property = None
+        return self._sub_scenes
+
+    def get_sub_scenes(self) -> List[SubSceneEntry]:
+        sub_scenes = []
+        containers = get_container_table(self.entity_lib).get_containers(self.property)
+        for container in containers:
+            for i in range(container.size):
+                child_prop, child_name, _ = get_property_child_by_index(container, i)
+                if not child_prop:
+                    continue
+
+                if child_prop.first_instance_of:
+                    sub_scenes.append(
+                        SubSceneEntry(
+                            child_name,
+                            child_prop.is_set,
+                            instance_of=child_prop.first_instance_of,
+                            property_path=child_prop.absolute_noderef,
+                        )
+                    )
+                else:
+                    sub_scenes.append(
+                        SubSceneEntry(
+                            child_name,
+                            child_prop.is_set,
+                            embedded=ResolvedProperty.from_property(child_prop),
+                        )
+                    )
+        return sub_scenes
+
+
+class PropertyStore:
+    """Properties loaded from an EntityLib, resolved once for all graphers.
+
+    One ResolvedProperty is kept per file while GraphProperty views hold it,
+    so graphs sharing files, in tabs, jobs or caches, share their resolution,
+    and memory grows with the files loaded instead of the graphs.
+    Views keep the properties they were built from, invalidated files are
+    only loaded again by new views.
+    Like EntityLib, properties are resolved under their callers' lock.
+    """
+
+    def __init__(self, entity_lib: EntityLib) -> None:
+        # Stores are kept while their EntityLib is, see get_property_store
+        self._entity_lib = weakref.ref(entity_lib)
+        self._lock = threading.Lock()
+        self._properties: weakref.WeakValueDictionary[
+            str, ResolvedProperty
+        ] = weakref.WeakValueDictionary()
+
+    @property
+    def entity_lib(self) -> EntityLib:
+        return self._entity_lib()
+
+    def __len__(self) -> int:
+        return len(self._properties)
+
+    def load(self, file_path: Path) -> ResolvedProperty:
+        file_key = get_file_key(self.entity_lib, file_path)
+        with self._lock:
+            resolved = self._properties.get(file_key)
+        if resolved is not None:
+            return resolved
+
+        resolved = ResolvedProperty.from_property(
+            self.entity_lib.load_property(file_path.as_posix()),
+            get_file_mtime(file_key),
+        )
+        with self._lock:
+            return self._properties.setdefault(file_key, resolved)
+
+    def get_dependents(self, file_keys: Iterable[str]) -> List[str]:
+        """Get file_keys and the stored files inheriting from them."""
+        prefab_children: Dict[str, List[str]] = {}
+        with self._lock:
+            for file_key, resolved in list(self._properties.items()):
+                if resolved.instance_of:
+                    prefab_key = get_file_key(
+                        self.entity_lib, Path(resolved.instance_of)
+                    )
+                    prefab_children.setdefault(prefab_key, []).append(file_key)
+
+        dependents = set()
+        file_keys_to_visit = list(file_keys)
+        while file_keys_to_visit:
+            file_key = file_keys_to_visit.pop()
+            if file_key not in dependents:
+                dependents.add(file_key)
+                file_keys_to_visit.extend(prefab_children.get(file_key, []))
+        return sorted(dependents)
+
+    def invalidate(self, file_paths: List[Path] = None) -> List[str]:
+        """Forget file_paths, all files if None, and the files inheriting from them.
+
+        Return the invalidated files' keys.
+        """
+        if file_paths is None:
+            with self._lock:
+                file_keys = list(self._properties.keys())
+        else:
+            file_keys = self.get_dependents(
+                get_file_key(self.entity_lib, file_path) for file_path in file_paths
+            )
+
+        with self._lock:
+            for file_key in file_keys:
+                self._properties.pop(file_key, None)
+        return file_keys
+
+    def invalidate_outdated(self) -> List[str]:
+        """Forget the files modified since they were loaded, see invalidate.
+
+        Return the invalidated files' keys.
+        """
+        with self._lock:
+            outdated = [
+                file_key
+                for file_key, resolved in list(self._properties.items())
+                if get_file_mtime(file_key) != resolved.mtime
+            ]
+        if not outdated:
+            return []
+
+        file_keys = self.get_dependents(outdated)
+        with self._lock:
+            for file_key in file_keys:
+                self._properties.pop(file_key, None)
+        return file_keys
+
+
+# Property stores are shared by all the graphers of an EntityLib,
+# and released with it
+_PROPERTY_STORES: weakref.WeakKeyDictionary[
+    EntityLib, PropertyStore
+] = weakref.WeakKeyDictionary()
+
+
+def get_property_store(entity_lib: EntityLib) -> PropertyStore:
+    store = _PROPERTY_STORES.get(entity_lib)
+    if store is None:
+        store = _PROPERTY_STORES.setdefault(entity_lib, PropertyStore(entity_lib))
+    return store
 
 
 class GraphProperty:
+    """View of a resolved property, at its place in a hierarchy.
+
+    Parents, overrides and cycles depend on how the property is reached,
+    they are the view's own, what is read from EntityLib is shared.
+    """
+
     def __init__(
         self,
-        prop: LibProperty,
+        prop: Union[LibProperty, ResolvedProperty],
         file_path: Path,
         property_name: Optional[str] = None,
         parent: GraphProperty = None,
         source_is_set: Optional[bool] = None,
+        file_key: Optional[str] = None,
     ) -> None:
 
-        self.entity_lib = prop.entitylib
-        self.property = prop
+        # Native properties not loaded from the store are only viewed by this one
+        self.resolved = (
+            prop
+            if isinstance(prop, ResolvedProperty)
+            else ResolvedProperty.from_property(prop)
+        )
+        self.entity_lib = self.resolved.entity_lib
+        self._is_set = self.resolved.is_set
+        self._instance_of = self.resolved.instance_of
         self.parent = parent
 
         self.file_path = file_path.as_posix()
@@ -39,9 +364,17 @@ class GraphProperty:
         self.property_name = property_name
         self._property_path = None
 
-        self.prefab = self.get_prefab()
-        self.sub_scenes = self.get_sub_scenes()
-        self.check_for_overrides()
+        # Identifies the file this property comes from, to detect cycles
+        # Embedded sub scenes are given the key of the file they are declared in
+        self.file_key = file_key or self.get_file_key(file_path)
+        # Files referenced by this property that are already in its hierarchy
+        self.cyclic_references: List[str] = []
+
+        # Prefab and sub scenes are loaded on first access,
+        # so the hierarchy can be discovered one level at a time
+        self._prefab_loaded = False
+        self._prefab = None
+        self._sub_scenes = None
 
         # Used to override is_set value from source property
         self.source_is_set = source_is_set
@@ -60,15 +393,39 @@ class GraphProperty:
         else:
             return self.file_name
 
+    @property
+    def prefab(self) -> Optional[GraphProperty]:
+        if not self._prefab_loaded:
+            self._prefab = self.get_prefab()
+            self._prefab_loaded = True
+        return self._prefab
+
+    @property
+    def sub_scenes(self) -> List[GraphProperty]:
+        if self._sub_scenes is None:
+            # Prefab's sub scenes are needed to check for overrides,
+            # load them from the deepest prefab up instead of recursing
+            prefabs_chain = []
+            prop = self
+            while prop is not None and prop._sub_scenes is None:
+                prefabs_chain.append(prop)
+                prop = prop.prefab
+
+            for prop in reversed(prefabs_chain):
+                prop._sub_scenes = prop.get_sub_scenes()
+                prop.check_for_overrides()
+        return self._sub_scenes
+
     @property
     def property_path(self) -> Optional[str]:
-        if self._property_path:
-            if self.parent and self.parent.property_path:
-                return f"{self.parent.property_path}/{self._property_path}"
-            else:
-                return self._property_path
-        else:
-            return None
+        # Property path is prefixed by the ones of its parents, up to the
+        # first parent without property path
+        property_paths = []
+        prop = self
+        while prop and prop._property_path:
+            property_paths.append(prop._property_path)
+            prop = prop.parent
+        return "/".join(reversed(property_paths)) or None
 
     @property_path.setter
     def property_path(self, value: str) -> None:
@@ -87,14 +444,20 @@ class GraphProperty:
 
     @property
     def instance_of(self) -> Optional[str]:
-        return self.property.first_instance_of
+        return self._instance_of
 
     @property
     def is_set(self) -> bool:
         if self.source_is_set is not None:
             return self.source_is_set
         else:
-            return self.property.is_set
+            return self._is_set
+
+    def has_children(self) -> bool:
+        """Whether the property has a prefab or sub scenes, without loading them."""
+        if self._sub_scenes is not None:
+            return bool(self._instance_of or self._sub_scenes)
+        return bool(self._instance_of or self.resolved.sub_scenes)
 
     @staticmethod
     def load_from_file(
@@ -103,7 +466,7 @@ class GraphProperty:
         property_name: str = None,
         parent: GraphProperty = None,
     ) -> GraphProperty:
-        prop = entity_lib.load_property(file_to_open.as_posix())
+        prop = get_property_store(entity_lib).load(file_to_open)
         return GraphProperty(
             prop,
             file_to_open,
@@ -111,8 +474,21 @@ class GraphProperty:
             parent=parent,
         )
 
+    def get_file_key(self, file_path: Path) -> str:
+        return get_file_key(self.entity_lib, file_path)
+
+    def is_in_hierarchy(self, file_path: Path) -> bool:
+        """Whether file_path is this property's file or one of its parents' one."""
+        file_key = self.get_file_key(file_path)
+        prop = self
+        while prop:
+            if prop.file_key == file_key:
+                return True
+            prop = prop.parent
+        return False
+
     def is_introduced_in(self, prop: GraphProperty) -> bool:
-        if not self.property.is_set:
+        if not self._is_set:
             return False
 
         if not prop.prefab:
@@ -128,55 +504,57 @@ class GraphProperty:
                 return child
         return None
 
-    def get_sub_scenes_containers(self) -> List[LibProperty]:
-        sub_scenes = []
-        for child_node_ref in CONFIG["containers"]:
-            child_prop_name = child_node_ref.split("/")[-1]
-
-            # Begin by searching children with matching names
-            # name is taken from the last part of the declared container's path
-            for child in self.property.search_child(child_prop_name):
-
-                # Only keep direct children
-                # a direct child has only one matching node reference path
-                # in it own node reference path
-                if child.absolute_noderef.count(child_node_ref) == 1:
-                    sub_scenes.append(child)
+    def release_children(self) -> None:
+        """Drop the loaded prefab and sub scenes, they are not loaded again.
 
-        return sub_scenes
+        Only for walks visiting each property once, the property then has
+        neither prefab nor sub scenes.
+        """
+        self._prefab_loaded = True
+        self._prefab = None
+        self._sub_scenes = []
 
     def get_prefab(self) -> Optional[GraphProperty]:
-        prefab = self.property.first_instance_of
-        if prefab:
-            return self.load_from_file(self.entity_lib, Path(prefab), parent=self)
-        return None
+        prefab = self._instance_of
+        if not prefab:
+            return None
+
+        # Loading a file from its own hierarchy would never end
+        if self.is_in_hierarchy(Path(prefab)):
+            self.cyclic_references.append(prefab)
+            return None
+        return self.load_from_file(self.entity_lib, Path(prefab), parent=self)
 
     def get_sub_scenes(self) -> List[GraphProperty]:
         sub_scenes = []
-        for container in self.get_sub_scenes_containers():
-            for i in range(container.size):
-                child_prop, child_name, _ = get_property_child_by_index(container, i)
-                if not child_prop:
-                    continue
-
-                if child_prop.first_instance_of:
-                    source_is_set = child_prop.is_set
-                    new_sub_scene = self.load_from_file(
-                        self.entity_lib,
-                        Path(child_prop.first_instance_of),
-                        property_name=child_name,
-                        parent=self,
-                    )
-
-                    # Set source is set from child property instead
-                    # of the one loaded from the instance of file
-                    # This way we get the right is_set value for this sub property
-                    new_sub_scene.source_is_set = source_is_set
-                    new_sub_scene.property_path = child_prop.absolute_noderef
+        for entry in self.resolved.sub_scenes:
+            if entry.instance_of and self.is_in_hierarchy(Path(entry.instance_of)):
+                self.cyclic_references.append(entry.instance_of)
+                continue
+
+            if entry.instance_of:
+                new_sub_scene = self.load_from_file(
+                    self.entity_lib,
+                    Path(entry.instance_of),
+                    property_name=entry.name,
+                    parent=self,
+                )
+
+                # Set source is set from child property instead
+                # of the one loaded from the instance of file
+                # This way we get the right is_set value for this sub property
+                new_sub_scene.source_is_set = entry.is_set
+                new_sub_scene.property_path = entry.property_path
 
-                else:
-                    new_sub_scene = GraphProperty(child_prop, Path(child_name), parent=self)
-                sub_scenes.append(new_sub_scene)
+            else:
+                # Embedded sub scenes are resolved as their parent
+                new_sub_scene = type(self)(
+                    entry.embedded,
+                    Path(entry.name),
+                    parent=self,
+                    file_key=self.file_key,
+                )
+            sub_scenes.append(new_sub_scene)
         return sub_scenes
 
     def check_for_overrides(self) -> None:
@@ -204,9 +582,36 @@ class GraphProperty:
         )
 
 
+def get_property_child_by_name(
+    root_prop: LibProperty, name: str
+) -> Optional[LibProperty]:
+    from EntityLibPy import DataKind
+
+    kind = root_prop.schema.data_kind
+
+    if kind == DataKind.object:
+        return root_prop.get_object_field(name)
+
+    elif kind == DataKind.map:
+        if name in root_prop.map_keys:
+            return root_prop.get_map_item(name)
+
+    elif kind == DataKind.objectSet:
+        if name in root_prop.objectset_keys:
+            return root_prop.get_objectset_item(name)
+
+    elif kind == DataKind.unionSet:
+        if name in root_prop.unionset_keys:
+            return root_prop.get_unionset_item(name)
+
+    return None
+
+
 def get_property_child_by_index(
     root_prop: LibProperty, index: int, inline: bool = False
 ) -> Tuple[LibProperty, str, Any]:
+    from EntityLibPy import DataKind
+
     kind = root_prop.schema.data_kind
     property_name = new_property = property_value = None
 